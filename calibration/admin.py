@@ -10,6 +10,9 @@ from .models import (
     GasolineBlendCalculation,
     SavedProductConfiguration,
     ProcessingCalculation,
+    CalculationJournal,
+    BlendJob,
+    OctaneInteraction,
 )
 
 
@@ -547,6 +550,92 @@ class ProcessingCalculationAdmin(admin.ModelAdmin):
         return False
 
 
+
+@admin.register(CalculationJournal)
+class CalculationJournalAdmin(admin.ModelAdmin):
+    list_display = [
+        'timestamp',
+        'calculation_type',
+        'source_id',
+        'tank_name',
+        'product_name',
+        'summary'
+    ]
+    list_filter = [
+        'calculation_type',
+        'timestamp',
+    ]
+    search_fields = ['summary', 'tank_name', 'product_name']
+    readonly_fields = [
+        'calculation_type',
+        'source_id',
+        'timestamp',
+        'tank',
+        'product',
+        'tank_name',
+        'product_name',
+        'summary',
+        'key_values'
+    ]
+
+    def has_add_permission(self, request):
+        # Журнал ведется автоматически при сохранении расчетов
+        return False
+
+@admin.register(BlendJob)
+class BlendJobAdmin(admin.ModelAdmin):
+    list_display = [
+        'id',
+        'target_octane',
+        'status',
+        'progress_percent',
+        'best_price',
+        'created_at',
+        'finished_at'
+    ]
+    list_filter = [
+        'status',
+        'created_at',
+    ]
+    readonly_fields = [
+        'status',
+        'request_data',
+        'target_octane',
+        'steps_total',
+        'steps_done',
+        'best_price',
+        'partial_results',
+        'calculation',
+        'error',
+        'created_at',
+        'started_at',
+        'finished_at'
+    ]
+
+    def has_add_permission(self, request):
+        # Задачи создаются только через интерфейс приложения
+        return False
+
+
+@admin.register(OctaneInteraction)
+class OctaneInteractionAdmin(admin.ModelAdmin):
+    list_display = [
+        'product_a',
+        'product_b',
+        'coefficient'
+    ]
+    list_filter = [
+        'product_a',
+    ]
+    search_fields = [
+        'product_a__name',
+        'product_b__name'
+    ]
+    autocomplete_fields = [
+        'product_a',
+        'product_b'
+    ]
+
 # Настройка заголовков админки
 admin.site.site_header = "Администрирование калькулятора калибровки резервуаров"
 admin.site.site_title = "Админ панель калькулятора"
@@ -0,0 +1,257 @@
+"""
+Aralashma optimizatorlari uchun benchmark va sifat to'plami
+Sintetik product to'plamlari (3, 5, 10, 20, 50 komponent) qat'iy seed bilan yaratiladi:
+real komponent turlari (to'g'ri haydalgan nafta, izomerat, riformat, alkilat, MTBE, ...)
+oktan, narx va GOST cheklovlari bilan. Har bir optimizator (backend) uchun kechikish,
+baholashlar soni va aniq LP yechimiga nisbatan optimallik farqi (gap) o'lchanadi.
+Natija - JSON hisobot; avvalgi hisobot (baseline) bilan solishtirish mumkin.
+"""
+import platform
+import statistics
+import time
+
+import numpy as np
+import scipy
+from django.utils import timezone
+
+from .genetic_algorithm import genetic_optimize_blend
+from .linear_programming import (
+    blend_arrays, solve_blend_lp, solve_blend_milp, price_octane_frontier, frontier_representatives,
+)
+from .optimization import optimize_multi_product_blend, BlendProduct
+from .perf import PerfRecorder
+
+# Hisobot formati o'zgarganda oshiriladi
+REPORT_VERSION = 1
+
+PRODUCT_SET_SIZES = (3, 5, 10, 20, 50)
+TARGET_OCTANES = (80, 92, 95)
+DEFAULT_SEED = 20240601
+
+# Variant maqsadga yetgan deb hisoblanadi (natijalar 2 xonagacha yaxlitlangan)
+OCTANE_TOLERANCE = 0.05
+
+# Komponent turlari: (nom, oktan oralig'i, narx oralig'i (so'm/kg), GOST cheklovi %).
+# Tartib shunday: har bir prefiks past va yuqori oktanli komponentlarni o'z ichiga oladi
+COMPONENT_TYPES = [
+    ('Straight-run naphtha', (60, 68), (5.0, 6.0), 100),
+    ('Reformate', (94, 100), (9.0, 10.5), 70),
+    ('Isomerate', (86, 90), (8.0, 9.0), 100),
+    ('MTBE', (110, 118), (12.0, 14.0), 15),
+    ('FCC gasoline', (90, 93), (8.0, 9.0), 100),
+    ('Light naphtha', (68, 74), (5.5, 6.5), 100),
+    ('Alkylate', (92, 96), (10.0, 11.0), 100),
+    ('Toluene', (106, 112), (11.0, 12.5), 30),
+]
+
+
+def synthetic_products(size, seed=DEFAULT_SEED):
+    """size ta komponentli deterministik to'plam (BlendProduct ro'yxati)"""
+    rng = np.random.default_rng([seed, size])
+    products = []
+    for index in range(size):
+        name, octane_range, price_range, cap = COMPONENT_TYPES[index % len(COMPONENT_TYPES)]
+        products.append(BlendProduct(
+            id=index + 1,
+            name=f'{name} #{index // len(COMPONENT_TYPES) + 1}',
+            octane_number=round(float(rng.uniform(*octane_range)), 1),
+            price_per_liter=round(float(rng.uniform(*price_range)), 2),
+            gost_percentage=float(cap),
+        ))
+    return products
+
+
+def _variants_percentages(products, variants):
+    """Optimizator variantlari -> to'liq foizlar massivlari (products tartibida)"""
+    position = {p.id: i for i, p in enumerate(products)}
+    result = []
+    for variant in variants or []:
+        percentages = np.zeros(len(products))
+        for product, pct in zip(variant['products'], variant['percentages']):
+            percentages[position[product.id]] = pct
+        result.append(percentages)
+    return result
+
+
+def _run_frontier(products, target_octane, deadline_ms, perf, seed):
+    octanes, prices, caps = blend_arrays(products)
+    frontier = price_octane_frontier(octanes, prices, caps)
+    if frontier is None:
+        return []
+    return [percentages for _, percentages in frontier_representatives(frontier, target_octane, count=1)]
+
+
+def _run_milp(products, target_octane, deadline_ms, perf, seed):
+    octanes, prices, caps = blend_arrays(products)
+    percentages = solve_blend_milp(octanes, prices, caps, target_octane, max_products=4, deadline=deadline_ms)
+    return [] if percentages is None else [percentages]
+
+
+def _run_combinations(solver, use_ai=True):
+    def run(products, target_octane, deadline_ms, perf, seed):
+        variants = optimize_multi_product_blend(
+            products, target_octane, max_products=min(4, len(products)), use_ai=use_ai, num_variants=5,
+            solver=solver, seed=seed, deadline=deadline_ms, perf=perf
+        )
+        return _variants_percentages(products, variants)
+    return run
+
+
+def _run_ga(engine):
+    def run(products, target_octane, deadline_ms, perf, seed):
+        variant = genetic_optimize_blend(products, target_octane, num_variants=1, engine=engine,
+                                         deadline=deadline_ms, perf=perf, rng=seed)
+        return _variants_percentages(products, [variant] if variant else [])
+    return run
+
+
+# Backend nomi -> callable(products, target_octane, deadline_ms, perf, seed) -> [foizlar massivi, ...];
+# seed - tasodifiy optimizatorlar uchun (har bir takror o'z seed'i bilan, hisobot takrorlanadi)
+BACKENDS = {
+    'frontier': _run_frontier,
+    'milp': _run_milp,
+    'combinations_lp': _run_combinations('milp'),
+    'combinations_ga': _run_combinations('genetic'),
+    'combinations_gradient': _run_combinations('genetic', use_ai=False),
+    'ga_numpy': _run_ga('numpy'),
+    'ga_python': _run_ga('python'),
+}
+
+
+def best_feasible(percentages_list, octanes, prices, caps, target_octane):
+    """Maqsadga yetgan va GOST cheklovlariga mos eng arzon sostav narxi yoki None"""
+    best = None
+    for percentages in percentages_list:
+        octane = float(percentages @ octanes) / 100.0
+        if octane < target_octane - OCTANE_TOLERANCE or np.any(percentages > caps + 0.01):
+            continue
+        price = float(percentages @ prices) / 100.0
+        if best is None or price < best:
+            best = price
+    return best
+
+
+def _summary(values):
+    values = [v for v in values if v is not None]
+    if not values:
+        return None
+    return {
+        'median': round(statistics.median(values), 4),
+        'min': round(min(values), 4),
+        'max': round(max(values), 4),
+    }
+
+
+def benchmark_case(products, target_octane, backend, repeats=3, deadline_ms=2000, seed=DEFAULT_SEED):
+    """Bitta (to'plam, maqsad, backend) holati - repeats marta ishga tushirish"""
+    octanes, prices, caps = blend_arrays(products)
+    reference = solve_blend_lp(octanes, prices, caps, target_octane)
+    reference_price = None if reference is None else float(reference @ prices) / 100.0
+
+    latencies, evaluations, saved, gaps, prices_found = [], [], [], [], []
+    feasible_runs = completed_runs = 0
+    for repeat in range(repeats):
+        perf = PerfRecorder()
+        started = time.perf_counter()
+        run_seed = [seed, len(products), int(target_octane), repeat]
+        percentages_list = BACKENDS[backend](products, target_octane, deadline_ms, perf, run_seed)
+        elapsed_ms = (time.perf_counter() - started) * 1000.0
+        latencies.append(elapsed_ms)
+        completed_runs += elapsed_ms < deadline_ms
+        evaluations.append(perf.counters.get('fitness_evaluations', 0) + perf.counters.get('combinations_tried', 0))
+        # Yaqinlashish nazorati tejagan GA baholashlari va gradient descent iteratsiyalari
+        saved.append(perf.counters.get('fitness_evaluations_saved', 0) + perf.counters.get('gd_iterations_saved', 0))
+
+        price = best_feasible(percentages_list, octanes, prices, caps, target_octane)
+        prices_found.append(price)
+        if price is not None:
+            feasible_runs += 1
+            if reference_price:
+                gaps.append((price - reference_price) / reference_price * 100.0)
+
+    return {
+        'products': len(products),
+        'target_octane': target_octane,
+        'backend': backend,
+        'repeats': repeats,
+        'reference_price': None if reference_price is None else round(reference_price, 4),
+        'latency_ms': _summary(latencies),
+        'evaluations': _summary(evaluations),
+        'evaluations_saved': _summary(saved),
+        'price': _summary(prices_found),
+        'gap_pct': _summary(gaps),
+        'feasible_rate': round(feasible_runs / repeats, 3),
+        'within_budget_rate': round(completed_runs / repeats, 3),
+    }
+
+
+def run_benchmark(sizes=PRODUCT_SET_SIZES, targets=TARGET_OCTANES, backends=None, repeats=3, deadline_ms=2000,
+                  seed=DEFAULT_SEED, on_case=None):
+    """
+    Barcha holatlar bo'yicha hisobot (dict). on_case - callable(natija) har bir holatdan keyin
+    (masalan, konsolga chiqarish uchun).
+    """
+    backends = list(backends or BACKENDS)
+    unknown = set(backends) - set(BACKENDS)
+    if unknown:
+        raise ValueError(f"Noma'lum backend: {', '.join(sorted(unknown))}")
+
+    results = []
+    for size in sizes:
+        products = synthetic_products(size, seed)
+        for target_octane in targets:
+            for backend in backends:
+                result = benchmark_case(products, target_octane, backend, repeats, deadline_ms, seed)
+                results.append(result)
+                if on_case:
+                    on_case(result)
+
+    return {
+        'version': REPORT_VERSION,
+        'created_at': timezone.now().isoformat(),
+        'environment': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'scipy': scipy.__version__,
+            'machine': platform.machine(),
+        },
+        'parameters': {
+            'sizes': list(sizes),
+            'targets': list(targets),
+            'backends': backends,
+            'repeats': repeats,
+            'deadline_ms': deadline_ms,
+            'seed': seed,
+            'reference': 'continuous LP (no product count limit)',
+        },
+        'results': results,
+    }
+
+
+def compare_reports(report, baseline, latency_tolerance=0.25, gap_tolerance=0.5):
+    """
+    Hisobotni baseline bilan solishtirish: regressiyalar ro'yxati (matn).
+    Kechikish mediani baseline dan (1 + latency_tolerance) martadan oshsa, gap mediani
+    gap_tolerance foiz punktdan ko'proq oshsa yoki yechim topilish ulushi kamaysa.
+    """
+    def key(result):
+        return result['products'], result['target_octane'], result['backend']
+
+    previous = {key(result): result for result in baseline.get('results', [])}
+    regressions = []
+    for result in report['results']:
+        old = previous.get(key(result))
+        if old is None:
+            continue
+        label = f"{result['backend']} n={result['products']} AI-{result['target_octane']}"
+        if result['latency_ms'] and old.get('latency_ms'):
+            new_ms, old_ms = result['latency_ms']['median'], old['latency_ms']['median']
+            if new_ms > old_ms * (1 + latency_tolerance):
+                regressions.append(f"{label}: latency {old_ms:.1f} -> {new_ms:.1f} ms")
+        if result['gap_pct'] and old.get('gap_pct'):
+            new_gap, old_gap = result['gap_pct']['median'], old['gap_pct']['median']
+            if new_gap > old_gap + gap_tolerance:
+                regressions.append(f"{label}: gap {old_gap:.2f}% -> {new_gap:.2f}%")
+        if result['feasible_rate'] < old.get('feasible_rate', 0):
+            regressions.append(f"{label}: feasible rate {old['feasible_rate']} -> {result['feasible_rate']}")
+    return regressions
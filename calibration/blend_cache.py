@@ -0,0 +1,217 @@
+"""
+Benzin aralashma natijalari keshi (kontent bo'yicha adreslangan)
+- kalit: so'rov parametrlarining kanonik sha256 xeshi (productlar id bo'yicha saralangan,
+  oktan, narx, GOST cheklovlari, maqsad oktan, umumiy og'irlik, usul, variantlar soni,
+  komponentlar soni cheklovi, tasodifiy qidiruv uchun so'rovda aniq berilgan seed,
+  chiziqli bo'lmagan oktan modeli parametrlari - octane_model_fingerprint);
+- jarayon ichidagi LRU (tez, mikrosekundlarda), ixtiyoriy umumiy Django cache backend;
+- Product yoki OctaneInteraction o'zgarganda (post_save / post_delete) tegishli productlar
+  yozuvlari eskiradi.
+"""
+import copy
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+# Algoritm o'zgarganda oshiriladi - eski natijalar avtomatik eskiradi
+BLEND_CACHE_VERSION = 6
+KEY_PREFIX = 'blend'
+
+
+def _round(value):
+    return round(float(value), 6)
+
+
+def octane_model_fingerprint(method, product_ids):
+    """
+    Oktan modeli parametrlari (kalit uchun): 'weighted' - settings.OCTANE_BLENDING_INDEX_K,
+    'research' - productlar orasidagi β koeffitsientlari xeshi (bitta so'rov), 'linear' - None
+    """
+    if method == 'weighted':
+        index_k = getattr(settings, 'OCTANE_BLENDING_INDEX_K', None)
+        return _round(index_k) if index_k is not None else None
+    if method != 'research':
+        return None
+    from .models import OctaneInteraction
+
+    ids = sorted({int(pid) for pid in product_ids})
+    pairs = sorted(
+        (min(a, b), max(a, b), _round(coefficient))
+        for a, b, coefficient in OctaneInteraction.objects.filter(
+            product_a_id__in=ids, product_b_id__in=ids
+        ).values_list('product_a_id', 'product_b_id', 'coefficient')
+        if a != b
+    )
+    return hashlib.sha256(json.dumps(pairs, separators=(',', ':')).encode()).hexdigest()
+
+
+def blend_cache_key(target_octane, products_data, total_weight=None, method='linear', variants_count=5,
+                    max_products=None, seed=None, octane_model=None):
+    """
+    Kanonik kalit: bir xil kiritishlar har doim bir xil xeshni beradi
+    (productlar tartibi, id turi (str/int) va son ko'rinishi ahamiyatsiz).
+    seed - faqat so'rovda aniq berilgan bo'lsa (qayta ishga tushirish aynan shu seed bilan hisoblanadi)
+    octane_model - octane_model_fingerprint: β yoki index k o'zgarsa kalit ham o'zgaradi
+    """
+    products = sorted(
+        (int(product_id), _round(data['octane']), _round(data['price']), _round(data.get('gost_percentage') or 100))
+        for product_id, data in products_data.items()
+    )
+    payload = json.dumps({
+        'version': BLEND_CACHE_VERSION,
+        'products': products,
+        'target_octane': _round(target_octane),
+        'total_weight': _round(total_weight) if total_weight else None,
+        'method': method,
+        'variants_count': int(variants_count),
+        'max_products': int(max_products) if max_products else None,
+        'seed': seed,
+        'octane_model': octane_model,
+    }, separators=(',', ':'))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class BlendResultCache:
+    """
+    Ikki darajali kesh: jarayon ichidagi LRU + ixtiyoriy umumiy backend (settings.BLEND_CACHE_ALIAS).
+    Har bir yozuv tegishli productlar ro'yxatini va ularning versiyalarini saqlaydi.
+    Umumiy backend bo'lsa, product versiyalari ham unda saqlanadi - boshqa jarayonda
+    o'zgartirilgan product ham shu jarayondagi yozuvlarni eskirtiradi.
+    """
+
+    def __init__(self, max_size=256, alias=None, timeout=None):
+        self.max_size = max_size
+        self.alias = alias
+        self.timeout = timeout
+        self._entries = OrderedDict()
+        self._by_product = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def shared(self):
+        return caches[self.alias] if self.alias else None
+
+    @staticmethod
+    def _version_key(product_id):
+        return f'{KEY_PREFIX}:product:{product_id}'
+
+    def _product_versions(self, product_ids):
+        shared = self.shared
+        if shared is None:
+            return {}
+        stored = shared.get_many([self._version_key(pid) for pid in product_ids])
+        return {pid: stored.get(self._version_key(pid)) for pid in product_ids}
+
+    def _is_fresh(self, entry):
+        if self.shared is None:
+            # Faqat jarayon ichida: eskirgan yozuvlar signal orqali darhol o'chiriladi
+            return True
+        return self._product_versions(entry['product_ids']) == entry['versions']
+
+    def _remember(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            for pid in entry['product_ids']:
+                self._by_product.setdefault(pid, set()).add(key)
+            while len(self._entries) > self.max_size:
+                old_key, old_entry = self._entries.popitem(last=False)
+                self._unindex(old_key, old_entry)
+
+    def _unindex(self, key, entry):
+        for pid in entry['product_ids']:
+            keys = self._by_product.get(pid)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_product[pid]
+
+    def _forget(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._unindex(key, entry)
+
+    def get(self, key):
+        """Natija nusxasi va metama'lumot (source, age_seconds) yoki None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        source = 'local'
+
+        if entry is None and self.shared is not None:
+            source = 'shared'
+            entry = self.shared.get(f'{KEY_PREFIX}:result:{key}')
+            if entry is not None and self._is_fresh(entry):
+                self._remember(key, entry)
+            else:
+                entry = None
+        elif entry is not None and not self._is_fresh(entry):
+            self._forget(key)
+            entry = None
+
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return copy.deepcopy(entry['value']), {
+            'source': source,
+            'age_seconds': round(time.time() - entry['created_at'], 3),
+        }
+
+    def set(self, key, value, product_ids):
+        product_ids = sorted({int(pid) for pid in product_ids})
+        entry = {
+            'value': copy.deepcopy(value),
+            'product_ids': product_ids,
+            'versions': self._product_versions(product_ids),
+            'created_at': time.time(),
+        }
+        self._remember(key, entry)
+        if self.shared is not None:
+            self.shared.set(f'{KEY_PREFIX}:result:{key}', entry, self.timeout)
+
+    def invalidate_product(self, product_id, version=None):
+        """Product o'zgardi: tegishli yozuvlar o'chiriladi, umumiy backendda versiya yangilanadi"""
+        with self._lock:
+            for key in self._by_product.pop(product_id, set()):
+                entry = self._entries.pop(key, None)
+                if entry is not None:
+                    self._unindex(key, entry)
+        if self.shared is not None:
+            self.shared.set(self._version_key(product_id), version or time.time(), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_product.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_blend_cache():
+    """Sozlamalardan yaratiladigan umumiy kesh obyekti"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = BlendResultCache(
+                max_size=getattr(settings, 'BLEND_CACHE_SIZE', 256),
+                alias=getattr(settings, 'BLEND_CACHE_ALIAS', None),
+                timeout=getattr(settings, 'BLEND_CACHE_TIMEOUT', None),
+            )
+        return _cache
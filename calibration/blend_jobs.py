@@ -0,0 +1,155 @@
+"""
+Benzin aralashmasi uchun fon vazifalari (tashqi broker talab qilinmaydi)
+Vazifa BlendJob jadvalida saqlanadi va jarayon ichidagi ThreadPoolExecutor da bajariladi.
+Progress (bajarilgan qadamlar, eng yaxshi narx, oraliq natijalar) jadvalga
+settings.BLEND_JOB_PROGRESS_INTERVAL soniyada ko'pi bilan bir marta yoziladi -
+mijoz holat endpointini so'rab turadi, server oqimi band qilinmaydi.
+Tayyor natija GasolineBlendCalculation sifatida saqlanadi.
+
+Eslatma: vazifalar jarayon xotirasida bajariladi - jarayon qayta ishga tushsa,
+bajarilayotgan vazifalar 'running' holatida qoladi.
+"""
+import atexit
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+
+from .deadline import Deadline
+from .models import BlendJob
+
+logger = logging.getLogger(__name__)
+
+# Oraliq natijalarda saqlanadigan eng arzon variantlar soni
+PARTIAL_RESULTS_LIMIT = 5
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_job_executor():
+    """Fon vazifalari uchun umumiy oqimlar pooli (settings.BLEND_JOB_WORKERS)"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'BLEND_JOB_WORKERS', 2),
+                thread_name_prefix='blend-job'
+            )
+        return _executor
+
+
+def shutdown_job_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+atexit.register(shutdown_job_executor)
+
+
+def _summarize_variant(variant):
+    """Optimizator natijasi -> JSON uchun qisqa ko'rinish"""
+    return {
+        'products': [
+            {
+                'product_id': product.id,
+                'product_name': product.name,
+                'percentage': round(float(pct), 2)
+            }
+            for product, pct in zip(variant['products'], variant['percentages'])
+            if pct > 0.01
+        ],
+        'final_octane': variant['final_octane'],
+        'final_price': variant['final_price'],
+    }
+
+
+class JobProgress:
+    """
+    Optimizator progress callback'i: eng arzon variantlarni to'playdi va
+    BlendJob qatorini vaqt oralig'i bilan yangilaydi
+    """
+
+    def __init__(self, job_id, interval=None):
+        self.job_id = job_id
+        self.interval = getattr(settings, 'BLEND_JOB_PROGRESS_INTERVAL', 0.5) if interval is None else interval
+        self.best = []
+        self.done = 0
+        self.total = 0
+        self._written_at = 0.0
+
+    def __call__(self, done, total, new_variants):
+        self.done = max(self.done, done)
+        self.total = max(self.total, total)
+        if new_variants:
+            self.best = sorted(self.best + list(new_variants), key=lambda v: v['final_price'])[:PARTIAL_RESULTS_LIMIT]
+        if time.monotonic() - self._written_at >= self.interval:
+            self.flush()
+
+    def flush(self):
+        BlendJob.objects.filter(pk=self.job_id).update(
+            steps_done=self.done,
+            steps_total=self.total,
+            best_price=self.best[0]['final_price'] if self.best else None,
+            partial_results=[_summarize_variant(v) for v in self.best],
+        )
+        self._written_at = time.monotonic()
+
+
+def submit_blend_job(request_data, target_octane):
+    """Vazifa yaratish va navbatga qo'yish; BlendJob qaytariladi"""
+    job = BlendJob.objects.create(request_data=request_data, target_octane=target_octane)
+    # Oqim qatorni ko'rishi uchun - tranzaksiya yakunlangandan keyin
+    transaction.on_commit(lambda: get_job_executor().submit(run_blend_job, job.pk))
+    logger.info(f"Aralashma vazifasi #{job.pk} navbatga qo'yildi: AI-{target_octane}")
+    return job
+
+
+def run_blend_job(job_id):
+    """Vazifani bajarish (pool oqimida)"""
+    from .views import parse_blend_request, find_blend_variants, save_blend_calculation
+
+    close_old_connections()
+    try:
+        BlendJob.objects.filter(pk=job_id).update(status=BlendJob.STATUS_RUNNING, started_at=timezone.now())
+        job = BlendJob.objects.get(pk=job_id)
+        target_octane, valid_products, total_weight, variants_count, method, max_products = parse_blend_request(
+            job.request_data
+        )
+
+        progress = JobProgress(job_id)
+        deadline = Deadline(getattr(settings, 'BLEND_JOB_TIMEOUT_MS', None))
+        variants = find_blend_variants(
+            target_octane, valid_products, max_variants=variants_count, total_volume=total_weight,
+            progress=progress, method=method, max_products=max_products, seed=job.request_data.get('seed'),
+            deadline=deadline
+        )
+        progress.flush()
+        if not variants:
+            raise ValueError(f'AI-{target_octane} uchun variantlar topilmadi')
+
+        calculation = save_blend_calculation(target_octane, total_weight, variants, method)
+        BlendJob.objects.filter(pk=job_id).update(
+            status=BlendJob.STATUS_DONE,
+            calculation=calculation,
+            best_price=min(v['final_price_per_kg'] for v in variants),
+            finished_at=timezone.now(),
+        )
+        logger.info(f"Aralashma vazifasi #{job_id} tayyor: {len(variants)} ta variant, hisob #{calculation.pk}"
+                    + ('' if deadline.completed else f" (muddat tugadi, {deadline.elapsed_ms()} ms)"))
+    except Exception as e:
+        logger.error(f"Aralashma vazifasi #{job_id} xatoligi: {str(e)}", exc_info=True)
+        BlendJob.objects.filter(pk=job_id).update(
+            status=BlendJob.STATUS_FAILED,
+            error=str(e),
+            finished_at=timezone.now(),
+        )
+    finally:
+        connection.close()
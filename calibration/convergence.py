@@ -0,0 +1,62 @@
+"""
+Iterativ optimizatorlar uchun yaqinlashish (convergence) nazorati
+StallMonitor - eng yaxshi maqsad funksiyasi qiymati ketma-ket patience qadam davomida
+tolerance dan ko'proq yaxshilanmasa, qidiruv to'xtatiladi (GA avlodlari, gradient iteratsiyalari).
+RestartConsensus - tasodifiy qayta ishga tushirishlar: bir nechtasi eng yaxshi natija bilan
+tolerance ichida mos kelsa, qolganlari natijani yaxshilamaydi deb hisoblanadi.
+"""
+import math
+
+# GA: avlodlar bo'yicha (fitness birligida)
+GA_STALL_GENERATIONS = 20
+GA_STALL_TOLERANCE = 1e-4
+
+# Gradient descent: iteratsiyalar bo'yicha (|oktan xatosi| birligida)
+GD_STALL_ITERATIONS = 25
+GD_STALL_TOLERANCE = 1e-4
+
+# Gradient descent qayta ishga tushirishlari: nechta natija mos kelsa to'xtatiladi
+GD_RESTART_AGREEMENT = 5
+GD_RESTART_TOLERANCE = 0.01
+
+
+class StallMonitor:
+    """
+    monitor.update(qiymat) -> True, agar oxirgi patience qadamda eng yaxshi qiymat
+    tolerance dan ko'proq kamaymagan bo'lsa (pastroq = yaxshiroq)
+    """
+
+    def __init__(self, patience, tolerance):
+        self.patience = patience
+        self.tolerance = tolerance
+        self.best = math.inf
+        self.stale = 0
+
+    def update(self, value):
+        if value < self.best - self.tolerance:
+            self.stale = 0
+        else:
+            self.stale += 1
+        self.best = min(self.best, value)
+        return self.patience is not None and self.stale >= self.patience
+
+
+class RestartConsensus:
+    """
+    consensus.update(qiymat) -> True, agar agreement ta qayta ishga tushirish natijasi
+    eng yaxshi qiymat bilan tolerance ichida mos kelsa (pastroq = yaxshiroq)
+    """
+
+    def __init__(self, agreement, tolerance):
+        self.agreement = agreement
+        self.tolerance = tolerance
+        self.best = math.inf
+        self.agreeing = 0
+
+    def update(self, value):
+        if value < self.best - self.tolerance:
+            self.agreeing = 1
+        elif value <= self.best + self.tolerance:
+            self.agreeing += 1
+        self.best = min(self.best, value)
+        return self.agreement is not None and self.agreeing >= self.agreement
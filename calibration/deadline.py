@@ -0,0 +1,58 @@
+"""
+Vaqt byudjeti - "anytime" optimizatsiya uchun
+Optimizatorlar har bir avlod / yechish / kombinatsiyadan keyin muddatni tekshiradi va muddat
+tugasa shu paytgacha topilgan eng yaxshi natijalarni qaytaradi. Muddat tugaganligi
+obyektda qayd etiladi - chaqiruvchi qidiruv to'liq tugaganini (completed) biladi.
+"""
+import time
+
+
+class Deadline:
+    """
+    budget_ms - millisekundlardagi byudjet (None - cheklovsiz).
+    Obyekt picklanadi: monotonic soat butun tizim uchun umumiy,
+    shuning uchun muddat worker jarayonlarida ham to'g'ri tekshiriladi.
+    """
+
+    def __init__(self, budget_ms=None):
+        self.budget_ms = budget_ms
+        self.started_at = time.monotonic()
+        self.expires_at = None if budget_ms is None else self.started_at + budget_ms / 1000.0
+        self.hit = False
+
+    @classmethod
+    def coerce(cls, deadline):
+        """None, millisekundlar soni yoki Deadline -> Deadline"""
+        if isinstance(deadline, cls):
+            return deadline
+        return cls(deadline)
+
+    def remaining(self):
+        """Qolgan vaqt (soniya); cheklovsiz bo'lsa inf"""
+        if self.expires_at is None:
+            return float('inf')
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    def expired(self):
+        """Muddat tugadimi (tugagan bo'lsa, bu qayd etiladi)"""
+        if self.expires_at is not None and time.monotonic() >= self.expires_at:
+            self.hit = True
+        return self.hit
+
+    def expire(self):
+        """Muddat tugaganini qayd etish (masalan, solver o'z vaqt cheklovi bilan to'xtaganda)"""
+        self.hit = True
+
+    def solver_time_limit(self, minimum=0.05):
+        """Solver uchun vaqt cheklovi (soniya) yoki None; kamida minimum - yechim topilishi uchun"""
+        if self.expires_at is None:
+            return None
+        return max(self.remaining(), minimum)
+
+    @property
+    def completed(self):
+        """Qidiruv muddat tufayli to'xtatilmagan"""
+        return not self.hit
+
+    def elapsed_ms(self):
+        return round((time.monotonic() - self.started_at) * 1000.0, 1)
@@ -1,5 +1,5 @@
 from django import forms
-from .models import Tank
+from .models import Tank, Product, CalculationJournal
 
 
 class TankAdminForm(forms.ModelForm):
@@ -8,3 +8,47 @@ class TankAdminForm(forms.ModelForm):
         fields = ['name', 'description', 'capacity_liters', 'height_cm']
 
 
+class HistoryFilterForm(forms.Form):
+    """Фильтры страницы истории расчетов"""
+    q = forms.CharField(
+        required=False,
+        label="Поиск"
+    )
+    tank = forms.ModelChoiceField(
+        queryset=Tank.objects.all(),
+        required=False,
+        empty_label="Все резервуары",
+        label="Резервуар",
+        widget=forms.Select(attrs={'class': 'form-select'})
+    )
+    product = forms.ModelChoiceField(
+        queryset=Product.objects.all(),
+        required=False,
+        empty_label="Все продукты",
+        label="Продукт",
+        widget=forms.Select(attrs={'class': 'form-select'})
+    )
+    calculation_type = forms.ChoiceField(
+        choices=[('', 'Все типы')] + CalculationJournal.CALCULATION_TYPES,
+        required=False,
+        label="Тип расчета",
+        widget=forms.Select(attrs={'class': 'form-select'})
+    )
+    date_from = forms.DateField(
+        required=False,
+        label="С даты",
+        widget=forms.DateInput(attrs={'type': 'date', 'class': 'form-control'})
+    )
+    date_to = forms.DateField(
+        required=False,
+        label="По дату",
+        widget=forms.DateInput(attrs={'type': 'date', 'class': 'form-control'})
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        date_from = cleaned_data.get('date_from')
+        date_to = cleaned_data.get('date_to')
+        if date_from and date_to and date_from > date_to:
+            raise forms.ValidationError("Дата начала не может быть позже даты окончания.")
+        return cleaned_data
@@ -2,9 +2,19 @@
 Genetic Algorithm - AI-based optimization
 ChatGPT kabi "aqlli" algoritm - ideal sostavlar topish uchun
 """
-import random
 import copy
 
+import numpy as np
+
+from .convergence import StallMonitor, GA_STALL_GENERATIONS, GA_STALL_TOLERANCE
+from .deadline import Deadline
+from .perf import PerfRecorder
+from .rng import python_random
+from .projection import project_to_capped_simplex
+
+# GA dvigatellari: 'numpy' - vektorlashtirilgan (standart), 'python' - ro'yxatlar bilan
+GA_ENGINES = ('numpy', 'python')
+
 
 class GeneticAlgorithm:
     """
@@ -13,29 +23,51 @@ class GeneticAlgorithm:
     va evolyutsiya jarayonida takomillashtiradi
     """
     
-    def __init__(self, products, target_octane, gost_limits, prices, octanes):
+    def __init__(self, products, target_octane, gost_limits, prices, octanes, octane_model=None, rng=None):
         self.products = products
         self.target_octane = target_octane
         self.gost_limits = gost_limits
         self.prices = prices
         self.octanes = octanes
+        # octane_model - OctaneModel ('weighted' / 'research'); None - chiziqli aralashtirish
+        self.octane_model = octane_model
         self.n = len(products)
-        # Har safar turli variantlar uchun seed
-        random.seed()  # Random seed
+        # Instrumentatsiya hisoblagichlari (barcha find_optimal_blend chaqiruvlari bo'yicha)
+        self.runs = 0
+        self.generations = 0
+        self.evaluations = 0
+        # Yaqinlashish tufayli o'tkazib yuborilgan avlodlar va fitness baholashlari
+        self.generations_saved = 0
+        self.evaluations_saved = 0
+        # Tasodifiylik faqat obyektning o'z manbalaridan (global random holati ishlatilmaydi):
+        # rng - numpy Generator yoki seed, self.random - undan olingan random.Random
+        self.rng = np.random.default_rng(rng)
+        self.random = python_random(self.rng)
         
-    def find_optimal_blend(self, population_size=100, generations=50, mutation_rate=0.1, price_weight=1.0):
+    def find_optimal_blend(self, population_size=100, generations=50, mutation_rate=0.1, price_weight=1.0, deadline=None,
+                           stall_generations=GA_STALL_GENERATIONS, stall_tolerance=GA_STALL_TOLERANCE):
         """
         Optimal sostavni topish - GA algoritmi
         price_weight - narxning ahamiyati (0.1 = arzon, 2.0 = qimmat)
+        deadline - Deadline yoki millisekundlar: muddat tugasa shu paytgacha eng yaxshi variant
+        qaytariladi (kamida bitta avlod baholanadi), natijada 'completed' = False
+        stall_generations - eng yaxshi fitness shuncha avlod davomida stall_tolerance dan ko'proq
+        yaxshilanmasa evolyutsiya to'xtatiladi (None - o'chirilgan)
         """
+        deadline = Deadline.coerce(deadline)
+        self.runs += 1
+        
         # 1. Initial population - boshlang'ich aholi
         population = self._create_initial_population(population_size)
         
         best_individual = None
         best_fitness = float('inf')
+        stall = StallMonitor(stall_generations, stall_tolerance)
         
         # 2. Evolution - evolyutsiya jarayoni
         for generation in range(generations):
+            self.generations += 1
+            self.evaluations += len(population)
             # Fitness evaluation - har bir variantni baholash
             fitness_scores = []
             for individual in population:
@@ -46,8 +78,12 @@ class GeneticAlgorithm:
                     best_fitness = fitness
                     best_individual = copy.deepcopy(individual)
             
-            # Agar juda yaxshi natija topilsa, to'xtatamiz
-            if best_fitness < 0.01:
+            # Agar juda yaxshi natija topilsa yoki muddat tugasa, to'xtatamiz
+            if best_fitness < 0.01 or deadline.expired():
+                break
+            # Yaqinlashdi - qolgan avlodlar natijani yaxshilamaydi
+            if stall.update(best_fitness):
+                self._record_saved(generations - generation - 1, population_size)
                 break
             
             # Selection - eng yaxshilarini tanlash (50%)
@@ -59,17 +95,15 @@ class GeneticAlgorithm:
             
             while len(new_population) < population_size:
                 # Crossover - 2 ta yaxshi variantdan yangi yaratish
-                parent1 = random.choice(selected)
-                parent2 = random.choice(selected)
+                parent1 = self.random.choice(selected)
+                parent2 = self.random.choice(selected)
                 child = self._crossover(parent1, parent2)
                 
                 # Mutation - tasodifiy o'zgarishlar
-                if random.random() < mutation_rate:
+                if self.random.random() < mutation_rate:
                     child = self._mutate(child)
                 
-                # Validatsiya
-                child = self._normalize_individual(child)
-                
+                # Validatsiya (crossover va mutation natijasi allaqachon proyeksiya qilingan)
                 if self._is_valid(child):
                     new_population.append(child)
             
@@ -77,9 +111,14 @@ class GeneticAlgorithm:
         
         # 3. Final result
         if best_individual:
-            return self._individual_to_result(best_individual)
+            return self._individual_to_result(best_individual, deadline.completed)
         return None
     
+    def _record_saved(self, generations, population_size):
+        """Yaqinlashish tufayli o'tkazib yuborilgan avlodlar va baholashlar"""
+        self.generations_saved += generations
+        self.evaluations_saved += generations * population_size
+    
     def _create_initial_population(self, size):
         """Boshlang'ich aholi yaratish - turli variantlar"""
         population = []
@@ -91,7 +130,7 @@ class GeneticAlgorithm:
             # Smart initialization - maqsad oktan soniga mos keladigan variantlar
             # Har safar turli variantlar uchun random qo'shamiz
             weights = []
-            random_factor = random.uniform(0.8, 1.2)  # Turli variantlar uchun
+            random_factor = self.random.uniform(0.8, 1.2)  # Turli variantlar uchun
             for oct in self.octanes:
                 diff = abs(oct - self.target_octane)
                 if diff == 0:
@@ -109,7 +148,7 @@ class GeneticAlgorithm:
             # Foizlarni taqsimlash
             for i in range(self.n - 1):
                 max_pct = min(self.gost_limits[i], remaining, weights[i] * 1.5)
-                pct = random.uniform(0, max_pct)
+                pct = self.random.uniform(0, max_pct)
                 individual.append(pct)
                 remaining -= pct
             
@@ -130,7 +169,7 @@ class GeneticAlgorithm:
         price_weight - narxning ahamiyati (past = arzon variant, yuqori = qimmat variant)
         """
         # Oktan sonini hisoblash
-        final_octane = sum(self.octanes[i] * individual[i] / 100.0 for i in range(self.n))
+        final_octane = self._blend_octane(individual)
         
         # Oktan farqi (asosiy mezon)
         octane_diff = abs(final_octane - self.target_octane)
@@ -158,7 +197,7 @@ class GeneticAlgorithm:
         
         # Uniform crossover - har bir gen uchun tasodifiy tanlash
         for i in range(self.n):
-            if random.random() < 0.5:
+            if self.random.random() < 0.5:
                 child.append(parent1[i])
             else:
                 child.append(parent2[i])
@@ -173,70 +212,40 @@ class GeneticAlgorithm:
         mutated = copy.deepcopy(individual)
         
         # 1-2 ta genni mutatsiya qilish
-        num_mutations = random.randint(1, 2)
+        num_mutations = self.random.randint(1, 2)
         
         for _ in range(num_mutations):
-            i = random.randint(0, self.n - 1)
+            i = self.random.randint(0, self.n - 1)
             
             # Oktan soniga mos keladigan o'zgarish
             if self.octanes[i] > self.target_octane:
                 # Yuqori oktanli productni ko'paytirish
-                delta = random.uniform(0.1, 3.0)
+                delta = self.random.uniform(0.1, 3.0)
                 if mutated[i] + delta <= self.gost_limits[i]:
                     mutated[i] += delta
                     # Boshqa productdan ayirish
-                    j = random.randint(0, self.n - 1)
+                    j = self.random.randint(0, self.n - 1)
                     if j != i and mutated[j] > delta:
                         mutated[j] -= delta
             else:
                 # Past oktanli productni kamaytirish
-                delta = random.uniform(0.1, 3.0)
+                delta = self.random.uniform(0.1, 3.0)
                 if mutated[i] > delta:
                     mutated[i] -= delta
                     # Boshqa productga qo'shish
-                    j = random.randint(0, self.n - 1)
+                    j = self.random.randint(0, self.n - 1)
                     if j != i and mutated[j] + delta <= self.gost_limits[j]:
                         mutated[j] += delta
         
         return self._normalize_individual(mutated)
     
     def _normalize_individual(self, individual):
-        """Foizlarni normalizatsiya qilish"""
-        total = sum(individual)
-        
-        if abs(total - 100.0) > 0.01:
-            factor = 100.0 / total
-            individual = [p * factor for p in individual]
-        
-        # GOST cheklovlarini tekshirish
-        for i in range(self.n):
-            if individual[i] > self.gost_limits[i]:
-                excess = individual[i] - self.gost_limits[i]
-                individual[i] = self.gost_limits[i]
-                # Boshqa productlarga taqsimlash
-                for j in range(self.n):
-                    if j != i and individual[j] < self.gost_limits[j]:
-                        add = min(excess, self.gost_limits[j] - individual[j])
-                        individual[j] += add
-                        excess -= add
-                        if excess <= 0:
-                            break
-        
-        # Qayta normalizatsiya
-        total = sum(individual)
-        if abs(total - 100.0) > 0.01:
-            factor = 100.0 / total
-            individual = [p * factor for p in individual]
-        
-        return individual
+        """Foizlarni normalizatsiya qilish - GOST cheklovli simpleksga aniq proyeksiya"""
+        return project_to_capped_simplex(individual, self.gost_limits).tolist()
     
     def _is_valid(self, individual):
         """Variant to'g'ri yoki yo'qligini tekshirish"""
-        # Foizlar jami 100% bo'lishi kerak
-        total = sum(individual)
-        if abs(total - 100.0) > 0.1:
-            return False
-        
+        # Jami 100% va GOST cheklovlari proyeksiya bilan kafolatlangan
         # Kamida 2 ta productda foiz bo'lishi kerak
         non_zero = sum(1 for p in individual if p > 0.01)
         if non_zero < 2:
@@ -244,9 +253,15 @@ class GeneticAlgorithm:
         
         return True
     
-    def _individual_to_result(self, individual):
+    def _blend_octane(self, individual):
+        """Aralashma oktani - model bo'yicha yoki chiziqli"""
+        if self.octane_model is not None:
+            return float(self.octane_model.octane(individual))
+        return sum(self.octanes[i] * individual[i] / 100.0 for i in range(self.n))
+    
+    def _individual_to_result(self, individual, completed=True):
         """Individual ni result formatiga o'tkazish"""
-        final_octane = sum(self.octanes[i] * individual[i] / 100.0 for i in range(self.n))
+        final_octane = self._blend_octane(individual)
         final_price = sum(self.prices[i] * individual[i] / 100.0 for i in range(self.n))
         octane_diff = abs(final_octane - self.target_octane)
         gost_compliant = all(individual[i] <= self.gost_limits[i] + 0.01 for i in range(self.n))
@@ -265,44 +280,185 @@ class GeneticAlgorithm:
             'final_octane': round(final_octane, 2),
             'final_price': round(final_price, 2),
             'octane_diff': octane_diff,
-            'gost_compliant': gost_compliant
+            'gost_compliant': gost_compliant,
+            'completed': completed
         }
 
 
-def genetic_optimize_blend(products, target_octane, num_variants=1):
+class VectorizedGeneticAlgorithm(GeneticAlgorithm):
+    """
+    Genetic Algorithm - NumPy varianti
+    Aholi (pop, n) massiv: fitness bitta matritsa-vektor ko'paytmasi,
+    tanlash argpartition bilan, crossover va mutation maskalar bilan.
+    find_optimal_blend kontrakti GeneticAlgorithm bilan bir xil.
+    """
+
+    def __init__(self, products, target_octane, gost_limits, prices, octanes, rng=None, octane_model=None):
+        super().__init__(products, target_octane, gost_limits, prices, octanes, octane_model, rng)
+        self.octane_array = np.asarray(octanes, dtype=float)
+        self.price_array = np.asarray(prices, dtype=float)
+        self.cap_array = np.asarray(gost_limits, dtype=float)
+
+    def find_optimal_blend(self, population_size=100, generations=50, mutation_rate=0.1, price_weight=1.0, deadline=None,
+                           stall_generations=GA_STALL_GENERATIONS, stall_tolerance=GA_STALL_TOLERANCE):
+        """
+        Optimal sostavni topish - GA algoritmi (vektorlashtirilgan)
+        price_weight - narxning ahamiyati (0.1 = arzon, 2.0 = qimmat)
+        deadline, stall_generations, stall_tolerance - GeneticAlgorithm bilan bir xil
+        """
+        if self.n == 0:
+            return None
+        deadline = Deadline.coerce(deadline)
+
+        population = self._create_initial_population(population_size)
+        elite_count = max(population_size // 2, 1)
+
+        best_individual = None
+        best_fitness = float('inf')
+        stall = StallMonitor(stall_generations, stall_tolerance)
+
+        self.runs += 1
+        for generation in range(generations):
+            self.generations += 1
+            self.evaluations += len(population)
+            fitness = self._calculate_fitness(population, price_weight=price_weight)
+            best_index = int(np.argmin(fitness))
+            if fitness[best_index] < best_fitness:
+                best_fitness = float(fitness[best_index])
+                best_individual = population[best_index].copy()
+
+            if best_fitness < 0.01 or deadline.expired():
+                break
+            if stall.update(best_fitness):
+                self._record_saved(generations - generation - 1, population_size)
+                break
+
+            # Selection - eng yaxshi 50% (to'liq saralashsiz)
+            elite = population[np.argpartition(fitness, elite_count - 1)[:elite_count]]
+
+            # Crossover - uniform, har bir gen uchun maska
+            children_count = population_size - elite_count
+            parents1 = elite[self.rng.integers(elite_count, size=children_count)]
+            parents2 = elite[self.rng.integers(elite_count, size=children_count)]
+            children = np.where(self.rng.random((children_count, self.n)) < 0.5, parents1, parents2)
+            children = self._normalize_population(children)
+
+            # Mutation - tanlangan qatorlarda 1-2 ta gen
+            mutate_rows = self.rng.random(children_count) < mutation_rate
+            if mutate_rows.any():
+                children[mutate_rows] = self._mutate_population(children[mutate_rows])
+
+            # Validatsiya: yaroqsiz bolalar o'rniga elitlar nusxasi
+            invalid = ~self._valid_rows(children)
+            if invalid.any():
+                children[invalid] = elite[self.rng.integers(elite_count, size=int(invalid.sum()))]
+
+            population = np.vstack([elite, children])
+
+        if best_individual is not None:
+            return self._individual_to_result(best_individual.tolist(), deadline.completed)
+        return None
+
+    def _create_initial_population(self, size):
+        """Boshlang'ich aholi - maqsad oktanga yaqin productlarga ko'proq ulush"""
+        diff = np.abs(self.octane_array - self.target_octane)
+        random_factor = self.rng.uniform(0.8, 1.2, size=(size, 1))
+        weights = np.where(diff == 0, 100.0, 10.0 / (diff + 1.0) * random_factor)
+        weights = weights / weights.sum(axis=1, keepdims=True) * 100.0
+        upper = np.minimum(self.cap_array, weights * 1.5)
+        population = self.rng.uniform(0.0, 1.0, size=(size, self.n)) * upper
+        return self._normalize_population(population)
+
+    def _calculate_fitness(self, population, price_weight=1.0):
+        """Fitness - butun aholi uchun (pastroq = yaxshiroq); oktan modeli ham butun matritsa uchun"""
+        if self.octane_model is not None:
+            final_octane = self.octane_model.octane(population)
+        else:
+            final_octane = population @ self.octane_array / 100.0
+        final_price = population @ self.price_array / 100.0
+        gost_penalty = np.clip(population - self.cap_array, 0.0, None).sum(axis=1) * 10
+        return np.abs(final_octane - self.target_octane) * 1000 + final_price / 100.0 * price_weight + gost_penalty * 100
+
+    def _mutate_population(self, population):
+        """Mutation - har bir qatorda 1 yoki 2 ta juft gen o'rtasida ulush ko'chirish"""
+        rows = np.arange(len(population))
+        for mutation in range(2):
+            active = rows if mutation == 0 else rows[self.rng.random(len(rows)) < 0.5]
+            if not len(active):
+                break
+            i = self.rng.integers(self.n, size=len(active))
+            j = self.rng.integers(self.n, size=len(active))
+            delta = self.rng.uniform(0.1, 3.0, size=len(active))
+            # Yuqori oktanli productni ko'paytirish, past oktanlisini kamaytirish
+            sign = np.where(self.octane_array[i] > self.target_octane, 1.0, -1.0)
+            population[active, i] += sign * delta
+            population[active, j] -= sign * delta
+        return self._normalize_population(population)
+
+    def _normalize_population(self, population):
+        """Foizlarni normalizatsiya qilish - butun aholi uchun aniq proyeksiya"""
+        return project_to_capped_simplex(population, self.cap_array)
+
+    def _valid_rows(self, population):
+        """Yaroqli qatorlar: kamida 2 ta product (jami 100% proyeksiya bilan kafolatlangan)"""
+        return (population > 0.01).sum(axis=1) >= 2
+
+
+def genetic_optimize_blend(products, target_octane, num_variants=1, engine='numpy', deadline=None, octane_model=None,
+                           perf=None, rng=None):
     """
     Genetic Algorithm orqali optimal sostavni topish
     num_variants - nechta variant qaytarish kerak
+    engine - 'numpy' (VectorizedGeneticAlgorithm) yoki 'python' (GeneticAlgorithm)
+    deadline - Deadline yoki millisekundlar: muddat tugasa topilgan variantlar qaytariladi
+    octane_model - products uchun kompilyatsiya qilingan OctaneModel (None - chiziqli)
+    perf - PerfRecorder: 'ga' bosqichi vaqti, ga_runs, ga_generations, fitness_evaluations va
+    yaqinlashish tufayli tejalganlari (ga_generations_saved, fitness_evaluations_saved)
+    rng - numpy Generator yoki seed (None - yangi tasodifiy oqim); bir xil seed - bir xil natija
     """
     if len(products) < 3:
         return None if num_variants == 1 else []
     
+    perf = PerfRecorder.coerce(perf)
+    with perf.phase('ga'):
+        result, ga = _genetic_optimize_blend(products, target_octane, num_variants, engine, deadline, octane_model, rng)
+    perf.count('ga_runs', ga.runs)
+    perf.count('ga_generations', ga.generations)
+    perf.count('fitness_evaluations', ga.evaluations)
+    perf.count('ga_generations_saved', ga.generations_saved)
+    perf.count('fitness_evaluations_saved', ga.evaluations_saved)
+    return result
+
+
+def _genetic_optimize_blend(products, target_octane, num_variants, engine, deadline, octane_model, rng):
+    """genetic_optimize_blend tanasi: (natija, GA obyekti - hisoblagichlar uchun)"""
+    
     octanes = [float(p.octane_number) for p in products]
     prices = [float(p.price_per_liter) for p in products]
     gost_limits = [float(p.gost_percentage or 100) for p in products]
     
     # GA algoritmi
-    ga = GeneticAlgorithm(products, target_octane, gost_limits, prices, octanes)
+    if engine not in GA_ENGINES:
+        raise ValueError(f"Noma'lum GA dvigateli: {engine}")
+    ga_class = VectorizedGeneticAlgorithm if engine == 'numpy' else GeneticAlgorithm
+    ga = ga_class(products, target_octane, gost_limits, prices, octanes, octane_model=octane_model, rng=rng)
+    deadline = Deadline.coerce(deadline)
     
     if num_variants == 1:
         # Faqat bitta eng yaxshi variant
         # Har safar turli variantlar uchun, mutation rate va price weight ni o'zgartiramiz
-        import time
-        # Har safar turli seed - turli variantlar uchun
-        current_time_ms = int(time.time() * 1000)
-        random.seed(current_time_ms % 10000)
-        
-        # Turli mutation rate va price weight
-        mutation_rate = random.uniform(0.1, 0.3)
-        price_weight = random.uniform(0.5, 2.0)
+        # (GA ning o'z RNG oqimidan - seed bilan takrorlanadi)
+        mutation_rate = ga.random.uniform(0.1, 0.3)
+        price_weight = ga.random.uniform(0.5, 2.0)
         
         result = ga.find_optimal_blend(
             population_size=150,
             generations=100,
             mutation_rate=mutation_rate,
-            price_weight=price_weight
+            price_weight=price_weight,
+            deadline=deadline
         )
-        return result
+        return result, ga
     else:
         # Bir nechta variantlar - turli narx strategiyalari bilan
         variants = []
@@ -312,6 +468,8 @@ def genetic_optimize_blend(products, target_octane, num_variants=1):
         price_strategies = [0.1, 0.5, 1.0, 1.5, 2.0]  # Arzondan qimmatgacha
         
         for strategy_idx in range(num_variants):
+            if variants and deadline.expired():
+                break
             price_weight = price_strategies[strategy_idx % len(price_strategies)]
             
             for attempt in range(3):  # Har bir strategiya uchun 3 marta sinab ko'ramiz
@@ -319,7 +477,8 @@ def genetic_optimize_blend(products, target_octane, num_variants=1):
                     population_size=100,
                     generations=50,
                     mutation_rate=0.2,
-                    price_weight=price_weight
+                    price_weight=price_weight,
+                    deadline=deadline
                 )
                 
                 if result:
@@ -333,9 +492,13 @@ def genetic_optimize_blend(products, target_octane, num_variants=1):
                         seen_combinations.add(combo_key)
                         variants.append(result)
                         break  # Bu strategiya uchun variant topildi
+                if deadline.expired():
+                    break
         
         # Variantlarni narx bo'yicha tartiblash
         variants.sort(key=lambda x: x['final_price'])
+        for variant in variants:
+            variant['completed'] = deadline.completed
         
-        return variants[:num_variants] if variants else None
+        return (variants[:num_variants] if variants else None), ga
 
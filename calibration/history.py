@@ -0,0 +1,303 @@
+"""
+История расчетов - единая лента всех типов расчетов.
+Лента читается из журнала CalculationJournal (одна таблица, keyset-пагинация),
+полностью загружаются только строки текущей страницы.
+"""
+from datetime import datetime, time, timedelta
+
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import (
+    TransferCalculation,
+    VolumeWeightCalculation,
+    AddingCalculation,
+    DensityTemperatureCalculation,
+    GasolineBlendCalculation,
+    ProcessingCalculation,
+    CalculationJournal,
+)
+
+HISTORY_PAGE_SIZE = 10
+CURSOR_SEPARATOR = '~'
+
+
+def _transfer_entry(calc):
+    return {
+        'tank_id': calc.tank_id,
+        'product_id': calc.product_id,
+        'tank_name': calc.tank.name,
+        'product_name': calc.product.name,
+        'summary': f"Откачка: {calc.transfer_weight_kg:.2f} кг из {calc.initial_height_cm:.2f} см → {calc.final_height_cm:.2f} см",
+        'key_values': {
+            'transfer_weight_kg': calc.transfer_weight_kg,
+            'initial_height_cm': calc.initial_height_cm,
+            'final_height_cm': calc.final_height_cm,
+            'volume_removed_liters': calc.volume_added_liters,
+            'fill_percentage': calc.fill_percentage,
+        }
+    }
+
+
+def _volume_weight_entry(calc):
+    return {
+        'tank_id': calc.tank_id,
+        'product_id': calc.product_id,
+        'tank_name': calc.tank.name,
+        'product_name': calc.product.name,
+        'summary': f"Объем и вес: {calc.height_cm:.2f} см → {calc.volume_liters:.2f} л, {calc.weight_kg:.2f} кг",
+        'key_values': {
+            'height_cm': calc.height_cm,
+            'volume_liters': calc.volume_liters,
+            'weight_kg': calc.weight_kg,
+            'fill_percentage': calc.fill_percentage,
+        }
+    }
+
+
+def _adding_entry(calc):
+    return {
+        'tank_id': calc.tank_id,
+        'product_id': calc.product_id,
+        'tank_name': calc.tank.name,
+        'product_name': calc.product.name,
+        'summary': f"Добавление: {calc.current_height_cm:.2f} см + {calc.amount_value:.2f} {'кг' if calc.amount_type == 'weight' else 'л'} → {calc.final_height_cm:.2f} см",
+        'key_values': {
+            'current_height_cm': calc.current_height_cm,
+            'final_height_cm': calc.final_height_cm,
+            'added_volume_liters': calc.added_volume_liters,
+            'added_weight_kg': calc.added_weight_kg,
+            'fill_percentage': calc.fill_percentage,
+        }
+    }
+
+
+def _density_entry(calc):
+    return {
+        'tank_id': None,
+        'product_id': calc.product_id,
+        'tank_name': '—',
+        'product_name': calc.product.name if calc.product else '—',
+        'summary': f"Плотность: {calc.reference_density_kg_m3:.1f} кг/м³ при {calc.reference_temperature_c:.1f}°C → {calc.corrected_density_kg_m3:.1f} кг/м³",
+        'key_values': {
+            'reference_density_kg_m3': calc.reference_density_kg_m3,
+            'reference_temperature_c': calc.reference_temperature_c,
+            'target_temperature_c': calc.target_temperature_c,
+            'corrected_density_kg_m3': calc.corrected_density_kg_m3,
+        }
+    }
+
+
+def _gasoline_blend_entry(calc):
+    variants_count = len(calc.blend_variants) if calc.blend_variants else 0
+    return {
+        'tank_id': None,
+        'product_id': None,
+        'tank_name': '—',
+        'product_name': f"AI-{calc.target_octane}",
+        'summary': f"Смешивание бензина: {variants_count} вариантов, целевое октановое число: {calc.target_octane}",
+        'key_values': {
+            'target_octane': calc.target_octane,
+            'variants_count': variants_count,
+        }
+    }
+
+
+def _processing_entry(calc):
+    materials_count = len(calc.materials) if calc.materials else 0
+    return {
+        'tank_id': None,
+        'product_id': None,
+        'tank_name': '—',
+        'product_name': f"Переработка ({calc.calculation_date.strftime('%d.%m.%Y')})",
+        'summary': f"Переработка: {materials_count} материалов, прибыль: ${float(calc.total_profit):.2f}",
+        'key_values': {
+            'materials_count': materials_count,
+            'sale_price': float(calc.sale_price),
+            'total_cost': float(calc.total_cost),
+            'total_profit': float(calc.total_profit),
+        }
+    }
+
+
+# Тип расчета -> (модель, связи для select_related, функция записи журнала)
+HISTORY_SOURCES = {
+    'transfer': (TransferCalculation, ('tank', 'product'), _transfer_entry),
+    'volume_weight': (VolumeWeightCalculation, ('tank', 'product'), _volume_weight_entry),
+    'adding': (AddingCalculation, ('tank', 'product'), _adding_entry),
+    'density': (DensityTemperatureCalculation, ('product',), _density_entry),
+    'gasoline_blend': (GasolineBlendCalculation, (), _gasoline_blend_entry),
+    'processing': (ProcessingCalculation, (), _processing_entry),
+}
+
+
+def calculation_type_for(model):
+    """Тип расчета для класса модели (None, если модель не журналируется)"""
+    for calc_type, (source_model, _, _) in HISTORY_SOURCES.items():
+        if source_model is model:
+            return calc_type
+    return None
+
+
+def journal_entry(calc_type, calc):
+    """Поля записи журнала для расчета (используются только поля модели)"""
+    _, _, build_entry = HISTORY_SOURCES[calc_type]
+    entry = build_entry(calc)
+    entry.update({
+        'calculation_type': calc_type,
+        'source_id': calc.pk,
+        'timestamp': calc.timestamp,
+    })
+    return entry
+
+
+def record_calculation(calc):
+    """
+    Записать (или обновить) строку журнала для расчета.
+    Вызывать внутри той же транзакции, что и сохранение расчета.
+    """
+    calc_type = calculation_type_for(type(calc))
+    if calc_type is None:
+        return None
+    fields = journal_entry(calc_type, calc)
+    entry, _ = CalculationJournal.objects.update_or_create(
+        calculation_type=fields.pop('calculation_type'),
+        source_id=fields.pop('source_id'),
+        defaults=fields
+    )
+    return entry
+
+
+def encode_cursor(entry):
+    """Курсор следующей страницы: позиция последней показанной строки"""
+    return CURSOR_SEPARATOR.join([entry.timestamp.isoformat(), str(entry.id)])
+
+
+def decode_cursor(cursor):
+    """Разобрать курсор; для неверного курсора возвращает None (первая страница)"""
+    if not cursor:
+        return None
+    try:
+        timestamp_str, entry_id = cursor.split(CURSOR_SEPARATOR)
+        return datetime.fromisoformat(timestamp_str), int(entry_id)
+    except (ValueError, TypeError):
+        return None
+
+
+def _start_of_day(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def filter_journal(entries, filters):
+    """
+    Применить фильтры истории к выборке журнала.
+    filters - очищенные данные HistoryFilterForm (q, tank, product,
+    calculation_type, date_from, date_to). Диапазон дат задается границами
+    по timestamp, чтобы использовались составные индексы журнала.
+    """
+    if not filters:
+        return entries
+
+    if filters.get('tank'):
+        entries = entries.filter(tank=filters['tank'])
+    if filters.get('product'):
+        entries = entries.filter(product=filters['product'])
+    if filters.get('calculation_type'):
+        entries = entries.filter(calculation_type=filters['calculation_type'])
+    if filters.get('date_from'):
+        entries = entries.filter(timestamp__gte=_start_of_day(filters['date_from']))
+    if filters.get('date_to'):
+        entries = entries.filter(timestamp__lt=_start_of_day(filters['date_to'] + timedelta(days=1)))
+
+    search = filters.get('q')
+    if search:
+        entries = entries.filter(
+            Q(summary__icontains=search) |
+            Q(tank_name__icontains=search) |
+            Q(product_name__icontains=search)
+        )
+    return entries
+
+
+def history_page(cursor=None, filters=None, page_size=HISTORY_PAGE_SIZE):
+    """
+    Одна страница истории.
+    Возвращает (calculations, next_cursor): calculations - список словарей
+    для шаблона, next_cursor - курсор следующей страницы или None.
+    """
+    entries = filter_journal(CalculationJournal.objects.all(), filters)
+
+    position = decode_cursor(cursor)
+    if position:
+        timestamp, entry_id = position
+        entries = entries.filter(Q(timestamp__lt=timestamp) | Q(timestamp=timestamp, id__lt=entry_id))
+
+    # Одна лишняя строка показывает, есть ли следующая страница
+    entries = list(entries.order_by('-timestamp', '-id')[:page_size + 1])
+    next_cursor = encode_cursor(entries[page_size - 1]) if len(entries) > page_size else None
+    entries = entries[:page_size]
+
+    # Подробные данные только для видимых строк - один запрос на тип
+    ids_by_type = {}
+    for entry in entries:
+        ids_by_type.setdefault(entry.calculation_type, []).append(entry.source_id)
+
+    objects_by_type = {}
+    for calc_type, ids in ids_by_type.items():
+        model, related, _ = HISTORY_SOURCES[calc_type]
+        objects_by_type[calc_type] = model.objects.select_related(*related).in_bulk(ids)
+
+    calculations = []
+    for entry in entries:
+        calc = objects_by_type[entry.calculation_type].get(entry.source_id)
+        if calc is None:
+            continue
+        calculations.append({
+            'id': entry.id,
+            'type': entry.calculation_type,
+            'object': calc,
+            'timestamp': entry.timestamp,
+            'tank_name': entry.tank_name,
+            'product_name': entry.product_name,
+            'description': entry.summary,
+        })
+
+    return calculations, next_cursor
+
+
+def delete_journal_entry(entry):
+    """Удалить расчет по записи журнала (строка журнала удаляется сигналом)"""
+    model, _, _ = HISTORY_SOURCES[entry.calculation_type]
+    deleted, _ = model.objects.filter(id=entry.source_id).delete()
+    if not deleted:
+        # Расчет уже удален - убираем осиротевшую строку журнала
+        entry.delete()
+
+
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_HEADERS = ['Дата/Время', 'Тип расчета', 'ID расчета', 'Резервуар', 'Продукт', 'Описание', 'Ключевые значения']
+
+
+def export_rows(entries, progress=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Построчный обход журнала для экспорта (без загрузки всех строк в память).
+    progress(done) вызывается после каждой порции из chunk_size строк.
+    """
+    type_labels = dict(CalculationJournal.CALCULATION_TYPES)
+    done = 0
+    for entry in entries.order_by('-timestamp', '-id').iterator(chunk_size=chunk_size):
+        key_values = '; '.join(f"{key}={value}" for key, value in entry.key_values.items())
+        yield [
+            timezone.localtime(entry.timestamp).strftime('%d.%m.%Y %H:%M:%S'),
+            type_labels.get(entry.calculation_type, entry.calculation_type),
+            entry.source_id,
+            entry.tank_name,
+            entry.product_name,
+            entry.summary,
+            key_values,
+        ]
+        done += 1
+        if progress and done % chunk_size == 0:
+            progress(done)
+    if progress:
+        progress(done)
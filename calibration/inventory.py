@@ -0,0 +1,68 @@
+"""
+Rezervuarlardagi haqiqiy zaxiralar - aralashma uchun komponentlar cheklovi
+Rezervuar darajalari (sm) bitta paketli interpolyatsiya bilan hajmga (l), keyin
+solishtirma og'irlik bilan massaga (kg) o'tkaziladi. Bir product bir nechta
+rezervuarda bo'lishi mumkin - zaxiralar qo'shiladi.
+"""
+from .models import Tank, Product
+
+
+def tank_inventory(tanks_data, method='spline'):
+    """
+    tanks_data - [{tank_id, height_cm, product_id, density_kg_per_liter (ixtiyoriy)}, ...];
+    zichlik berilmasa Product.specific_weight_kg_per_liter ishlatiladi.
+
+    Returns:
+        dict: {'available': {product_id (str): kg}, 'tanks': [{tank_id, tank_name, product_id,
+               height_cm, volume_liters, density_kg_per_liter, weight_kg}, ...]}
+
+    Raises:
+        ValueError: foydalanuvchiga ko'rsatiladigan xabar bilan
+    """
+    entries = []
+    for item in tanks_data:
+        try:
+            tank_id = int(item['tank_id'])
+            product_id = int(item['product_id'])
+            height = float(str(item['height_cm']).replace(',', '.'))
+            density = item.get('density_kg_per_liter')
+            density = float(str(density).replace(',', '.')) if density not in (None, '') else None
+        except (KeyError, ValueError, TypeError):
+            raise ValueError('Неверные данные резервуара')
+        if height < 0:
+            raise ValueError('Высота не может быть отрицательной')
+        if density is not None and not 0 < density <= 5:
+            raise ValueError('Плотность должна быть между 0.0001 и 5.0000 кг/л')
+        entries.append((tank_id, product_id, height, density))
+    if not entries:
+        return {'available': {}, 'tanks': []}
+
+    # Rezervuarlar bir marta yuklanadi - hajmlar va nomlar uchun
+    tanks_by_id = Tank.objects.in_bulk({e[0] for e in entries})
+    try:
+        volumes = Tank.heights_to_volumes([(tank_id, height) for tank_id, _, height, _ in entries], method,
+                                          tanks=tanks_by_id)
+    except Tank.DoesNotExist:
+        raise ValueError('Резервуар не найден')
+    specific_weights = dict(
+        Product.objects.filter(id__in={e[1] for e in entries}).values_list('id', 'specific_weight_kg_per_liter')
+    )
+
+    available = {}
+    tanks = []
+    for (tank_id, product_id, height, density), volume in zip(entries, volumes):
+        density = density or specific_weights.get(product_id)
+        if not density:
+            raise ValueError(f'Укажите плотность продукта для резервуара {tanks_by_id[tank_id].name}')
+        weight = float(volume) * density
+        available[str(product_id)] = available.get(str(product_id), 0.0) + weight
+        tanks.append({
+            'tank_id': tank_id,
+            'tank_name': tanks_by_id[tank_id].name,
+            'product_id': product_id,
+            'height_cm': height,
+            'volume_liters': round(float(volume), 2),
+            'density_kg_per_liter': density,
+            'weight_kg': round(weight, 2),
+        })
+    return {'available': available, 'tanks': tanks}
@@ -0,0 +1,431 @@
+"""
+Chiziqli dasturlash (LP/MILP) - chiziqli oktan aralashmasi uchun aniq optimizatsiya
+scipy.optimize.linprog / milp (HiGHS) asosida
+
+Masala:
+    min  Σ narx_i · p_i / 100
+    Σ p_i = 100
+    Σ oktan_i · p_i >= 100 · maqsad_oktan
+    0 <= p_i <= GOST_i
+MILP variantida qo'shimcha ikkilik o'zgaruvchilar y_i ("product ishlatiladi"):
+    p_i <= GOST_i · y_i,  p_i >= min_share · y_i,  Σ y_i <= max_products
+Natija deterministik va isbotlangan eng arzon.
+"""
+from itertools import combinations, product as cartesian
+
+import numpy as np
+from scipy.optimize import linprog, milp, LinearConstraint, Bounds
+
+from .deadline import Deadline
+from .perf import PerfRecorder
+
+# Foizi shundan kichik productlar natijada ko'rsatilmaydi (GA bilan bir xil)
+ACTIVE_SHARE = 0.01
+
+# Kombinatsiyadagi har bir product uchun minimal foiz (%)
+MIN_COMPONENT_SHARE = 1.0
+
+
+def blend_arrays(products):
+    """Product ro'yxatidan oktan, narx va GOST cheklovlari massivlari"""
+    octanes = np.array([float(p.octane_number) for p in products])
+    prices = np.array([float(p.price_per_liter) for p in products])
+    caps = np.array([float(p.gost_percentage or 100) for p in products])
+    return octanes, prices, caps
+
+
+def solve_blend_lp(octanes, prices, caps, target_octane, lower=None):
+    """
+    Uzluksiz LP: eng arzon foizlar (massiv) yoki None, agar yechim yo'q bo'lsa.
+    lower - har bir product uchun minimal foiz (skalyar yoki massiv)
+    """
+    n = len(octanes)
+    lower = np.broadcast_to(np.asarray(0.0 if lower is None else lower, dtype=float), (n,))
+    if np.any(lower > caps) or lower.sum() > 100.0 or caps.sum() < 100.0:
+        return None
+
+    result = linprog(
+        c=prices / 100.0,
+        A_ub=-octanes.reshape(1, -1),
+        b_ub=[-100.0 * target_octane],
+        A_eq=np.ones((1, n)),
+        b_eq=[100.0],
+        bounds=list(zip(lower, caps)),
+        method='highs',
+    )
+    if result.status != 0:
+        return None
+    return result.x
+
+
+def solve_blend_milp(octanes, prices, caps, target_octane, max_products=None, min_share=0.0, exclude=(), deadline=None):
+    """
+    MILP: eng arzon foizlar (massiv) yoki None.
+    max_products - ishlatiladigan productlar soni cheklovi (None - cheklovsiz)
+    min_share - ishlatilgan product uchun minimal foiz
+    exclude - taqiqlangan product to'plamlari (bool maskalar) - "no-good" kesimlar:
+    Σ_{i∈S} y_i - Σ_{i∉S} y_i <= |S| - 1 aynan shu to'plamni chiqarib tashlaydi
+    deadline - Deadline: HiGHS qolgan vaqt bilan cheklanadi; vaqt tugasa eng yaxshi
+    topilgan (isbotlanmagan) yechim qaytariladi va muddat tugagani qayd etiladi
+    """
+    n = len(octanes)
+    if caps.sum() < 100.0:
+        return None
+    if not max_products and not min_share and not exclude:
+        return solve_blend_lp(octanes, prices, caps, target_octane)
+
+    eye = np.eye(n)
+    zeros = np.zeros(n)
+    rows = [
+        (np.concatenate([np.ones(n), zeros]), 100.0, 100.0),
+        (np.concatenate([octanes, zeros]), 100.0 * target_octane, np.inf),
+    ]
+    constraints = [LinearConstraint(np.vstack([row for row, _, _ in rows]),
+                                    [lb for _, lb, _ in rows], [ub for _, _, ub in rows])]
+    # p_i - GOST_i · y_i <= 0
+    constraints.append(LinearConstraint(np.hstack([eye, -np.diag(caps)]), -np.inf, 0.0))
+    if min_share:
+        # p_i - min_share · y_i >= 0
+        constraints.append(LinearConstraint(np.hstack([eye, -min_share * eye]), 0.0, np.inf))
+    if max_products:
+        constraints.append(LinearConstraint(np.concatenate([zeros, np.ones(n)]).reshape(1, -1), 0, max_products))
+    if exclude:
+        masks = np.array(exclude, dtype=bool)
+        cuts = np.hstack([np.zeros((len(masks), n)), np.where(masks, 1.0, -1.0)])
+        constraints.append(LinearConstraint(cuts, -np.inf, masks.sum(axis=1) - 1.0))
+
+    deadline = Deadline.coerce(deadline)
+    time_limit = deadline.solver_time_limit()
+    result = milp(
+        c=np.concatenate([prices / 100.0, zeros]),
+        constraints=constraints,
+        integrality=np.concatenate([np.zeros(n), np.ones(n)]),
+        bounds=Bounds(np.zeros(2 * n), np.concatenate([caps, np.ones(n)])),
+        options={} if time_limit is None else {'time_limit': time_limit},
+    )
+    if result.status == 1 and result.x is not None:
+        # Vaqt cheklovi: eng yaxshi topilgan yechim
+        deadline.expire()
+        return result.x[:n]
+    if result.status != 0:
+        return None
+    return result.x[:n]
+
+
+def _vertex_patterns(k):
+    """
+    LP uchidagi (vertex) yechim shakllari: k-2 product chegarada va 2 tasi erkin
+    (oktan cheklovi faol) yoki k-1 product chegarada va 1 tasi erkin.
+    Har bir shakl: (erkin indekslar, qolganlar uchun maska: True - GOST, False - minimum).
+    """
+    patterns = []
+    for free_count in (2, 1):
+        for free in combinations(range(k), free_count):
+            fixed = [i for i in range(k) if i not in free]
+            for upper in cartesian((False, True), repeat=len(fixed)):
+                mask = np.zeros(k, dtype=bool)
+                mask[fixed] = upper
+                patterns.append((free, fixed, mask))
+    return patterns
+
+
+def solve_combinations_lp(octanes, prices, caps, target_octane, combos, lower=MIN_COMPONENT_SHARE, tol=1e-7):
+    """
+    Bir xil o'lchamdagi ko'p kombinatsiyalar uchun LP ni bir vaqtda aniq yechish.
+    combos - (m, k) indekslar massivi. Uch nuqtalar to'liq sanab chiqiladi (k <= 4 uchun
+    bir necha o'nta shakl), shuning uchun har bir kombinatsiya uchun linprog chaqirilmaydi.
+    Natija: (m, k) foizlar massivi va (m,) maska - yechim mavjud kombinatsiyalar.
+    """
+    m, k = combos.shape
+    oct_c = octanes[combos]
+    price_c = prices[combos]
+    cap_c = caps[combos]
+    target_total = 100.0 * target_octane
+
+    best_cost = np.full(m, np.inf)
+    best = np.zeros((m, k))
+    rows = np.arange(m)
+
+    for free, fixed, mask in _vertex_patterns(k):
+        values = np.where(mask, cap_c, lower)
+        values[:, list(free)] = 0.0
+        rest = 100.0 - values.sum(axis=1)
+        rest_octane = target_total - (values * oct_c).sum(axis=1)
+
+        if len(free) == 2:
+            a, b = free
+            denominator = oct_c[:, b] - oct_c[:, a]
+            valid = denominator != 0
+            values[:, b] = (rest_octane - oct_c[:, a] * rest) / np.where(valid, denominator, 1.0)
+            values[:, a] = rest - values[:, b]
+        else:
+            values[:, free[0]] = rest
+            valid = np.ones(m, dtype=bool)
+
+        valid &= np.all(values >= lower - tol, axis=1) & np.all(values <= cap_c + tol, axis=1)
+        valid &= (values * oct_c).sum(axis=1) >= target_total - 1e-6
+        cost = np.where(valid, (values * price_c).sum(axis=1), np.inf)
+
+        better = cost < best_cost - 1e-12
+        best_cost[better] = cost[better]
+        best[rows[better]] = values[better]
+
+    return np.clip(best, 0.0, None), np.isfinite(best_cost)
+
+
+def blend_result(products, percentages, octanes, prices, caps, target_octane):
+    """Foizlarni GA bilan bir xil formatdagi natijaga o'tkazish"""
+    final_octane = float(octanes @ percentages) / 100.0
+    final_price = float(prices @ percentages) / 100.0
+    active = [i for i in range(len(products)) if percentages[i] > ACTIVE_SHARE]
+    return {
+        'products': [products[i] for i in active],
+        'percentages': [round(float(percentages[i]), 2) for i in active],
+        'final_octane': round(final_octane, 2),
+        'final_price': round(final_price, 2),
+        'octane_diff': abs(final_octane - target_octane),
+        'gost_compliant': bool(np.all(percentages <= caps + 0.01)),
+    }
+
+
+def lp_optimize_blend(products, target_octane, max_products=None, min_share=0.0, use_all=False, deadline=None):
+    """
+    Chiziqli oktan aralashmasi uchun eng arzon sostav.
+    use_all=True - har bir product kamida min_share (yoki MIN_COMPONENT_SHARE) foiz bilan
+    ishtirok etadi (kombinatsiya uchun oddiy LP), aks holda MILP ixtiyoriy qism-to'plamni tanlaydi.
+    deadline - Deadline yoki millisekundlar (MILP vaqt cheklovi)
+    Yechim bo'lmasa None.
+    """
+    if not products:
+        return None
+
+    octanes, prices, caps = blend_arrays(products)
+    if use_all:
+        percentages = solve_blend_lp(octanes, prices, caps, target_octane, lower=min_share or MIN_COMPONENT_SHARE)
+    else:
+        percentages = solve_blend_milp(octanes, prices, caps, target_octane, max_products, min_share, deadline=deadline)
+
+    if percentages is None:
+        return None
+    return blend_result(products, percentages, octanes, prices, caps, target_octane)
+
+
+def k_best_blends(products, target_octane, k=5, max_products=None, min_share=MIN_COMPONENT_SHARE, tolerance=0.5, max_solves=None,
+                  deadline=None, perf=None):
+    """
+    K ta eng arzon, tuzilishi bo'yicha farq qiladigan sostavlar.
+    Har bir yechimdan keyin uning product to'plami "no-good" kesim bilan taqiqlanadi
+    va MILP qayta yechiladi. Foizlari tolerance (%) dan kam farq qiladigan
+    sostavlar takror hisoblanadi. Natijalar narx bo'yicha o'sish tartibida,
+    'cost_gap' - eng arzon variantdan narx farqi.
+    max_solves - MILP yechishlar soni cheklovi (standart 3·k)
+    deadline - Deadline yoki millisekundlar: muddat tugasa shu paytgacha topilgan sostavlar
+    qaytariladi, har birida 'completed' = False
+    perf - PerfRecorder: milp_solves (no-good kesimlar bilan qayta yechishlar ham)
+    """
+    if not products:
+        return []
+    deadline = Deadline.coerce(deadline)
+    perf = PerfRecorder.coerce(perf)
+
+    octanes, prices, caps = blend_arrays(products)
+    # Kesimlar y_i bo'yicha: ishlatilgan product foizi musbat bo'lishi shart
+    min_share = max(min_share, ACTIVE_SHARE)
+    exclude = []
+    found = []
+    results = []
+
+    # Tolerance bo'yicha takrorlar ham kesim oladi - cheklangan marta urinamiz
+    for _ in range(max_solves or 3 * k):
+        if results and deadline.expired():
+            break
+        percentages = solve_blend_milp(octanes, prices, caps, target_octane, max_products, min_share, exclude, deadline)
+        perf.count('milp_solves')
+        if percentages is None:
+            break
+        exclude.append(percentages >= min_share / 2)
+
+        if any(np.max(np.abs(percentages - other)) <= tolerance for other in found):
+            continue
+        found.append(percentages)
+        results.append(blend_result(products, percentages, octanes, prices, caps, target_octane))
+        if len(results) >= k:
+            break
+
+    if results:
+        best_price = float(prices @ found[0]) / 100.0
+        for result, percentages in zip(results, found):
+            result['cost_gap'] = round(float(prices @ percentages) / 100.0 - best_price, 4)
+            result['completed'] = deadline.completed
+    return results
+
+
+def price_octane_frontier(octanes, prices, caps):
+    """
+    Aniq narx/oktan chegarasi (Pareto egri chizig'i): C(t) = min narx, oktan >= t.
+    Parametrik LP: oktan cheklovi uchun ko'paytuvchi λ >= 0 bo'lganda yechim -
+    productlarni (narx - λ·oktan) bo'yicha saralab, GOST cheklovlarini ketma-ket to'ldirish.
+    Tartib faqat λ_ij = (narx_i - narx_j) / (oktan_i - oktan_j) nuqtalarida o'zgaradi,
+    shuning uchun egri chiziq uchlari - har bir oraliqdagi bitta yechim (barchasi birga hisoblanadi).
+    Uchlar orasida C(t) chiziqli. Natija: {'octanes', 'prices', 'percentages' (m, n)} -
+    oktan o'sish tartibida; Σ GOST < 100 bo'lsa None.
+    """
+    octanes = np.asarray(octanes, dtype=float)
+    prices = np.asarray(prices, dtype=float)
+    caps = np.asarray(caps, dtype=float)
+    if not len(octanes) or caps.sum() < 100.0:
+        return None
+
+    # Musbat sinish nuqtalari va har bir oraliqning ichki nuqtasi
+    d_octane = octanes[:, None] - octanes[None, :]
+    d_price = prices[:, None] - prices[None, :]
+    different = d_octane != 0
+    breakpoints = np.divide(d_price, d_octane, out=np.zeros_like(d_price), where=different)
+    breakpoints = np.unique(breakpoints[different & (breakpoints > 0)])
+    if len(breakpoints):
+        lambdas = np.concatenate([[breakpoints[0] / 2], (breakpoints[:-1] + breakpoints[1:]) / 2, [breakpoints[-1] * 2]])
+    else:
+        lambdas = np.ones(1)
+
+    # Har bir λ uchun ochko'z to'ldirish: (narx - λ·oktan) bo'yicha arzonidan boshlab
+    weights = prices[None, :] - lambdas[:, None] * octanes[None, :]
+    order = np.argsort(weights, axis=1, kind='stable')
+    sorted_caps = caps[order]
+    filled_before = np.cumsum(sorted_caps, axis=1) - sorted_caps
+    shares = np.clip(100.0 - filled_before, 0.0, sorted_caps)
+    percentages = np.zeros_like(shares)
+    np.put_along_axis(percentages, order, shares, axis=1)
+
+    vertex_octanes = percentages @ octanes / 100.0
+    vertex_prices = percentages @ prices / 100.0
+    # λ o'sishi bilan oktan o'smaydi - takroriy uchlar chiqariladi
+    keep = np.concatenate([[True], np.diff(vertex_octanes) > 1e-9])
+    return {
+        'octanes': vertex_octanes[keep],
+        'prices': vertex_prices[keep],
+        'percentages': percentages[keep],
+    }
+
+
+def extreme_octane_blend(octanes, prices, caps, maximize=True):
+    """
+    Maksimal (maximize=False - minimal) oktanli sostav - kasrli ryukzak masalasi, aniq yechim O(n log n):
+    productlar oktan bo'yicha (tenglari ichida arzonrog'i birinchi) saralanib, GOST cheklovlarigacha
+    ketma-ket to'ldiriladi. Shu oktanli sostavlar ichida eng arzoni. Natija - foizlar massivi;
+    Σ GOST < 100 bo'lsa yig'indi 100 dan kam (barcha productlar cheklovgacha).
+    """
+    octanes = np.asarray(octanes, dtype=float)
+    prices = np.asarray(prices, dtype=float)
+    caps = np.clip(np.asarray(caps, dtype=float), 0.0, 100.0)
+    order = np.lexsort((prices, -octanes if maximize else octanes))
+    sorted_caps = caps[order]
+    filled_before = np.cumsum(sorted_caps) - sorted_caps
+    percentages = np.zeros_like(caps)
+    percentages[order] = np.clip(100.0 - filled_before, 0.0, sorted_caps)
+    return percentages
+
+
+def octane_bounds(octanes, prices, caps):
+    """GOST cheklovlari bilan erishiladigan (minimal, maksimal) oktan yoki None (Σ GOST < 100)"""
+    octanes = np.asarray(octanes, dtype=float)
+    if not len(octanes) or np.clip(np.asarray(caps, dtype=float), 0.0, 100.0).sum() < 100.0:
+        return None
+    lowest = extreme_octane_blend(octanes, prices, caps, maximize=False)
+    highest = extreme_octane_blend(octanes, prices, caps, maximize=True)
+    return float(lowest @ octanes) / 100.0, float(highest @ octanes) / 100.0
+
+
+def frontier_at_octane(frontier, target_octane):
+    """
+    Chegaradagi eng arzon sostav (foizlar massivi): oktan >= target_octane.
+    Eng arzon uchning oktani maqsaddan yuqori bo'lsa - o'sha uch; erishib bo'lmasa None.
+    """
+    vertex_octanes = frontier['octanes']
+    if target_octane > vertex_octanes[-1] + 1e-9:
+        return None
+    if target_octane <= vertex_octanes[0]:
+        return frontier['percentages'][0]
+    upper = min(int(np.searchsorted(vertex_octanes, target_octane)), len(vertex_octanes) - 1)
+    lower = upper - 1
+    alpha = (target_octane - vertex_octanes[lower]) / (vertex_octanes[upper] - vertex_octanes[lower])
+    return (1 - alpha) * frontier['percentages'][lower] + alpha * frontier['percentages'][upper]
+
+
+def frontier_representatives(frontier, target_octane, count=5):
+    """
+    Chegaradan narx bo'yicha teng oraliqli count ta sostav: C(maqsad) dan C(maks. oktan) gacha.
+    Har biri o'z oktani uchun isbotlangan eng arzon. Natija: [(oktan, foizlar), ...]
+    narx o'sish tartibida (takrorlarsiz); maqsadga erishib bo'lmasa [].
+    """
+    vertex_octanes = frontier['octanes']
+    vertex_prices = frontier['prices']
+    if target_octane > vertex_octanes[-1] + 1e-9:
+        return []
+
+    # Egri chiziqning maqsaddan yuqori qismi: C(t) uchlar orasida chiziqli
+    octane_start = min(max(float(target_octane), float(vertex_octanes[0])), float(vertex_octanes[-1]))
+    price_start = float(np.interp(octane_start, vertex_octanes, vertex_prices))
+    above = vertex_octanes > octane_start
+    curve_octanes = np.concatenate([[octane_start], vertex_octanes[above]])
+    curve_prices = np.concatenate([[price_start], vertex_prices[above]])
+
+    # Narx darajalari -> oktan (C(t) o'suvchi) -> sostav
+    price_levels = np.linspace(curve_prices[0], curve_prices[-1], count)
+    level_octanes = np.interp(price_levels, curve_prices, curve_octanes)
+    representatives = []
+    for octane in level_octanes:
+        if representatives and octane - representatives[-1][0] <= 1e-6:
+            continue
+        representatives.append((float(octane), frontier_at_octane(frontier, octane)))
+    return representatives
+
+
+def solve_multi_grade_lp(octanes, prices, caps, targets, volumes, availability=None, deadline=None):
+    """
+    Bir nechta marka uchun birgalikdagi LP (umumiy komponent zaxirasi bilan):
+        min  Σ_g Σ_i narx_i · x_gi
+        Σ_i x_gi = V_g,  Σ_i oktan_i · x_gi >= maqsad_g · V_g,  0 <= x_gi <= GOST_i / 100 · V_g
+        Σ_g x_gi <= zaxira_i
+    x_gi - g markadagi i product miqdori (kg). targets, volumes - (G,) massivlar,
+    availability - (n,) massiv (inf - cheklovsiz) yoki None.
+    deadline - Deadline: HiGHS qolgan vaqt bilan cheklanadi; vaqt tugasa None va muddat
+    tugagani qayd etiladi (chala LP yechimi reja emas).
+    Natija: (G, n) foizlar massivi yoki None, agar birgalikdagi reja mavjud bo'lmasa.
+    """
+    octanes = np.asarray(octanes, dtype=float)
+    prices = np.asarray(prices, dtype=float)
+    caps = np.asarray(caps, dtype=float)
+    targets = np.asarray(targets, dtype=float)
+    volumes = np.asarray(volumes, dtype=float)
+    grades, n = len(targets), len(octanes)
+    if caps.sum() < 100.0 or np.any(volumes <= 0):
+        return None
+
+    # O'zgaruvchilar tartibi: x[g, i] -> g * n + i
+    grade_rows = np.kron(np.eye(grades), np.ones((1, n)))
+    octane_rows = -np.kron(np.eye(grades), octanes.reshape(1, -1))
+    A_ub, b_ub = [octane_rows], [-targets * volumes]
+    if availability is not None:
+        availability = np.asarray(availability, dtype=float)
+        limited = np.isfinite(availability)
+        if np.any(limited):
+            A_ub.append(np.kron(np.ones((1, grades)), np.eye(n))[limited])
+            b_ub.append(availability[limited])
+
+    deadline = Deadline.coerce(deadline)
+    time_limit = deadline.solver_time_limit()
+    result = linprog(
+        c=np.tile(prices, grades),
+        A_ub=np.vstack(A_ub),
+        b_ub=np.concatenate(b_ub),
+        A_eq=grade_rows,
+        b_eq=volumes,
+        bounds=list(zip(np.zeros(grades * n), np.outer(volumes, caps / 100.0).ravel())),
+        method='highs',
+        options={} if time_limit is None else {'time_limit': time_limit},
+    )
+    if result.status == 1:
+        deadline.expire()
+    if result.status != 0:
+        return None
+    return 100.0 * result.x.reshape(grades, n) / volumes[:, None]
@@ -0,0 +1,132 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from calibration.benchmark import (
+    BACKENDS,
+    DEFAULT_SEED,
+    PRODUCT_SET_SIZES,
+    TARGET_OCTANES,
+    compare_reports,
+    run_benchmark,
+)
+
+
+def _int_list(value):
+    return [int(item) for item in value.split(',') if item.strip()]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark gasoline blend optimizers on fixed synthetic product sets and write a JSON report'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output',
+            default='blend_benchmark.json',
+            help='Path of the JSON report',
+        )
+        parser.add_argument(
+            '--baseline',
+            help='Previous JSON report to compare against',
+        )
+        parser.add_argument(
+            '--sizes',
+            type=_int_list,
+            default=list(PRODUCT_SET_SIZES),
+            help='Comma-separated product set sizes',
+        )
+        parser.add_argument(
+            '--targets',
+            type=_int_list,
+            default=list(TARGET_OCTANES),
+            help='Comma-separated target octane numbers',
+        )
+        parser.add_argument(
+            '--backends',
+            type=lambda value: [item.strip() for item in value.split(',') if item.strip()],
+            default=list(BACKENDS),
+            help=f'Comma-separated optimizer backends ({", ".join(BACKENDS)})',
+        )
+        parser.add_argument(
+            '--repeats',
+            type=int,
+            default=3,
+            help='Runs per case (latency and gap are summarised over runs)',
+        )
+        parser.add_argument(
+            '--budget-ms',
+            type=int,
+            default=2000,
+            help='Time budget of a single optimizer run in milliseconds',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=DEFAULT_SEED,
+            help='Seed of the synthetic product sets',
+        )
+        parser.add_argument(
+            '--latency-tolerance',
+            type=float,
+            default=0.25,
+            help='Allowed relative increase of median latency against the baseline',
+        )
+        parser.add_argument(
+            '--gap-tolerance',
+            type=float,
+            default=0.5,
+            help='Allowed increase of the median optimality gap against the baseline, in percentage points',
+        )
+        parser.add_argument(
+            '--fail-on-regression',
+            action='store_true',
+            help='Exit with an error when the comparison finds regressions',
+        )
+
+    def handle(self, *args, **options):
+        if options['repeats'] < 1:
+            raise CommandError('--repeats must be at least 1')
+
+        def report_case(result):
+            latency = result['latency_ms']['median']
+            gap = result['gap_pct']['median'] if result['gap_pct'] else None
+            saved = result['evaluations_saved']['median']
+            self.stdout.write(
+                f"{result['backend']:<22} n={result['products']:<3} AI-{result['target_octane']:<4} "
+                f"{latency:9.1f} ms  gap {'-' if gap is None else f'{gap:.3f}%':>8}  "
+                f"feasible {result['feasible_rate']:.2f}  saved {saved:>9.0f}"
+            )
+
+        try:
+            report = run_benchmark(
+                sizes=options['sizes'],
+                targets=options['targets'],
+                backends=options['backends'],
+                repeats=options['repeats'],
+                deadline_ms=options['budget_ms'],
+                seed=options['seed'],
+                on_case=report_case,
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        output = Path(options['output'])
+        output.write_text(json.dumps(report, indent=2))
+        self.stdout.write(self.style.SUCCESS(f'Report written to {output}'))
+
+        if not options['baseline']:
+            return
+        baseline = json.loads(Path(options['baseline']).read_text())
+        regressions = compare_reports(
+            report, baseline,
+            latency_tolerance=options['latency_tolerance'],
+            gap_tolerance=options['gap_tolerance'],
+        )
+        if not regressions:
+            self.stdout.write(self.style.SUCCESS('No regressions against the baseline'))
+            return
+        for regression in regressions:
+            self.stdout.write(self.style.WARNING(regression))
+        if options['fail_on_regression']:
+            raise CommandError(f'{len(regressions)} regression(s) against the baseline')
@@ -0,0 +1,89 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from calibration.models import CalculationJournal
+from calibration.partitioning import (
+    PARTITIONED_MODELS,
+    add_months,
+    month_start,
+    is_partitioned,
+    list_partitions,
+    create_month_partition,
+    archive_partition,
+)
+
+
+class Command(BaseCommand):
+    help = 'Create upcoming monthly partitions of calculation tables and archive partitions older than the retention period'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--months-ahead',
+            type=int,
+            default=getattr(settings, 'CALCULATION_PARTITION_MONTHS_AHEAD', 3),
+            help='How many future months to create partitions for',
+        )
+        parser.add_argument(
+            '--retention-months',
+            type=int,
+            default=getattr(settings, 'CALCULATION_RETENTION_MONTHS', None),
+            help='Archive and drop partitions older than this many months (default: keep everything)',
+        )
+        parser.add_argument(
+            '--archive-dir',
+            default=str(getattr(settings, 'CALCULATION_ARCHIVE_DIR', settings.BASE_DIR / 'archive')),
+            help='Directory for compressed CSV archives of dropped partitions',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only show what would be done',
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Partitioning is only supported on PostgreSQL')
+
+        current_month = month_start(timezone.now())
+        retention = options['retention_months']
+        cutoff = add_months(current_month, -retention) if retention else None
+
+        with connection.cursor() as cursor:
+            for calc_type, model in PARTITIONED_MODELS.items():
+                table = model._meta.db_table
+                if not is_partitioned(cursor, table):
+                    self.stdout.write(self.style.WARNING(f'{table}: not partitioned, run migrations first'))
+                    continue
+
+                for offset in range(options['months_ahead'] + 1):
+                    start = add_months(current_month, offset)
+                    if options['dry_run']:
+                        self.stdout.write(f'{table}: ensure partition for {start:%Y-%m}')
+                        continue
+                    with transaction.atomic():
+                        if create_month_partition(cursor, table, start):
+                            self.stdout.write(f'{table}: created partition for {start:%Y-%m}')
+
+                if cutoff is None:
+                    continue
+
+                for name, start in list_partitions(cursor, table):
+                    end = add_months(start, 1)
+                    if end > cutoff:
+                        break
+                    if options['dry_run']:
+                        self.stdout.write(f'{table}: archive and drop {name}')
+                        continue
+                    with transaction.atomic():
+                        path = archive_partition(cursor, table, name, options['archive_dir'])
+                        # Записи журнала за тот же месяц удаляются по индексу (тип, timestamp)
+                        deleted, _ = CalculationJournal.objects.filter(
+                            calculation_type=calc_type,
+                            timestamp__gte=start,
+                            timestamp__lt=end,
+                        ).delete()
+                    self.stdout.write(self.style.SUCCESS(
+                        f'{table}: archived {name} to {path}, removed {deleted} journal entries'
+                    ))
@@ -0,0 +1,166 @@
+# Generated by Django 5.2.2 on 2026-10-18 22:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# Строки журнала строятся здесь, а не через calibration.history: миграция должна работать
+# с историческими моделями (apps.get_model) и не меняться вместе с живым кодом.
+
+def _transfer_entry(calc):
+    return {
+        'tank_id': calc.tank_id,
+        'product_id': calc.product_id,
+        'tank_name': calc.tank.name,
+        'product_name': calc.product.name,
+        'summary': f"Откачка: {calc.transfer_weight_kg:.2f} кг из {calc.initial_height_cm:.2f} см → {calc.final_height_cm:.2f} см",
+        'key_values': {
+            'transfer_weight_kg': calc.transfer_weight_kg,
+            'initial_height_cm': calc.initial_height_cm,
+            'final_height_cm': calc.final_height_cm,
+            'volume_removed_liters': calc.volume_added_liters,
+            'fill_percentage': calc.fill_percentage,
+        }
+    }
+
+
+def _volume_weight_entry(calc):
+    return {
+        'tank_id': calc.tank_id,
+        'product_id': calc.product_id,
+        'tank_name': calc.tank.name,
+        'product_name': calc.product.name,
+        'summary': f"Объем и вес: {calc.height_cm:.2f} см → {calc.volume_liters:.2f} л, {calc.weight_kg:.2f} кг",
+        'key_values': {
+            'height_cm': calc.height_cm,
+            'volume_liters': calc.volume_liters,
+            'weight_kg': calc.weight_kg,
+            'fill_percentage': calc.fill_percentage,
+        }
+    }
+
+
+def _adding_entry(calc):
+    return {
+        'tank_id': calc.tank_id,
+        'product_id': calc.product_id,
+        'tank_name': calc.tank.name,
+        'product_name': calc.product.name,
+        'summary': f"Добавление: {calc.current_height_cm:.2f} см + {calc.amount_value:.2f} {'кг' if calc.amount_type == 'weight' else 'л'} → {calc.final_height_cm:.2f} см",
+        'key_values': {
+            'current_height_cm': calc.current_height_cm,
+            'final_height_cm': calc.final_height_cm,
+            'added_volume_liters': calc.added_volume_liters,
+            'added_weight_kg': calc.added_weight_kg,
+            'fill_percentage': calc.fill_percentage,
+        }
+    }
+
+
+def _density_entry(calc):
+    return {
+        'tank_id': None,
+        'product_id': calc.product_id,
+        'tank_name': '—',
+        'product_name': calc.product.name if calc.product else '—',
+        'summary': f"Плотность: {calc.reference_density_kg_m3:.1f} кг/м³ при {calc.reference_temperature_c:.1f}°C → {calc.corrected_density_kg_m3:.1f} кг/м³",
+        'key_values': {
+            'reference_density_kg_m3': calc.reference_density_kg_m3,
+            'reference_temperature_c': calc.reference_temperature_c,
+            'target_temperature_c': calc.target_temperature_c,
+            'corrected_density_kg_m3': calc.corrected_density_kg_m3,
+        }
+    }
+
+
+def _gasoline_blend_entry(calc):
+    variants_count = len(calc.blend_variants) if calc.blend_variants else 0
+    return {
+        'tank_id': None,
+        'product_id': None,
+        'tank_name': '—',
+        'product_name': f"AI-{calc.target_octane}",
+        'summary': f"Смешивание бензина: {variants_count} вариантов, целевое октановое число: {calc.target_octane}",
+        'key_values': {
+            'target_octane': calc.target_octane,
+            'variants_count': variants_count,
+        }
+    }
+
+
+def _processing_entry(calc):
+    materials_count = len(calc.materials) if calc.materials else 0
+    return {
+        'tank_id': None,
+        'product_id': None,
+        'tank_name': '—',
+        'product_name': f"Переработка ({calc.calculation_date.strftime('%d.%m.%Y')})",
+        'summary': f"Переработка: {materials_count} материалов, прибыль: ${float(calc.total_profit):.2f}",
+        'key_values': {
+            'materials_count': materials_count,
+            'sale_price': float(calc.sale_price),
+            'total_cost': float(calc.total_cost),
+            'total_profit': float(calc.total_profit),
+        }
+    }
+
+
+# Модели расчетов по типам журнала (имена моделей на момент миграции)
+JOURNAL_SOURCES = [
+    ('transfer', 'TransferCalculation', ('tank', 'product'), _transfer_entry),
+    ('volume_weight', 'VolumeWeightCalculation', ('tank', 'product'), _volume_weight_entry),
+    ('adding', 'AddingCalculation', ('tank', 'product'), _adding_entry),
+    ('density', 'DensityTemperatureCalculation', ('product',), _density_entry),
+    ('gasoline_blend', 'GasolineBlendCalculation', (), _gasoline_blend_entry),
+    ('processing', 'ProcessingCalculation', (), _processing_entry),
+]
+
+
+def backfill_journal(apps, schema_editor):
+    """Заполнить журнал существующими расчетами"""
+    CalculationJournal = apps.get_model('calibration', 'CalculationJournal')
+    for calc_type, model_name, related, build_entry in JOURNAL_SOURCES:
+        model = apps.get_model('calibration', model_name)
+        batch = []
+        for calc in model.objects.select_related(*related).order_by('id').iterator(chunk_size=2000):
+            batch.append(CalculationJournal(
+                calculation_type=calc_type, source_id=calc.pk, timestamp=calc.timestamp, **build_entry(calc)
+            ))
+            if len(batch) >= 2000:
+                CalculationJournal.objects.bulk_create(batch)
+                batch = []
+        if batch:
+            CalculationJournal.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calibration', '0009_add_processing_order_to_product'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CalculationJournal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('calculation_type', models.CharField(choices=[('transfer', 'Откачка'), ('volume_weight', 'Объем/Вес'), ('adding', 'Добавление'), ('density', 'Плотность'), ('gasoline_blend', 'Смешивание бензина'), ('processing', 'Переработка')], max_length=20, verbose_name='Тип расчета')),
+                ('source_id', models.BigIntegerField(help_text='ID записи в таблице соответствующего типа расчета', verbose_name='ID расчета')),
+                ('timestamp', models.DateTimeField(verbose_name='Время расчета')),
+                ('tank_name', models.CharField(default='—', max_length=200, verbose_name='Резервуар (название)')),
+                ('product_name', models.CharField(default='—', max_length=200, verbose_name='Продукт (название)')),
+                ('summary', models.CharField(max_length=500, verbose_name='Описание')),
+                ('key_values', models.JSONField(default=dict, help_text='Основные числовые результаты расчета', verbose_name='Ключевые значения')),
+                ('product', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='calibration.product', verbose_name='Продукт')),
+                ('tank', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='calibration.tank', verbose_name='Резервуар')),
+            ],
+            options={
+                'verbose_name': 'Запись журнала расчетов',
+                'verbose_name_plural': 'Журнал расчетов',
+                'ordering': ['-timestamp', '-id'],
+                'indexes': [models.Index(fields=['-timestamp', '-id'], name='journal_timestamp_id_idx')],
+                'constraints': [models.UniqueConstraint(fields=('calculation_type', 'source_id'), name='journal_unique_source')],
+            },
+        ),
+        migrations.RunPython(backfill_journal, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.2 on 2026-10-18 22:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calibration', '0010_calculationjournal'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='addingcalculation',
+            index=models.Index(fields=['tank', '-timestamp'], name='adding_tank_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='addingcalculation',
+            index=models.Index(fields=['-timestamp'], name='adding_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='calculationjournal',
+            index=models.Index(fields=['tank', '-timestamp', '-id'], name='journal_tank_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='calculationjournal',
+            index=models.Index(fields=['product', '-timestamp', '-id'], name='journal_product_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='calculationjournal',
+            index=models.Index(fields=['calculation_type', '-timestamp', '-id'], name='journal_type_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='densitytemperaturecalculation',
+            index=models.Index(fields=['-timestamp'], name='density_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='gasolineblendcalculation',
+            index=models.Index(fields=['-timestamp'], name='blend_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='processingcalculation',
+            index=models.Index(fields=['-timestamp'], name='processing_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transfercalculation',
+            index=models.Index(fields=['tank', '-timestamp'], name='transfer_tank_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transfercalculation',
+            index=models.Index(fields=['-timestamp'], name='transfer_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='volumeweightcalculation',
+            index=models.Index(fields=['tank', '-timestamp'], name='volweight_tank_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='volumeweightcalculation',
+            index=models.Index(fields=['-timestamp'], name='volweight_ts_idx'),
+        ),
+    ]
@@ -0,0 +1,153 @@
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import migrations
+from django.utils import timezone
+
+
+# Таблицы и DDL зафиксированы на момент миграции (не импортируются из calibration.partitioning):
+# дальнейшие изменения модулей и моделей не меняют уже примененную схему
+PARTITIONED_TABLES = [
+    'calibration_transfercalculation',
+    'calibration_volumeweightcalculation',
+    'calibration_addingcalculation',
+    'calibration_densitytemperaturecalculation',
+]
+
+
+def month_start(value):
+    """Начало месяца (UTC) для даты/времени"""
+    return datetime(value.year, value.month, 1, tzinfo=dt_timezone.utc)
+
+
+def add_months(value, months):
+    """Сдвиг начала месяца на months месяцев"""
+    month_index = value.year * 12 + value.month - 1 + months
+    return datetime(month_index // 12, month_index % 12 + 1, 1, tzinfo=dt_timezone.utc)
+
+
+def partition_name(table, start):
+    return f"{table}_p{start:%Y%m}"
+
+
+def default_partition_name(table):
+    return f"{table}_default"
+
+
+def is_partitioned(cursor, table):
+    cursor.execute("SELECT 1 FROM pg_partitioned_table WHERE partrelid = %s::regclass", [table])
+    return cursor.fetchone() is not None
+
+
+def create_month_partition(cursor, table, start):
+    """
+    Создать партицию месяца, если ее еще нет.
+    Строки этого месяца, уже попавшие в DEFAULT-партицию, переносятся в новую.
+    Возвращает True, если партиция создана.
+    """
+    name = partition_name(table, start)
+    cursor.execute("SELECT to_regclass(%s)", [name])
+    if cursor.fetchone()[0] is not None:
+        return False
+
+    end = add_months(start, 1)
+    default = default_partition_name(table)
+    cursor.execute(f'CREATE TABLE "{name}" (LIKE "{table}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+    cursor.execute(
+        f'WITH moved AS (DELETE FROM "{default}" WHERE "timestamp" >= %s AND "timestamp" < %s RETURNING *) '
+        f'INSERT INTO "{name}" SELECT * FROM moved',
+        [start, end]
+    )
+    cursor.execute(
+        f'ALTER TABLE "{table}" ATTACH PARTITION "{name}" FOR VALUES FROM (%s) TO (%s)',
+        [start, end]
+    )
+    return True
+
+
+def convert_to_partitioned(cursor, table, first_month, last_month):
+    """
+    Пересоздать обычную таблицу как партиционированную по месяцам timestamp.
+    Первичный ключ становится (id, timestamp) - ключ партиционирования обязан
+    входить в уникальные ограничения. Индексы и внешние ключи переносятся.
+    """
+    old = f"{table}_unpartitioned"
+    # Имя отличается от {table}_id_seq: та последовательность принадлежит
+    # старой таблице и удаляется вместе с ней
+    sequence = f"{table}_part_id_seq"
+
+    cursor.execute(
+        "SELECT indexdef FROM pg_indexes WHERE tablename = %s AND indexname <> %s",
+        [table, f"{table}_pkey"]
+    )
+    index_definitions = [row[0] for row in cursor.fetchall()]
+    cursor.execute(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'f'",
+        [table]
+    )
+    foreign_keys = cursor.fetchall()
+
+    cursor.execute(f'ALTER TABLE "{table}" RENAME TO "{old}"')
+    cursor.execute(
+        f'CREATE TABLE "{table}" (LIKE "{old}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS) '
+        f'PARTITION BY RANGE ("timestamp")'
+    )
+    cursor.execute(f'ALTER TABLE "{table}" ADD PRIMARY KEY (id, "timestamp")')
+
+    # Автоинкремент id: отдельная последовательность (IDENTITY недоступен
+    # для партиционированных таблиц до PostgreSQL 17)
+    cursor.execute(f'CREATE SEQUENCE "{sequence}" OWNED BY "{table}".id')
+    cursor.execute(f'ALTER TABLE "{table}" ALTER COLUMN id SET DEFAULT nextval(\'"{sequence}"\')')
+
+    cursor.execute(f'CREATE TABLE "{default_partition_name(table)}" PARTITION OF "{table}" DEFAULT')
+    month = first_month
+    while month <= last_month:
+        create_month_partition(cursor, table, month)
+        month = add_months(month, 1)
+
+    cursor.execute(f'INSERT INTO "{table}" SELECT * FROM "{old}"')
+    cursor.execute(f'DROP TABLE "{old}" CASCADE')
+
+    # Определения индексов получены до переименования и ссылаются на новое имя
+    for definition in index_definitions:
+        cursor.execute(definition)
+    for name, definition in foreign_keys:
+        cursor.execute(f'ALTER TABLE "{table}" ADD CONSTRAINT "{name}" {definition}')
+
+    cursor.execute(f'SELECT setval(\'"{sequence}"\', COALESCE((SELECT MAX(id) FROM "{table}"), 0) + 1, false)')
+
+
+def partition_tables(apps, schema_editor):
+    """
+    Перевести таблицы расчетов на помесячные партиции (только PostgreSQL).
+    На других СУБД таблицы остаются обычными.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    from django.conf import settings
+
+    months_ahead = getattr(settings, 'CALCULATION_PARTITION_MONTHS_AHEAD', 3)
+    last_month = add_months(month_start(timezone.now()), months_ahead)
+
+    with schema_editor.connection.cursor() as cursor:
+        for table in PARTITIONED_TABLES:
+            if is_partitioned(cursor, table):
+                continue
+            cursor.execute(f'SELECT MIN("timestamp") FROM "{table}"')
+            oldest = cursor.fetchone()[0]
+            first_month = month_start(oldest) if oldest else month_start(timezone.now())
+            convert_to_partitioned(cursor, table, min(first_month, last_month), last_month)
+
+
+class Migration(migrations.Migration):
+
+    # Перестройка таблиц выполняется одной транзакцией
+    atomic = True
+
+    dependencies = [
+        ('calibration', '0011_history_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_tables, migrations.RunPython.noop),
+    ]
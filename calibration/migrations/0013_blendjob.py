@@ -0,0 +1,38 @@
+# Generated by Django 5.2.2 on 2026-10-18 22:44
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calibration', '0012_partition_calculation_tables'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BlendJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'В очереди'), ('running', 'Выполняется'), ('done', 'Готово'), ('failed', 'Ошибка')], default='pending', max_length=10, verbose_name='Статус')),
+                ('request_data', models.JSONField(default=dict, help_text='JSON запроса расчета: target_octane, total_weight, variants_count, products', verbose_name='Параметры запроса')),
+                ('target_octane', models.IntegerField(validators=[django.core.validators.MinValueValidator(0)], verbose_name='Целевое октановое число')),
+                ('combinations_total', models.PositiveIntegerField(default=0, verbose_name='Всего комбинаций')),
+                ('combinations_done', models.PositiveIntegerField(default=0, verbose_name='Обработано комбинаций')),
+                ('best_price', models.FloatField(blank=True, help_text='Цена самого дешевого найденного варианта на текущий момент', null=True, verbose_name='Лучшая цена')),
+                ('partial_results', models.JSONField(default=list, help_text='Лучшие найденные на текущий момент варианты', verbose_name='Промежуточные результаты')),
+                ('error', models.TextField(blank=True, null=True, verbose_name='Ошибка')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Создана')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Начата')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Завершена')),
+                ('calculation', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='calibration.gasolineblendcalculation', verbose_name='Расчет')),
+            ],
+            options={
+                'verbose_name': 'Задача расчета смеси',
+                'verbose_name_plural': 'Задачи расчета смесей',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.2 on 2026-10-18 22:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calibration', '0013_blendjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OctaneInteraction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('coefficient', models.FloatField(help_text='Отклонение октана смеси 50/50 от линейного, умноженное на 4 (например: 4.0 → +1 октан)', verbose_name='Коэффициент взаимодействия (β)')),
+                ('notes', models.TextField(blank=True, null=True, verbose_name='Примечания')),
+                ('product_a', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='calibration.product', verbose_name='Продукт A')),
+                ('product_b', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='calibration.product', verbose_name='Продукт B')),
+            ],
+            options={
+                'verbose_name': 'Взаимодействие продуктов (октан)',
+                'verbose_name_plural': 'Взаимодействия продуктов (октан)',
+                'ordering': ['product_a', 'product_b'],
+                'constraints': [models.UniqueConstraint(fields=('product_a', 'product_b'), name='octane_interaction_unique_pair')],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.2 on 2026-10-18 23:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calibration', '0014_octaneinteraction'),
+    ]
+
+    operations = [
+        migrations.RenameField(
+            model_name='blendjob',
+            old_name='combinations_total',
+            new_name='steps_total',
+        ),
+        migrations.RenameField(
+            model_name='blendjob',
+            old_name='combinations_done',
+            new_name='steps_done',
+        ),
+        migrations.AlterField(
+            model_name='blendjob',
+            name='steps_total',
+            field=models.PositiveIntegerField(default=0, help_text='Шаги поиска: варианты границы цена/октан, решения MILP или комбинации генетического алгоритма', verbose_name='Всего шагов'),
+        ),
+        migrations.AlterField(
+            model_name='blendjob',
+            name='steps_done',
+            field=models.PositiveIntegerField(default=0, verbose_name='Выполнено шагов'),
+        ),
+    ]
@@ -72,6 +72,51 @@ class Tank(models.Model):
             # Использовать линейную интерполяцию
             return float(np.interp(height_cm, heights, volumes))
 
+    @classmethod
+    def heights_to_volumes(cls, levels, method='spline', tanks=None):
+        """
+        Пакетное преобразование высот в объемы для нескольких резервуаров.
+        levels - список (tank_id, height_cm); калибровочные данные загружаются одним запросом,
+        все высоты одного резервуара интерполируются за один вызов (как height_to_volume).
+        tanks - уже загруженные резервуары {id: Tank} (in_bulk), чтобы не запрашивать их повторно.
+        Возвращает массив объемов в порядке levels; неизвестный резервуар - cls.DoesNotExist.
+        """
+        tank_ids = {tank_id for tank_id, _ in levels}
+        if tanks is None:
+            tanks = cls.objects.in_bulk(tank_ids)
+        missing = tank_ids - set(tanks)
+        if missing:
+            raise cls.DoesNotExist(f"Резервуары не найдены: {sorted(missing)}")
+
+        points = {}
+        for tank_id, height, volume in CalibrationPoint.objects.filter(
+            tank_id__in=tank_ids
+        ).order_by('tank_id', 'height_cm').values_list('tank_id', 'height_cm', 'volume_liters'):
+            points.setdefault(tank_id, ([], []))
+            points[tank_id][0].append(height)
+            points[tank_id][1].append(volume)
+
+        result = np.zeros(len(levels))
+        positions = {}
+        for position, (tank_id, _) in enumerate(levels):
+            positions.setdefault(tank_id, []).append(position)
+        for tank_id, tank_positions in positions.items():
+            tank = tanks[tank_id]
+            # Линейные данные по умолчанию, если калибровка не найдена
+            heights, volumes = points.get(tank_id, ([0, tank.height_cm], [0, tank.capacity_liters]))
+            heights, volumes = np.asarray(heights, dtype=float), np.asarray(volumes, dtype=float)
+            query = np.array([float(levels[p][1]) for p in tank_positions])
+
+            if method == 'spline' and len(heights) >= 4:
+                # Использовать кубическую сплайн-интерполяцию
+                values = scipy.interpolate.CubicSpline(heights, volumes, bc_type='natural')(query)
+            else:
+                # Использовать линейную интерполяцию
+                values = np.interp(query, heights, volumes)
+            values = np.where(query >= heights.max(), volumes.max(), values)
+            result[tank_positions] = np.where(query <= 0, 0.0, values)
+        return result
+
     def volume_to_height(self, volume_liters, method='spline'):
         """Преобразовать объем в высоту, используя интерполяцию"""
         heights, volumes = self.get_calibration_data()
@@ -276,6 +321,10 @@ class TransferCalculation(models.Model):
         verbose_name = "Расчет откачки"
         verbose_name_plural = "Расчеты откачки"
         ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=['tank', '-timestamp'], name='transfer_tank_ts_idx'),
+            models.Index(fields=['-timestamp'], name='transfer_ts_idx'),
+        ]
 
     def __str__(self):
         return f"{self.tank.name} - {self.product.name} ({self.timestamp.strftime('%d.%m.%Y %H:%M')})"
@@ -356,6 +405,10 @@ class VolumeWeightCalculation(models.Model):
         verbose_name = "Расчет объема и веса"
         verbose_name_plural = "Расчеты объема и веса"
         ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=['tank', '-timestamp'], name='volweight_tank_ts_idx'),
+            models.Index(fields=['-timestamp'], name='volweight_ts_idx'),
+        ]
 
     def __str__(self):
         return f"{self.tank.name} - {self.product.name} ({self.timestamp.strftime('%d.%m.%Y %H:%M')})"
@@ -472,6 +525,10 @@ class AddingCalculation(models.Model):
         verbose_name = "Расчет добавления"
         verbose_name_plural = "Расчеты добавления"
         ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=['tank', '-timestamp'], name='adding_tank_ts_idx'),
+            models.Index(fields=['-timestamp'], name='adding_ts_idx'),
+        ]
 
     def __str__(self):
         return f"{self.tank.name} - {self.product.name} ({self.timestamp.strftime('%d.%m.%Y %H:%M')})"
@@ -537,6 +594,9 @@ class DensityTemperatureCalculation(models.Model):
         verbose_name = "Расчет плотности по температуре"
         verbose_name_plural = "Расчеты плотности по температуре"
         ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=['-timestamp'], name='density_ts_idx'),
+        ]
 
     def __str__(self):
         product = self.product.name if self.product else "Не указан"
@@ -618,6 +678,9 @@ class GasolineBlendCalculation(models.Model):
         verbose_name = "Расчет бензиновой смеси"
         verbose_name_plural = "Расчеты бензиновых смесей"
         ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=['-timestamp'], name='blend_ts_idx'),
+        ]
 
     def __str__(self):
         return f"AI-{self.target_octane} ({self.timestamp.strftime('%d.%m.%Y %H:%M')}) - {len(self.blend_variants)} вариантов"
@@ -745,6 +808,9 @@ class ProcessingCalculation(models.Model):
         verbose_name = "Расчет переработки"
         verbose_name_plural = "Расчеты переработки"
         ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=['-timestamp'], name='processing_ts_idx'),
+        ]
 
     def __str__(self):
         return f"Переработка ({self.calculation_date.strftime('%d.%m.%Y')}) - {len(self.materials)} материалов"
@@ -753,3 +819,211 @@ class ProcessingCalculation(models.Model):
     def materials_count(self):
         """Materiallar soni"""
         return len(self.materials) if self.materials else 0
+
+
+class CalculationJournal(models.Model):
+    """Журнал расчетов: по одной строке на каждый расчет любого типа"""
+    CALCULATION_TYPES = [
+        ('transfer', 'Откачка'),
+        ('volume_weight', 'Объем/Вес'),
+        ('adding', 'Добавление'),
+        ('density', 'Плотность'),
+        ('gasoline_blend', 'Смешивание бензина'),
+        ('processing', 'Переработка'),
+    ]
+
+    calculation_type = models.CharField(
+        max_length=20,
+        choices=CALCULATION_TYPES,
+        verbose_name="Тип расчета"
+    )
+    source_id = models.BigIntegerField(
+        verbose_name="ID расчета",
+        help_text="ID записи в таблице соответствующего типа расчета"
+    )
+    timestamp = models.DateTimeField(
+        verbose_name="Время расчета"
+    )
+    tank = models.ForeignKey(
+        Tank,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name="Резервуар"
+    )
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name="Продукт"
+    )
+    tank_name = models.CharField(
+        max_length=200,
+        default='—',
+        verbose_name="Резервуар (название)"
+    )
+    product_name = models.CharField(
+        max_length=200,
+        default='—',
+        verbose_name="Продукт (название)"
+    )
+    summary = models.CharField(
+        max_length=500,
+        verbose_name="Описание"
+    )
+    key_values = models.JSONField(
+        default=dict,
+        verbose_name="Ключевые значения",
+        help_text="Основные числовые результаты расчета"
+    )
+
+    class Meta:
+        verbose_name = "Запись журнала расчетов"
+        verbose_name_plural = "Журнал расчетов"
+        ordering = ['-timestamp', '-id']
+        indexes = [
+            models.Index(fields=['-timestamp', '-id'], name='journal_timestamp_id_idx'),
+            models.Index(fields=['tank', '-timestamp', '-id'], name='journal_tank_ts_idx'),
+            models.Index(fields=['product', '-timestamp', '-id'], name='journal_product_ts_idx'),
+            models.Index(fields=['calculation_type', '-timestamp', '-id'], name='journal_type_ts_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['calculation_type', 'source_id'], name='journal_unique_source'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_calculation_type_display()} #{self.source_id} ({self.timestamp.strftime('%d.%m.%Y %H:%M')})"
+
+
+class BlendJob(models.Model):
+    """Фоновая задача расчета бензиновой смеси (для больших наборов продуктов)"""
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUSES = [
+        (STATUS_PENDING, 'В очереди'),
+        (STATUS_RUNNING, 'Выполняется'),
+        (STATUS_DONE, 'Готово'),
+        (STATUS_FAILED, 'Ошибка'),
+    ]
+
+    status = models.CharField(
+        max_length=10,
+        choices=STATUSES,
+        default=STATUS_PENDING,
+        verbose_name="Статус"
+    )
+    request_data = models.JSONField(
+        default=dict,
+        verbose_name="Параметры запроса",
+        help_text="JSON запроса расчета: target_octane, total_weight, variants_count, products"
+    )
+    target_octane = models.IntegerField(
+        validators=[MinValueValidator(0)],
+        verbose_name="Целевое октановое число"
+    )
+    steps_total = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Всего шагов",
+        help_text="Шаги поиска: варианты границы цена/октан, решения MILP или комбинации генетического алгоритма"
+    )
+    steps_done = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Выполнено шагов"
+    )
+    best_price = models.FloatField(
+        null=True,
+        blank=True,
+        verbose_name="Лучшая цена",
+        help_text="Цена самого дешевого найденного варианта на текущий момент"
+    )
+    partial_results = models.JSONField(
+        default=list,
+        verbose_name="Промежуточные результаты",
+        help_text="Лучшие найденные на текущий момент варианты"
+    )
+    calculation = models.ForeignKey(
+        GasolineBlendCalculation,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name="Расчет"
+    )
+    error = models.TextField(
+        blank=True,
+        null=True,
+        verbose_name="Ошибка"
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="Создана"
+    )
+    started_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Начата"
+    )
+    finished_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Завершена"
+    )
+
+    class Meta:
+        verbose_name = "Задача расчета смеси"
+        verbose_name_plural = "Задачи расчета смесей"
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"AI-{self.target_octane} #{self.pk} ({self.get_status_display()})"
+
+    @property
+    def progress_percent(self):
+        """Процент выполненных шагов поиска"""
+        if not self.steps_total:
+            return 100.0 if self.status == self.STATUS_DONE else 0.0
+        return round(100.0 * self.steps_done / self.steps_total, 1)
+
+
+class OctaneInteraction(models.Model):
+    """
+    Коэффициент взаимодействия пары продуктов для метода 'research':
+    октан смеси = Σ xᵢ·Oᵢ + Σ βᵢⱼ·xᵢ·xⱼ (xᵢ - доли), β > 0 - синергия, β < 0 - антагонизм
+    """
+    product_a = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name="Продукт A"
+    )
+    product_b = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name="Продукт B"
+    )
+    coefficient = models.FloatField(
+        verbose_name="Коэффициент взаимодействия (β)",
+        help_text="Отклонение октана смеси 50/50 от линейного, умноженное на 4 (например: 4.0 → +1 октан)"
+    )
+    notes = models.TextField(
+        blank=True,
+        null=True,
+        verbose_name="Примечания"
+    )
+
+    class Meta:
+        verbose_name = "Взаимодействие продуктов (октан)"
+        verbose_name_plural = "Взаимодействия продуктов (октан)"
+        ordering = ['product_a', 'product_b']
+        constraints = [
+            models.UniqueConstraint(fields=['product_a', 'product_b'], name='octane_interaction_unique_pair'),
+        ]
+
+    def __str__(self):
+        return f"{self.product_a.name} × {self.product_b.name}: β = {self.coefficient:+.2f}"
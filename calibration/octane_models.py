@@ -0,0 +1,219 @@
+"""
+Aralashma oktan soni modellari (GasolineBlendCalculation.calculation_method)
+- 'linear'   - chiziqli aralashtirish: O = Σ x_i·O_i
+- 'weighted' - blending index: har bir product oktani indeksga o'tkaziladi BI(O) = exp(k·O),
+               indekslar chiziqli aralashtiriladi va teskari o'tkaziladi: O = ln(Σ x_i·BI_i) / k.
+               k > 0 - yuqori oktanli komponentlar ta'siri kuchliroq (settings.OCTANE_BLENDING_INDEX_K)
+- 'research' - o'zaro ta'sir koeffitsientlari: O = Σ x_i·O_i + Σ_{i<j} β_ij·x_i·x_j,
+               β_ij > 0 - sinergiya, β_ij < 0 - antagonizm (OctaneInteraction jadvali)
+x_i - ulushlar (foiz / 100). Model product to'plami uchun bir marta "kompilyatsiya" qilinadi
+(massivlar va β matritsasi), keyin butun aholi / nomzodlar matritsasi uchun vektorlashtirilgan.
+"""
+import numpy as np
+from django.conf import settings
+
+from .deadline import Deadline
+from .perf import PerfRecorder
+from .projection import project_to_capped_simplex
+from .linear_programming import (
+    price_octane_frontier, frontier_at_octane, frontier_representatives, extreme_octane_blend,
+)
+
+OCTANE_METHODS = ('linear', 'weighted', 'research')
+
+# Blending index koeffitsienti (1/oktan): 0.02 da 70 va 100 oktanli 50/50 aralashma ~87.2 (chiziqli 85)
+DEFAULT_BLENDING_INDEX_K = 0.02
+
+# 'research' uchun ketma-ket chiziqlashtirish (SLP) iteratsiyalari
+SLP_ITERATIONS = 20
+SLP_TOLERANCE = 1e-4
+# 'research' ekstremal sostavini proyeksiyalangan gradient bilan aniqlashtirish iteratsiyalari
+GRADIENT_ITERATIONS = 200
+
+
+class OctaneModel:
+    """
+    Product to'plami uchun kompilyatsiya qilingan oktan modeli.
+    octanes - (n,) oktan sonlari, interactions - (n, n) simmetrik β matritsasi (diagonal 0)
+    """
+
+    def __init__(self, octanes, method='linear', interactions=None, index_k=None):
+        if method not in OCTANE_METHODS:
+            raise ValueError(f"Noma'lum oktan modeli: {method}")
+        self.method = method
+        self.octanes = np.asarray(octanes, dtype=float)
+        n = len(self.octanes)
+        self.interactions = np.zeros((n, n)) if interactions is None else np.asarray(interactions, dtype=float)
+        self.index_k = DEFAULT_BLENDING_INDEX_K if index_k is None else float(index_k)
+        if method == 'weighted':
+            self.index_values = np.exp(self.index_k * self.octanes)
+
+    @property
+    def is_linear(self):
+        """Koeffitsientlar fazosida chiziqli (LP aniq): 'linear' va 'weighted'"""
+        return self.method != 'research'
+
+    def subset(self, indices):
+        """Kombinatsiya uchun model (indekslar bo'yicha)"""
+        indices = np.asarray(indices, dtype=np.intp)
+        return OctaneModel(self.octanes[indices], self.method,
+                           self.interactions[np.ix_(indices, indices)], self.index_k)
+
+    def octane(self, percentages):
+        """Aralashma oktani: (n,) -> skalyar, (m, n) -> (m,) massiv"""
+        x = np.asarray(percentages, dtype=float) / 100.0
+        if self.method == 'weighted':
+            mixed = x @ self.index_values
+            return np.log(np.maximum(mixed, 1e-300)) / self.index_k
+        octane = x @ self.octanes
+        if self.method == 'research':
+            # Σ_{i<j} β_ij x_i x_j = ½ xᵀBx (B simmetrik, diagonal 0)
+            octane = octane + 0.5 * np.einsum('...i,ij,...j->...', x, self.interactions, x)
+        return octane
+
+    def coefficients(self):
+        """Chiziqli fazodagi koeffitsientlar: 'linear' - oktanlar, 'weighted' - indekslar"""
+        return self.index_values if self.method == 'weighted' else self.octanes
+
+    def to_coefficient_space(self, target_octane):
+        """Maqsad oktan chiziqli fazoda (BI monoton - tengsizlik saqlanadi)"""
+        if self.method == 'weighted':
+            return float(np.exp(self.index_k * target_octane))
+        return float(target_octane)
+
+    def effective_octanes(self, percentages):
+        """
+        'research' modelini x nuqtada chiziqlashtirish: e·x' ≈ O(x'), x' = x da aniq.
+        e_i = O_i + (Bx)_i - ½ xᵀBx (Σ x' = 1 bo'lgani uchun konstanta koeffitsientlarga qo'shiladi)
+        """
+        x = np.asarray(percentages, dtype=float) / 100.0
+        bx = self.interactions @ x
+        return self.octanes + bx - 0.5 * float(x @ bx)
+
+
+def compile_octane_model(products, method='linear'):
+    """
+    Product ro'yxati uchun model. 'research' uchun β koeffitsientlari bitta so'rov bilan olinadi;
+    jadvalda yo'q juftlar uchun β = 0 (chiziqli).
+    """
+    from .models import OctaneInteraction
+
+    octanes = [float(p.octane_number) for p in products]
+    interactions = None
+    if method == 'research':
+        position = {p.id: i for i, p in enumerate(products)}
+        interactions = np.zeros((len(products), len(products)))
+        pairs = OctaneInteraction.objects.filter(
+            product_a_id__in=position, product_b_id__in=position
+        ).values_list('product_a_id', 'product_b_id', 'coefficient')
+        for a, b, coefficient in pairs:
+            if a != b:
+                interactions[position[a], position[b]] = interactions[position[b], position[a]] = coefficient
+    return OctaneModel(octanes, method, interactions, getattr(settings, 'OCTANE_BLENDING_INDEX_K', None))
+
+
+def model_frontier_representatives(model, prices, caps, target_octane, count=5, deadline=None, perf=None):
+    """
+    Model bo'yicha narx/oktan chegarasidan count ta sostav: [(model oktani, foizlar), ...].
+    'linear'/'weighted' - chiziqli fazodagi aniq chegara (bitta hisob).
+    'research' - ketma-ket chiziqlashtirish: har bir iteratsiyada model joriy yechimda
+    chiziqlashtiriladi va aniq chegara qayta hisoblanadi; qo'zg'almas nuqtada
+    O(x) = e(x)·x >= maqsad. Maqsadga erishib bo'lmasa [].
+    deadline - Deadline yoki millisekundlar: muddat tugasa (maqsadga yetgan yechim topilgandan
+    keyin) iteratsiyalar to'xtatiladi va shu paytgacha eng arzon yechim qaytariladi.
+    perf - PerfRecorder: lp_sweeps (chegara hisoblari), slp_iterations, frontier_breakpoints
+    (oxirgi chegara uchlari soni).
+    """
+    deadline = Deadline.coerce(deadline)
+    perf = PerfRecorder.coerce(perf)
+    if model.is_linear:
+        frontier = price_octane_frontier(model.coefficients(), prices, caps)
+        perf.count('lp_sweeps')
+        if frontier is None:
+            return []
+        perf.count('frontier_breakpoints', len(frontier['octanes']))
+        representatives = frontier_representatives(frontier, model.to_coefficient_space(target_octane), count)
+        return [(float(model.octane(percentages)), percentages) for _, percentages in representatives]
+
+    effective = model.octanes
+    previous = None
+    best = None
+    frontier = None
+    for _ in range(SLP_ITERATIONS):
+        frontier = price_octane_frontier(effective, prices, caps)
+        perf.count('lp_sweeps')
+        perf.count('slp_iterations')
+        if frontier is None:
+            return []
+        percentages = frontier_at_octane(frontier, target_octane)
+        if percentages is None:
+            break
+        # Model bo'yicha maqsadga yetgan eng arzon yechim saqlanadi
+        if model.octane(percentages) >= target_octane - 1e-6:
+            price = float(percentages @ prices)
+            if best is None or price < best[0]:
+                best = (price, percentages)
+        if previous is not None and np.max(np.abs(percentages - previous)) < SLP_TOLERANCE:
+            break
+        if best is not None and deadline.expired():
+            break
+        previous = percentages
+        effective = model.effective_octanes(percentages)
+
+    perf.count('frontier_breakpoints', len(frontier['octanes']))
+    if best is None:
+        return []
+    representatives = [(float(model.octane(best[1])), best[1])]
+    for _, percentages in frontier_representatives(frontier, target_octane, count)[1:]:
+        octane = float(model.octane(percentages))
+        if octane >= target_octane - 1e-6 and float(percentages @ prices) > best[0] + 1e-9:
+            representatives.append((octane, percentages))
+    return representatives[:count]
+
+
+def model_extreme_blend(model, prices, caps, maximize=True):
+    """
+    Model bo'yicha maksimal (minimal) oktanli sostav, tenglarida eng arzoni.
+    'linear'/'weighted' - koeffitsientlar fazosida aniq ochko'z yechim (BI monoton).
+    'research' - ketma-ket chiziqlashtirish bir nechta boshlang'ich nuqtadan, so'ng proyeksiyalangan
+    gradient; model bo'yicha eng yaxshi sostav qaytariladi (evristika, model qavariq emas).
+    Σ GOST < 100 bo'lsa foizlar yig'indisi 100 dan kichik (extreme_octane_blend).
+    """
+    if model.is_linear:
+        return extreme_octane_blend(model.coefficients(), prices, caps, maximize=maximize)
+
+    # Ko'p boshlang'ich nuqtali SLP: chiziqli yechim va har bir productni birinchi o'ringa
+    # qo'ygan ochko'z sostavlar (model qavariq emas - bitta boshlang'ich nuqta yetarli emas)
+    sign = 1.0 if maximize else -1.0
+    starts = np.tile(model.octanes, (len(model.octanes) + 1, 1))
+    starts[np.arange(1, len(starts)), np.arange(len(model.octanes))] = sign * np.inf
+    candidates = []
+    for start in starts:
+        percentages = extreme_octane_blend(start, prices, caps, maximize=maximize)
+        for _ in range(SLP_ITERATIONS):
+            candidate = extreme_octane_blend(model.effective_octanes(percentages), prices, caps, maximize=maximize)
+            if np.max(np.abs(candidate - percentages)) < SLP_TOLERANCE:
+                break
+            percentages = candidate
+        candidates.append(percentages)
+    candidates = np.array(candidates)
+
+    # Ichki optimumlar (uchlar emas) uchun barcha nuqtalar birga proyeksiyalangan gradient bilan
+    # aniqlashtiriladi: qadam 1/L, L = ||B|| / 100² (foizlar fazosidagi Gesse matritsasi normasi)
+    curvature = float(np.max(np.abs(np.linalg.eigvalsh(model.interactions)))) / 1e4
+    if curvature > 0 and np.clip(np.asarray(caps, dtype=float), 0.0, 100.0).sum() >= 100.0:
+        for _ in range(GRADIENT_ITERATIONS):
+            gradient = (model.octanes + (candidates / 100.0) @ model.interactions) / 100.0
+            moved = project_to_capped_simplex(candidates + sign * gradient / curvature, caps)
+            if np.max(np.abs(moved - candidates)) < SLP_TOLERANCE:
+                break
+            candidates = moved
+    return candidates[np.argmax(sign * model.octane(candidates))]
+
+
+def model_octane_bounds(model, prices, caps):
+    """Model bo'yicha erishiladigan oktan diapazoni (min, max); Σ GOST < 100 bo'lsa None"""
+    if not len(model.octanes) or np.clip(np.asarray(caps, dtype=float), 0.0, 100.0).sum() < 100.0:
+        return None
+    return (float(model.octane(model_extreme_blend(model, prices, caps, maximize=False))),
+            float(model.octane(model_extreme_blend(model, prices, caps, maximize=True))))
@@ -1,75 +1,256 @@
 """
 Optimizatsiya funksiyalari - 3+ product kombinatsiyalari uchun
-AI-based optimization - Genetic Algorithm va Gradient Descent
+Chiziqli oktan aralashmasi - aniq LP/MILP (linear_programming),
+AI-based optimization - Genetic Algorithm va Gradient Descent (zaxira usullar)
 """
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
 from decimal import Decimal
-from itertools import combinations
+import atexit
+import logging
+import multiprocessing
+import os
 import random
-from .genetic_algorithm import genetic_optimize_blend
+import threading
+from typing import NamedTuple
+import numpy as np
+from django.conf import settings
+from .convergence import (
+    StallMonitor, RestartConsensus, GD_STALL_ITERATIONS, GD_STALL_TOLERANCE, GD_RESTART_AGREEMENT, GD_RESTART_TOLERANCE,
+)
+from .deadline import Deadline
+from .perf import PerfRecorder
+from .genetic_algorithm import VectorizedGeneticAlgorithm
+from .projection import project_to_capped_simplex
+from .rng import python_random
+from .octane_models import model_extreme_blend, model_octane_bounds
+from .pruning import prune_combinations, all_combinations
+from .linear_programming import (
+    lp_optimize_blend, solve_combinations_lp, blend_arrays, blend_result, extreme_octane_blend, octane_bounds,
+    MIN_COMPONENT_SHARE,
+)
 
-def optimize_multi_product_blend(products_list, target_octane, max_products=4, step=1.0, use_ai=True, num_variants=5):
+class BlendProduct(NamedTuple):
     """
-    3+ product kombinatsiyasi uchun optimal foizlarni topadi
-    use_ai=True bo'lsa, Genetic Algorithm (AI) ishlatiladi - ChatGPT kabi aqlli algoritm
+    Optimizatorlar uchun yengil, o'zgarmas product yozuvi.
+    Maydon nomlari Product modeli bilan bir xil - optimizatorlar ikkalasini ham qabul qiladi,
+    lekin model obyektlari optimizatsiya sikllarida o'zgartirilmaydi va nusxalanmaydi.
+    """
+    id: int
+    name: str
+    octane_number: float
+    price_per_liter: float
+    gost_percentage: float
+
+
+# Optimizatsiya usullari: 'milp' - aniq chiziqli dasturlash (standart),
+# 'genetic' - Genetic Algorithm / Gradient Descent (use_ai bo'yicha)
+BLEND_SOLVERS = ('milp', 'genetic')
+
+# GA strategiyalari: (price_weight, mutation_rate) - arzondan qimmatgacha
+GA_STRATEGIES = [
+    (0.1, 0.2),
+    (0.5, 0.15),
+    (1.0, 0.15),
+    (1.5, 0.1),
+    (2.0, 0.1),
+]
+
+# Parallel rejim: kombinatsiyalar shu o'lchamdagi bo'laklarga bo'linadi.
+# Bo'lak o'lchami pool hajmiga bog'liq emas - natija workerlar soniga bog'liq bo'lmaydi
+PARALLEL_CHUNK_SIZE = 64
+
+# Muddat tugagach ishlayotgan bo'laklar qisman natijalarini qaytarishi uchun kutish (soniya)
+PARALLEL_GRACE_SECONDS = 0.25
+
+logger = logging.getLogger(__name__)
+
+_pool = None
+_pool_workers = None
+_pool_lock = threading.Lock()
+
+
+def get_blend_pool(workers=None):
+    """
+    Kombinatsiyalarni baholash uchun umumiy ProcessPoolExecutor.
+    Pool so'rovlar orasida qayta ishlatiladi; hajmi workers yoki settings.BLEND_POOL_WORKERS
+    (standart - protsessorlar soni). Hajm o'zgarsa pool qayta yaratiladi.
+    Workerlar fork bilan emas, 'forkserver' (mavjud bo'lmasa 'spawn') bilan yaratiladi:
+    ko'p oqimli server jarayonidan fork qulflar va DB ulanishlarini nusxalaydi.
+    """
+    global _pool, _pool_workers
+    workers = workers or getattr(settings, 'BLEND_POOL_WORKERS', None) or os.cpu_count() or 1
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=_pool_context())
+            _pool_workers = workers
+        return _pool
+
+
+def _pool_context():
+    """Worker jarayonlarini yaratish konteksti: 'forkserver' yoki 'spawn'"""
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
+
+def shutdown_blend_pool():
+    """Umumiy poolni yopish (jarayon tugaganda yoki pool buzilganda)"""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+        _pool_workers = None
+
+
+atexit.register(shutdown_blend_pool)
+
+
+def optimize_multi_product_blend(products_list, target_octane, max_products=4, step=1.0, use_ai=True, num_variants=5,
+                                 solver='milp', min_share=MIN_COMPONENT_SHARE, parallel=False, workers=None, seed=None,
+                                 stats=None, deadline=None, progress=None, octane_model=None, perf=None, min_products=3):
+    """
+    min_products..max_products (standart 3+) product kombinatsiyasi uchun optimal foizlarni topadi
+    solver='milp' - har bir kombinatsiya uchun eng arzon sostav LP bilan aniq topiladi
+    (deterministik, millisekundlar), qo'shimcha ravishda MILP butun ro'yxatdan
+    max_products tagacha productni tanlaydi.
+    solver='genetic' - eski usul: use_ai=True bo'lsa Genetic Algorithm, aks holda Gradient Descent
     num_variants - nechta variant topish kerak
+    min_share - kombinatsiyadagi har bir product uchun minimal foiz (faqat 'milp')
+    parallel=True - kombinatsiyalar bo'laklari umumiy process poolda baholanadi
+    ('milp' va Genetic Algorithm uchun, oktan modeli bilan ham); workers - pool hajmi,
+    seed - so'rov seed'i: kombinatsiyalar bo'laklari uchun mustaqil oqimlar manbai (SeedSequence) -
+    Genetic Algorithm natijasi ketma-ket va parallel rejimda bir xil; Gradient Descent uchun RNG;
+    bir xil seed - bir xil natija
+    stats (dict) - kombinatsiyalarni qisqartirish statistikasi bilan to'ldiriladi,
+    'completed' - qidiruv muddat tufayli to'xtatilmaganmi
+    deadline - Deadline yoki millisekundlar: muddat tugasa shu paytgacha topilgan variantlar qaytariladi
+    progress - callable(done, total, new_variants): baholangan kombinatsiyalar soni, jami soni
+    va oxirgi chaqiruvdan beri topilgan variantlar (fon vazifalari uchun)
+    octane_model - products_list uchun OctaneModel ('weighted' / 'research'): faqat
+    solver='genetic', use_ai=True (Genetic Algorithm fitness); 'weighted' uchun qisqartirish blending
+    index fazosida, 'research' uchun kombinatsiyalar qisqartirilmaydi
+    perf - PerfRecorder: bosqichlar (pruning, milp, combination_lp, parallel_combinations, ga,
+    gradient_descent) vaqti va kombinatsiyalar hisoblagichlari (combinations_*)
     """
-    if len(products_list) < 3:
+    if len(products_list) < min_products:
         return []
+    if solver not in BLEND_SOLVERS:
+        raise ValueError(f"Noma'lum optimizatsiya usuli: {solver}")
     
+    deadline = Deadline.coerce(deadline)
+    perf = PerfRecorder.coerce(perf)
     variants = []
+    # Gradient Descent uchun RNG oqimi (global random holati ishlatilmaydi)
+    py_rng = python_random(seed)
+    
+    # Baholangan kombinatsiyalar soni - progress orqali (barcha usullar uchun bir xil)
+    tried = [0]
+    
+    def tracked_progress(done, total, new_variants):
+        tried[0] = max(tried[0], done)
+        if progress:
+            progress(done, total, new_variants)
+    
+    # Dominatsiya qilingan productlar va maqsad oktanga yetmaydigan kombinatsiyalar
+    # hech qanday optimizator ishga tushmasdan chiqarib tashlanadi
+    pruning_stats = {} if stats is None else stats
+    if octane_model is not None and (solver == 'milp' or not use_ai):
+        raise ValueError("Chiziqli bo'lmagan oktan modeli faqat Genetic Algorithm bilan ishlatiladi")
+    with perf.phase('pruning'):
+        if octane_model is None or octane_model.is_linear:
+            octanes, prices, caps = blend_arrays(products_list)
+            coefficient_target = target_octane
+            if octane_model is not None:
+                # 'weighted': blending index monoton - qisqartirish indekslar fazosida aniq
+                octanes, coefficient_target = octane_model.coefficients(), octane_model.to_coefficient_space(target_octane)
+            candidates = prune_combinations(
+                octanes, prices, caps, coefficient_target, max_products, min_size=min_products,
+                lower=min_share if solver == 'milp' else 0.0, stats=pruning_stats
+            )
+        else:
+            candidates = all_combinations(len(products_list), max_products, min_size=min_products, stats=pruning_stats)
+    perf.update(pruning_stats)
+    logger.info(
+        f"Kombinatsiyalar: {pruning_stats['combinations_total']} ta, baholanadi: {pruning_stats['combinations_evaluated']} ta "
+        f"(productlar: -{pruning_stats['products_pruned']}, dominatsiya: -{pruning_stats['combinations_pruned_dominated']}, "
+        f"oktan: -{pruning_stats['combinations_pruned_infeasible']})"
+    )
+    
+    total = pruning_stats['combinations_evaluated']
+    
+    if solver == 'milp':
+        # Butun ro'yxat bo'yicha eng arzon sostav (max_products tagacha product)
+        with perf.phase('milp'):
+            best = lp_optimize_blend(products_list, target_octane, max_products=max_products, min_share=min_share,
+                                     deadline=deadline)
+        if best:
+            variants.append(best)
+        tracked_progress(0, total, list(variants))
+    
+    if parallel and (solver == 'milp' or use_ai):
+        with perf.phase('parallel_combinations'):
+            combo_variants = _parallel_combination_variants(
+                products_list, target_octane, candidates, solver, min_share, workers, seed, deadline, tracked_progress,
+                octane_model
+            )
+        if combo_variants is not None:
+            variants.extend(combo_variants)
+            return _finish_variants(variants, num_variants, pruning_stats, deadline, perf, tried[0])
     
-    # 3, 4, ... max_products gacha kombinatsiyalar
-    for num_products in range(3, min(max_products + 1, len(products_list) + 1)):
-        for product_combo in combinations(products_list, num_products):
+    if solver == 'milp':
+        # Har bir kombinatsiya uchun barcha productlar ishtirok etadigan eng arzon sostav
+        with perf.phase('combination_lp'):
+            variants.extend(_combination_lp_variants(products_list, target_octane, candidates, min_share, deadline,
+                                                     tracked_progress))
+        return _finish_variants(variants, num_variants, pruning_stats, deadline, perf, tried[0])
+    
+    # min_products ... max_products gacha kombinatsiyalar (qisqartirishdan keyin qolganlari).
+    # Bo'laklar va ularning RNG oqimlari parallel rejim bilan bir xil - natija parallel ga bog'liq emas
+    octanes, prices, caps = blend_arrays(products_list)
+    chunks = _combination_chunks(candidates)
+    done = 0
+    for chunk, chunk_seed in zip(chunks, np.random.SeedSequence(seed).spawn(len(chunks))):
+        rng = np.random.default_rng(chunk_seed)
+        for combo in chunk:
+            # Muddat tugasa - shu paytgacha topilganlar
+            if variants and deadline.expired():
+                break
             if use_ai:
-                # AI-based optimization - Genetic Algorithm (bir nechta variant)
-                # Har bir kombinatsiya uchun bir nechta variantlar topish
-                # Har safar turli variantlar olish uchun, bir necha marta chaqiramiz
-                # Turli strategiyalar bilan (narx va mutation rate)
-                combo_variants = []
-                seen_keys = set()
-                
-                # Turli strategiyalar bilan variantlar topish
-                strategies = [
-                    (0.1, 0.2),  # Arzon variant, katta mutation
-                    (0.5, 0.15),  # Arzon-o'rtacha, o'rtacha mutation
-                    (1.0, 0.15),  # O'rtacha, o'rtacha mutation
-                    (1.5, 0.1),   # Qimmat-o'rtacha, kichik mutation
-                    (2.0, 0.1),   # Qimmat, kichik mutation
-                ]
-                
-                for price_weight, mutation_rate in strategies:
-                    # Har bir strategiya uchun 2-3 marta sinab ko'ramiz
-                    # Lekin strategiyalar `genetic_optimize_blend` ga o'tkazilmayapti
-                    # Shuning uchun, har bir strategiya uchun alohida GA instance yaratamiz
-                    for attempt in range(2):
-                        # Har safar turli variantlar uchun
-                        import time
-                        random.seed(int(time.time() * 1000 + attempt * 1000) % 100000)
-                        
-                        result = genetic_optimize_blend(list(product_combo), target_octane, num_variants=1)
-                        if result:
-                            # Duplikatlarni tekshirish (yengil)
-                            price_key = round(result.get('final_price', 0), 0)  # 0 aniqligi
-                            octane_key = round(result.get('final_octane', 0), 0)  # 0 aniqligi
-                            key = (price_key, octane_key)
-                            
-                            if key not in seen_keys:
-                                seen_keys.add(key)
-                                combo_variants.append(result)
-                                if len(combo_variants) >= 5:  # Har bir kombinatsiya uchun 5 ta variant
-                                    break
-                    
-                    if len(combo_variants) >= 5:
-                        break
-                
-                variants.extend(combo_variants)
+                # Genetic Algorithm - har bir strategiya (GA_STRATEGIES) bitta variant
+                results = _combination_ga_results(
+                    combo, octanes, prices, caps, target_octane, rng, deadline,
+                    octane_model=octane_model.subset(combo) if octane_model is not None else None, perf=perf
+                )
+                new_variants = _chunk_variants(products_list, target_octane, results, octane_model)
             else:
                 # Gradient Descent (eski usul)
-                result = solve_optimal_blend(list(product_combo), target_octane)
-                if result:
-                    variants.append(result)
+                with perf.phase('gradient_descent'):
+                    result = solve_optimal_blend([products_list[i] for i in combo], target_octane, deadline=deadline,
+                                                 rng=py_rng, perf=perf)
+                new_variants = [result] if result else []
+            variants.extend(new_variants)
+            
+            done += 1
+            tracked_progress(done, total, new_variants)
+        if variants and deadline.expired():
+            break
     
+    return _finish_variants(variants, num_variants, pruning_stats, deadline, perf, tried[0])
+
+
+def _finish_variants(variants, num_variants, pruning_stats, deadline, perf, combinations_tried):
+    """optimize_multi_product_blend yakuni: holat, hisoblagichlar va noyob variantlar"""
+    pruning_stats['completed'] = deadline.completed
+    perf.count('combinations_tried', combinations_tried)
+    perf.count('variants_found', len(variants))
+    return _unique_variants(variants, num_variants)
+
+
+def _unique_variants(variants, num_variants):
+    """Duplikatlarni olib tashlash va narx bo'yicha tartiblash"""
     # Variantlarni oktan farqi bo'yicha tartiblash
     if variants:
         variants.sort(key=lambda x: x.get('octane_diff', float('inf')))
@@ -95,9 +276,202 @@ def optimize_multi_product_blend(products_list, target_octane, max_products=4, s
     return []
 
 
-def solve_optimal_blend(products, target_octane):
+def _combination_lp_variants(products_list, target_octane, candidates, min_share, deadline=None, progress=None):
+    """
+    Qisqartirishdan keyin qolgan kombinatsiyalar uchun aniq LP yechimlari (bir o'lcham - bitta hisob).
+    Muddat va progress o'lchamlar orasida.
+    """
+    deadline = Deadline.coerce(deadline)
+    octanes, prices, caps = blend_arrays(products_list)
+    total = sum(len(combos) for _, combos in candidates)
+    done = 0
+    variants = []
+    for num_products, combos in candidates:
+        if variants and deadline.expired():
+            break
+        percentages, feasible = solve_combinations_lp(octanes, prices, caps, target_octane, combos, lower=min_share)
+        size_variants = [
+            blend_result(
+                [products_list[i] for i in combo], pcts,
+                octanes[combo], prices[combo], caps[combo], target_octane
+            )
+            for combo, pcts in zip(combos[feasible], percentages[feasible])
+        ]
+        variants.extend(size_variants)
+        done += len(combos)
+        if progress:
+            progress(done, total, size_variants)
+    return variants
+
+
+def _solve_combination_chunk(octanes, prices, caps, target_octane, combos, solver, min_share, seed, deadline=None,
+                             octane_model=None):
+    """
+    Worker jarayonida bir bo'lak kombinatsiyalarni baholash.
+    Kirish - oddiy massivlar va OctaneModel (Django modellari emas), natija -
+    ((product indekslari, foizlar) juftlari ro'yxati, bo'lak to'liq baholandimi).
+    Muddat har bir kombinatsiyadan oldin tekshiriladi: tugagan bo'lsa shu paytgacha
+    topilganlar darhol qaytariladi (muddatdan keyin boshlangan bo'lak - bo'sh natija).
+    """
+    deadline = Deadline.coerce(deadline)
+    if deadline.expired():
+        return [], False
+    if solver == 'milp':
+        percentages, feasible = solve_combinations_lp(octanes, prices, caps, target_octane, combos, lower=min_share)
+        return [(combo.tolist(), pcts.tolist()) for combo, pcts in zip(combos[feasible], percentages[feasible])], True
+
+    rng = np.random.default_rng(seed)
+    results = []
+    for index, combo in enumerate(combos):
+        if index and deadline.expired():
+            break
+        results.extend(_combination_ga_results(
+            combo, octanes, prices, caps, target_octane, rng, deadline,
+            octane_model=octane_model.subset(combo) if octane_model is not None else None
+        ))
+    return results, deadline.completed
+
+
+def _combination_ga_results(combo, octanes, prices, caps, target_octane, rng, deadline=None, octane_model=None,
+                            perf=None):
+    """
+    Bitta kombinatsiya uchun Genetic Algorithm (VectorizedGeneticAlgorithm, har bir GA_STRATEGIES
+    strategiyasi bitta yugurish) - ketma-ket rejimda ham, worker jarayonida ham aynan shu funksiya.
+    Natija - (product indekslari, foizlar) juftlari; narx/oktan bo'yicha takrorlar chiqariladi.
+    """
+    perf = PerfRecorder.coerce(perf)
+    with perf.phase('ga'):
+        ga = VectorizedGeneticAlgorithm(
+            list(combo), target_octane, caps[combo].tolist(), prices[combo].tolist(), octanes[combo].tolist(), rng=rng,
+            octane_model=octane_model
+        )
+        results = []
+        seen_keys = set()
+        for price_weight, mutation_rate in GA_STRATEGIES:
+            result = ga.find_optimal_blend(population_size=100, generations=50,
+                                           mutation_rate=mutation_rate, price_weight=price_weight, deadline=deadline)
+            if not result:
+                continue
+            key = (round(result['final_price'], 0), round(result['final_octane'], 0))
+            if key not in seen_keys:
+                seen_keys.add(key)
+                results.append((result['products'], result['percentages']))
+    perf.count('ga_runs', ga.runs)
+    perf.count('ga_generations', ga.generations)
+    perf.count('fitness_evaluations', ga.evaluations)
+    perf.count('ga_generations_saved', ga.generations_saved)
+    perf.count('fitness_evaluations_saved', ga.evaluations_saved)
+    return results
+
+
+def _combination_chunks(candidates):
+    """Kombinatsiyalar PARALLEL_CHUNK_SIZE o'lchamli bo'laklarga (har bir o'lcham alohida)"""
+    chunks = []
+    for num_products, combos in candidates:
+        chunks.extend(combos[start:start + PARALLEL_CHUNK_SIZE] for start in range(0, len(combos), PARALLEL_CHUNK_SIZE))
+    return chunks
+
+
+def _parallel_combination_variants(products_list, target_octane, candidates, solver, min_share, workers, seed,
+                                   deadline=None, progress=None, octane_model=None):
+    """
+    Kombinatsiyalarni bo'laklarga bo'lib, umumiy poolda baholash.
+    Natijalar bo'laklar tartibida birlashtiriladi (deterministik).
+    Muddat tugasa, navbatdagi bo'laklar bekor qilinadi; ishlayotganlari ham muddatni tekshiradi
+    va PARALLEL_GRACE_SECONDS ichida qisman natijalarini qaytaradi. Pool buzilgan bo'lsa
+    None - chaqiruvchi ketma-ket rejimga o'tadi.
+    """
+    deadline = Deadline.coerce(deadline)
+    octanes, prices, caps = blend_arrays(products_list)
+    chunks = _combination_chunks(candidates)
+    seeds = np.random.SeedSequence(seed).spawn(len(chunks))
+    pool = get_blend_pool(workers)
+    try:
+        futures = [
+            pool.submit(_solve_combination_chunk, octanes, prices, caps, target_octane, chunk, solver, min_share,
+                        chunk_seed, deadline, octane_model)
+            for chunk, chunk_seed in zip(chunks, seeds)
+        ]
+        # Bo'laklar tugashi bilan progress; natijalar keyin bo'laklar tartibida birlashtiriladi
+        chunk_sizes = {future: len(chunk) for future, chunk in zip(futures, chunks)}
+        total = sum(chunk_sizes.values())
+        combinations_done = 0
+        pending = set(futures)
+        while pending and not deadline.expired():
+            remaining = deadline.remaining()
+            finished, pending = wait(pending, timeout=None if remaining == float('inf') else remaining,
+                                     return_when=FIRST_COMPLETED)
+            for future in finished:
+                combinations_done += chunk_sizes[future]
+                if progress:
+                    progress(combinations_done, total,
+                             _chunk_variants(products_list, target_octane, future.result()[0], octane_model))
+        if pending:
+            # Navbatdagilar bekor qilinadi, ishlayotganlari qisman natijalarini qaytarishini kutamiz
+            pending = {future for future in pending if not future.cancel()}
+            finished, pending = wait(pending, timeout=PARALLEL_GRACE_SECONDS)
+            for future in finished:
+                combinations_done += chunk_sizes[future]
+                if progress:
+                    progress(combinations_done, total,
+                             _chunk_variants(products_list, target_octane, future.result()[0], octane_model))
+            pending |= {future for future in futures if future.cancelled()}
+        chunk_results = []
+        for future in futures:
+            if future in pending:
+                continue
+            results, completed = future.result()
+            chunk_results.append(results)
+            if not completed:
+                deadline.expire()
+        if pending:
+            deadline.expire()
+    except BrokenProcessPool as e:
+        logger.error(f"Parallel optimizatsiya pooli buzildi, ketma-ket rejimga o'tiladi: {str(e)}")
+        shutdown_blend_pool()
+        return None
+
+    variants = []
+    for results in chunk_results:
+        variants.extend(_chunk_variants(products_list, target_octane, results, octane_model))
+    return variants
+
+
+def _chunk_variants(products_list, target_octane, results, octane_model=None):
+    """
+    Worker natijalari ((indekslar, foizlar) juftlari) -> variantlar.
+    octane_model - products_list uchun OctaneModel: final_octane model bo'yicha
+    """
+    octanes, prices, caps = blend_arrays(products_list)
+    variants = []
+    for indices, percentages in results:
+        indices = np.asarray(indices, dtype=np.intp)
+        variant = blend_result(
+            [products_list[i] for i in indices], np.asarray(percentages),
+            octanes[indices], prices[indices], caps[indices], target_octane
+        )
+        if octane_model is not None:
+            final_octane = float(octane_model.subset(indices).octane(percentages))
+            variant.update({'final_octane': round(final_octane, 2), 'octane_diff': abs(final_octane - target_octane)})
+        variants.append(variant)
+    return variants
+
+
+# Gradient descent byudjeti: tasodifiy qayta ishga tushirishlar x iteratsiyalar
+GD_RESTARTS = 200
+GD_ITERATIONS = 1000
+
+
+def solve_optimal_blend(products, target_octane, deadline=None, rng=None, perf=None,
+                        stall_iterations=GD_STALL_ITERATIONS, restart_agreement=GD_RESTART_AGREEMENT):
     """
     Optimal foizlarni topadi - gradient descent bilan
+    deadline - Deadline yoki millisekundlar: muddat tugasa shu paytgacha eng yaxshi natija
+    rng - random.Random, numpy Generator yoki seed (None - yangi tasodifiy oqim)
+    stall_iterations - |oktan xatosi| shuncha iteratsiya davomida yaxshilanmasa start to'xtatiladi;
+    restart_agreement - shuncha start natijasi (oktan farqi) eng yaxshisi bilan mos kelsa qolgan
+    startlar o'tkazib yuboriladi (None - o'chirilgan)
+    perf - PerfRecorder: gd_restarts, gd_iterations va tejalganlari (gd_iterations_saved)
     """
     if len(products) < 3:
         return None
@@ -106,33 +480,48 @@ def solve_optimal_blend(products, target_octane):
     prices = [float(p.price_per_liter) for p in products]
     gost_limits = [float(p.gost_percentage or 100) for p in products]
     
-    min_oct = min(octanes)
-    max_oct = max(octanes)
-    
-    # Agar maqsad diapazondan tashqarida bo'lsa, maksimal/minimal kombinatsiyani qaytaramiz
+    # Agar maqsad GOST cheklovlari bilan erishiladigan diapazondan tashqarida bo'lsa,
+    # maksimal/minimal kombinatsiyani qaytaramiz (aniq, bir zumda)
+    bounds = octane_bounds(octanes, prices, gost_limits)
+    min_oct, max_oct = bounds if bounds else (min(octanes), max(octanes))
     if target_octane > max_oct:
-        return solve_maximum_octane(products, octanes, prices, gost_limits)
+        return solve_maximum_octane(products, octanes, prices, gost_limits, target_octane)
     elif target_octane < min_oct:
-        return solve_minimum_octane(products, octanes, prices, gost_limits)
+        return solve_minimum_octane(products, octanes, prices, gost_limits, target_octane)
+    rng = rng if isinstance(rng, random.Random) else python_random(rng)
     
     # Optimal kombinatsiyani topish - yaxshilangan algoritm
     best_result = None
     best_diff = float('inf')
     
+    deadline = Deadline.coerce(deadline)
+    perf = PerfRecorder.coerce(perf)
+    consensus = RestartConsensus(restart_agreement, GD_RESTART_TOLERANCE)
+    restarts = iterations = saved = 0
+    
     # Bir nechta random start bilan
-    for trial in range(200):
-        percentages = initialize_percentages(len(products), gost_limits, octanes, target_octane)
+    for trial in range(GD_RESTARTS):
+        if best_result and deadline.expired():
+            break
+        restarts += 1
+        percentages = initialize_percentages(len(products), gost_limits, octanes, target_octane, rng=rng)
+        stall = StallMonitor(stall_iterations, GD_STALL_TOLERANCE)
         
         # Iterativ optimization
-        for iteration in range(1000):
+        for iteration in range(GD_ITERATIONS):
+            iterations += 1
             current_octane = sum(octanes[i] * percentages[i] / 100.0 for i in range(len(products)))
             error = target_octane - current_octane
             
             if abs(error) < 0.01:
                 break
+            # Yaqinlashdi - xato endi kamaymayapti
+            if stall.update(abs(error)):
+                saved += GD_ITERATIONS - iteration - 1
+                break
             
             # Kuchliroq o'zgarishlar
-            adjust_percentages_improved(percentages, octanes, gost_limits, error, target_octane)
+            adjust_percentages_improved(percentages, octanes, gost_limits, error, target_octane, rng=rng)
             
             # Normalizatsiya
             normalize_percentages(percentages, gost_limits)
@@ -156,12 +545,21 @@ def solve_optimal_blend(products, target_octane):
             
             if octane_diff < 0.05:
                 break
+        
+        # Startlar bir xil natijaga yaqinlashmoqda - qolganlari o'tkazib yuboriladi
+        if consensus.update(octane_diff):
+            saved += (GD_RESTARTS - trial - 1) * GD_ITERATIONS
+            break
     
+    perf.count('gd_restarts', restarts)
+    perf.count('gd_iterations', iterations)
+    perf.count('gd_iterations_saved', saved)
     return best_result
 
 
-def initialize_percentages(n, gost_limits, octanes, target_octane):
-    """Maqsad oktan soniga mos keladigan initial foizlar"""
+def initialize_percentages(n, gost_limits, octanes, target_octane, rng=None):
+    """Maqsad oktan soniga mos keladigan initial foizlar (rng - random.Random)"""
+    rng = rng or random.Random()
     percentages = [0.0] * n
     
     # Maqsad oktan soniga yaqin productlarga ko'proq foiz
@@ -185,7 +583,7 @@ def initialize_percentages(n, gost_limits, octanes, target_octane):
     remaining = 100.0
     for i in range(n - 1):
         max_pct = min(gost_limits[i], remaining, weights[i] * 1.5)
-        pct = random.uniform(max_pct * 0.5, max_pct)
+        pct = rng.uniform(max_pct * 0.5, max_pct)
         percentages[i] = pct
         remaining -= pct
     
@@ -200,13 +598,14 @@ def initialize_percentages(n, gost_limits, octanes, target_octane):
     return percentages
 
 
-def adjust_percentages(percentages, octanes, gost_limits, error):
+def adjust_percentages(percentages, octanes, gost_limits, error, rng=None):
     """Gradient direction bo'yicha foizlarni o'zgartiradi"""
-    adjust_percentages_improved(percentages, octanes, gost_limits, error, None)
+    adjust_percentages_improved(percentages, octanes, gost_limits, error, None, rng=rng)
 
 
-def adjust_percentages_improved(percentages, octanes, gost_limits, error, target_octane):
-    """Yaxshilangan gradient direction - kuchliroq o'zgarishlar"""
+def adjust_percentages_improved(percentages, octanes, gost_limits, error, target_octane, rng=None):
+    """Yaxshilangan gradient direction - kuchliroq o'zgarishlar (rng - random.Random)"""
+    rng = rng or random.Random()
     n = len(percentages)
     current_octane = sum(octanes[i] * percentages[i] / 100.0 for i in range(n))
     
@@ -225,7 +624,7 @@ def adjust_percentages_improved(percentages, octanes, gost_limits, error, target
                     10.0
                 )
                 if max_delta > 0.01:
-                    delta = random.uniform(0.1, max_delta)
+                    delta = rng.uniform(0.1, max_delta)
                     percentages[hi] += delta
                     
                     # Past oktanli productdan ayirish
@@ -246,7 +645,7 @@ def adjust_percentages_improved(percentages, octanes, gost_limits, error, target
                     10.0
                 )
                 if max_delta > 0.01:
-                    delta = random.uniform(0.1, max_delta)
+                    delta = rng.uniform(0.1, max_delta)
                     percentages[li] += delta
                     
                     for hi in sorted(high_octane_indices, key=lambda i: -octanes[i]):
@@ -256,128 +655,49 @@ def adjust_percentages_improved(percentages, octanes, gost_limits, error, target
 
 
 def normalize_percentages(percentages, gost_limits):
-    """Foizlarni normalizatsiya qiladi va GOST cheklovlarini tekshiradi"""
-    # Normalizatsiya
-    total = sum(percentages)
-    if abs(total - 100.0) > 0.01:
-        factor = 100.0 / total
-        percentages = [p * factor for p in percentages]
-    
-    # GOST cheklovlarini tekshirish
-    for i in range(len(percentages)):
-        if percentages[i] > gost_limits[i]:
-            excess = percentages[i] - gost_limits[i]
-            percentages[i] = gost_limits[i]
-            # Boshqa productlarga taqsimlash
-            for j in range(len(percentages)):
-                if j != i and percentages[j] < gost_limits[j]:
-                    add = min(excess, gost_limits[j] - percentages[j])
-                    percentages[j] += add
-                    excess -= add
-                    if excess <= 0:
-                        break
-    
-    # Qayta normalizatsiya
-    total = sum(percentages)
-    if abs(total - 100.0) > 0.01:
-        factor = 100.0 / total
-        percentages = [p * factor for p in percentages]
+    """
+    Foizlarni normalizatsiya qiladi va GOST cheklovlarini ta'minlaydi
+    (cheklovli simpleksga aniq proyeksiya). Ro'yxat joyida o'zgartiriladi.
+    """
+    percentages[:] = project_to_capped_simplex(percentages, gost_limits).tolist()
 
 
-def solve_maximum_octane(products, octanes, prices, gost_limits):
-    """Maksimal oktan kombinatsiyasi"""
-    n = len(products)
-    best_result = None
-    best_octane = 0
-    
-    # Eng yuqori oktanli productlarni ko'proq ishlatish
-    for _ in range(200):
-        percentages = [0.0] * n
-        
-        # Oktanlarni tartiblash (yuqoridan pastga)
-        sorted_indices = sorted(range(n), key=lambda i: -octanes[i])
-        
-        remaining = 100.0
-        for idx in sorted_indices:
-            ratio = octanes[idx] / max(octanes)
-            max_pct = min(gost_limits[idx], remaining, ratio * 60.0)
-            pct = random.uniform(max_pct * 0.5, max_pct)
-            percentages[idx] = min(pct, remaining)
-            remaining -= percentages[idx]
-            if remaining <= 0:
-                break
-        
-        if remaining > 0:
-            best_idx = max(range(n), key=lambda i: octanes[i])
-            percentages[best_idx] = min(percentages[best_idx] + remaining, gost_limits[best_idx])
-        
-        total = sum(percentages)
-        if abs(total - 100.0) > 0.01:
-            factor = 100.0 / total
-            percentages = [p * factor for p in percentages]
-        
-        final_octane = sum(octanes[i] * percentages[i] / 100.0 for i in range(n))
-        final_price = sum(prices[i] * percentages[i] / 100.0 for i in range(n))
-        
-        if final_octane > best_octane:
-            best_result = {
-                'products': products,
-                'percentages': [round(p, 2) for p in percentages],
-                'final_octane': round(final_octane, 2),
-                'final_price': round(final_price, 2),
-                'octane_diff': abs(final_octane - 100.0),
-                'gost_compliant': all(percentages[i] <= gost_limits[i] + 0.01 for i in range(n))
-            }
-            best_octane = final_octane
-    
-    return best_result
+def solve_maximum_octane(products, octanes, prices, gost_limits, target_octane=None, octane_model=None):
+    """
+    Maksimal oktan kombinatsiyasi - aniq ochko'z yechim (extreme_octane_blend), tenglarida eng arzoni.
+    Natijada 'octane_bounds' - erishiladigan oktan diapazoni; octane_diff - target_octane gacha.
+    octane_model - OctaneModel: sostav, oktan va diapazon shu model bo'yicha (model_extreme_blend)
+    """
+    return _extreme_octane_result(products, octanes, prices, gost_limits, target_octane, True, octane_model)
 
 
-def solve_minimum_octane(products, octanes, prices, gost_limits):
-    """Minimal oktan kombinatsiyasi"""
-    n = len(products)
-    best_result = None
-    best_octane = float('inf')
-    
-    for _ in range(200):
-        percentages = [0.0] * n
-        sorted_indices = sorted(range(n), key=lambda i: octanes[i])
-        
-        remaining = 100.0
-        for idx in sorted_indices:
-            if max(octanes) > min(octanes):
-                ratio = (max(octanes) - octanes[idx]) / (max(octanes) - min(octanes))
-            else:
-                ratio = 1.0
-            max_pct = min(gost_limits[idx], remaining, ratio * 60.0)
-            pct = random.uniform(max_pct * 0.5, max_pct)
-            percentages[idx] = min(pct, remaining)
-            remaining -= percentages[idx]
-            if remaining <= 0:
-                break
-        
-        if remaining > 0:
-            best_idx = min(range(n), key=lambda i: octanes[i])
-            percentages[best_idx] = min(percentages[best_idx] + remaining, gost_limits[best_idx])
-        
-        total = sum(percentages)
-        if abs(total - 100.0) > 0.01:
-            factor = 100.0 / total
-            percentages = [p * factor for p in percentages]
-        
-        final_octane = sum(octanes[i] * percentages[i] / 100.0 for i in range(n))
-        final_price = sum(prices[i] * percentages[i] / 100.0 for i in range(n))
-        
-        if final_octane < best_octane:
-            best_result = {
-                'products': products,
-                'percentages': [round(p, 2) for p in percentages],
-                'final_octane': round(final_octane, 2),
-                'final_price': round(final_price, 2),
-                'octane_diff': abs(final_octane - 0.0),
-                'gost_compliant': all(percentages[i] <= gost_limits[i] + 0.01 for i in range(n))
-            }
-            best_octane = final_octane
-    
-    return best_result
+def solve_minimum_octane(products, octanes, prices, gost_limits, target_octane=None, octane_model=None):
+    """Minimal oktan kombinatsiyasi - solve_maximum_octane bilan bir xil, teskari tartibda"""
+    return _extreme_octane_result(products, octanes, prices, gost_limits, target_octane, False, octane_model)
+
+
+def _extreme_octane_result(products, octanes, prices, gost_limits, target_octane, maximize, octane_model=None):
+    octanes = np.asarray(octanes, dtype=float)
+    prices = np.asarray(prices, dtype=float)
+    caps = np.asarray(gost_limits, dtype=float)
+    if octane_model is None:
+        percentages = extreme_octane_blend(octanes, prices, caps, maximize=maximize)
+    else:
+        percentages = model_extreme_blend(octane_model, prices, caps, maximize=maximize)
+    if not percentages.sum() > 0:
+        return None
+    # Σ GOST < 100: 100% gacha cho'ziladi (natija GOST ga mos emas, gost_compliant = False)
+    percentages = percentages * 100.0 / percentages.sum()
+    if octane_model is None:
+        final_octane = float(percentages @ octanes) / 100.0
+        bounds = octane_bounds(octanes, prices, caps)
+    else:
+        final_octane = float(octane_model.octane(percentages))
+        bounds = model_octane_bounds(octane_model, prices, caps)
+    target_octane = final_octane if target_octane is None else target_octane
+    result = blend_result(products, percentages, octanes, prices, caps, target_octane)
+    # blend_result oktanni chiziqli hisoblaydi - model bo'yicha qayta yoziladi
+    result.update({'final_octane': round(final_octane, 2), 'octane_diff': abs(final_octane - target_octane)})
+    result['octane_bounds'] = {'min': round(bounds[0], 2), 'max': round(bounds[1], 2)} if bounds else None
+    return result
 
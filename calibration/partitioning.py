@@ -0,0 +1,161 @@
+"""
+Партиционирование таблиц расчетов по месяцам (PostgreSQL, RANGE по timestamp).
+Используется миграцией 0012 и командой manage_partitions.
+"""
+import gzip
+import os
+from datetime import datetime, timezone as dt_timezone
+
+from .models import (
+    TransferCalculation,
+    VolumeWeightCalculation,
+    AddingCalculation,
+    DensityTemperatureCalculation,
+)
+
+# Тип расчета в журнале -> модель с партиционированной таблицей
+PARTITIONED_MODELS = {
+    'transfer': TransferCalculation,
+    'volume_weight': VolumeWeightCalculation,
+    'adding': AddingCalculation,
+    'density': DensityTemperatureCalculation,
+}
+
+
+def month_start(value):
+    """Начало месяца (UTC) для даты/времени"""
+    return datetime(value.year, value.month, 1, tzinfo=dt_timezone.utc)
+
+
+def add_months(value, months):
+    """Сдвиг начала месяца на months месяцев"""
+    month_index = value.year * 12 + value.month - 1 + months
+    return datetime(month_index // 12, month_index % 12 + 1, 1, tzinfo=dt_timezone.utc)
+
+
+def partition_name(table, start):
+    return f"{table}_p{start:%Y%m}"
+
+
+def default_partition_name(table):
+    return f"{table}_default"
+
+
+def is_partitioned(cursor, table):
+    cursor.execute("SELECT 1 FROM pg_partitioned_table WHERE partrelid = %s::regclass", [table])
+    return cursor.fetchone() is not None
+
+
+def list_partitions(cursor, table):
+    """Месячные партиции таблицы: список (имя, начало месяца), по возрастанию"""
+    cursor.execute(
+        """
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE parent.relname = %s
+        """,
+        [table]
+    )
+    prefix = f"{table}_p"
+    partitions = []
+    for (name,) in cursor.fetchall():
+        if name.startswith(prefix):
+            suffix = name[len(prefix):]
+            partitions.append((name, datetime(int(suffix[:4]), int(suffix[4:6]), 1, tzinfo=dt_timezone.utc)))
+    return sorted(partitions, key=lambda item: item[1])
+
+
+def create_month_partition(cursor, table, start):
+    """
+    Создать партицию месяца, если ее еще нет.
+    Строки этого месяца, уже попавшие в DEFAULT-партицию, переносятся в новую.
+    Возвращает True, если партиция создана.
+    """
+    name = partition_name(table, start)
+    cursor.execute("SELECT to_regclass(%s)", [name])
+    if cursor.fetchone()[0] is not None:
+        return False
+
+    end = add_months(start, 1)
+    default = default_partition_name(table)
+    cursor.execute(f'CREATE TABLE "{name}" (LIKE "{table}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+    cursor.execute(
+        f'WITH moved AS (DELETE FROM "{default}" WHERE "timestamp" >= %s AND "timestamp" < %s RETURNING *) '
+        f'INSERT INTO "{name}" SELECT * FROM moved',
+        [start, end]
+    )
+    cursor.execute(
+        f'ALTER TABLE "{table}" ATTACH PARTITION "{name}" FOR VALUES FROM (%s) TO (%s)',
+        [start, end]
+    )
+    return True
+
+
+def archive_partition(cursor, table, name, archive_dir):
+    """
+    Отсоединить партицию, выгрузить ее в сжатый CSV и удалить таблицу.
+    Возвращает путь к архиву.
+    """
+    os.makedirs(archive_dir, exist_ok=True)
+    path = os.path.join(archive_dir, f"{name}.csv.gz")
+
+    cursor.execute(f'ALTER TABLE "{table}" DETACH PARTITION "{name}"')
+    with gzip.open(path, 'wb') as archive:
+        # COPY идет потоком через драйвер psycopg2, без загрузки строк в память
+        cursor.cursor.copy_expert(f'COPY "{name}" TO STDOUT WITH (FORMAT csv, HEADER true)', archive)
+    cursor.execute(f'DROP TABLE "{name}"')
+    return path
+
+
+def convert_to_partitioned(cursor, table, first_month, last_month):
+    """
+    Пересоздать обычную таблицу как партиционированную по месяцам timestamp.
+    Первичный ключ становится (id, timestamp) - ключ партиционирования обязан
+    входить в уникальные ограничения. Индексы и внешние ключи переносятся.
+    """
+    old = f"{table}_unpartitioned"
+    # Имя отличается от {table}_id_seq: та последовательность принадлежит
+    # старой таблице и удаляется вместе с ней
+    sequence = f"{table}_part_id_seq"
+
+    cursor.execute(
+        "SELECT indexdef FROM pg_indexes WHERE tablename = %s AND indexname <> %s",
+        [table, f"{table}_pkey"]
+    )
+    index_definitions = [row[0] for row in cursor.fetchall()]
+    cursor.execute(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'f'",
+        [table]
+    )
+    foreign_keys = cursor.fetchall()
+
+    cursor.execute(f'ALTER TABLE "{table}" RENAME TO "{old}"')
+    cursor.execute(
+        f'CREATE TABLE "{table}" (LIKE "{old}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS) '
+        f'PARTITION BY RANGE ("timestamp")'
+    )
+    cursor.execute(f'ALTER TABLE "{table}" ADD PRIMARY KEY (id, "timestamp")')
+
+    # Автоинкремент id: отдельная последовательность (IDENTITY недоступен
+    # для партиционированных таблиц до PostgreSQL 17)
+    cursor.execute(f'CREATE SEQUENCE "{sequence}" OWNED BY "{table}".id')
+    cursor.execute(f'ALTER TABLE "{table}" ALTER COLUMN id SET DEFAULT nextval(\'"{sequence}"\')')
+
+    cursor.execute(f'CREATE TABLE "{default_partition_name(table)}" PARTITION OF "{table}" DEFAULT')
+    month = first_month
+    while month <= last_month:
+        create_month_partition(cursor, table, month)
+        month = add_months(month, 1)
+
+    cursor.execute(f'INSERT INTO "{table}" SELECT * FROM "{old}"')
+    cursor.execute(f'DROP TABLE "{old}" CASCADE')
+
+    # Определения индексов получены до переименования и ссылаются на новое имя
+    for definition in index_definitions:
+        cursor.execute(definition)
+    for name, definition in foreign_keys:
+        cursor.execute(f'ALTER TABLE "{table}" ADD CONSTRAINT "{name}" {definition}')
+
+    cursor.execute(f'SELECT setval(\'"{sequence}"\', COALESCE((SELECT MAX(id) FROM "{table}"), 0) + 1, false)')
@@ -0,0 +1,88 @@
+"""
+Optimizator instrumentatsiyasi - bosqichlar vaqti va hisoblagichlar
+PerfRecorder so'rov davomida optimizatorlarga uzatiladi (deadline kabi): bosqichlar
+vaqti (ms, takroriy bosqichlar qo'shiladi) va hisoblagichlar (fitness baholashlari,
+avlodlar, kombinatsiyalar, kesh) to'planadi. Natija javobdagi ixtiyoriy '_perf'
+blokiga va bitta qatorli JSON log yozuviga chiqariladi.
+"""
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+
+
+class PerfRecorder:
+    """
+    Bosqichlar: with perf.phase('ga'): ...  Hisoblagichlar: perf.count('fitness_evaluations', n).
+    Oqimlar uchun xavfsiz (parallel kombinatsiyalar va fon vazifalari).
+    """
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.phases = {}
+        self.phase_calls = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def coerce(cls, perf):
+        """None yoki PerfRecorder -> PerfRecorder (None bo'lsa natija hech qayerga chiqmaydi)"""
+        return perf if perf is not None else cls()
+
+    @contextmanager
+    def phase(self, name):
+        started = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.add_time(name, time.perf_counter() - started)
+
+    def add_time(self, name, seconds):
+        with self._lock:
+            self.phases[name] = self.phases.get(name, 0.0) + seconds * 1000.0
+            self.phase_calls[name] = self.phase_calls.get(name, 0) + 1
+
+    def count(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def update(self, counters):
+        """Hisoblagichlarni lug'atdan qo'shish (masalan, kombinatsiyalarni qisqartirish statistikasi)"""
+        for name, value in counters.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                self.count(name, value)
+
+    def elapsed_ms(self):
+        return round((time.perf_counter() - self.started_at) * 1000.0, 2)
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                'total_ms': self.elapsed_ms(),
+                'phases_ms': {name: round(ms, 2) for name, ms in self.phases.items()},
+                'phase_calls': dict(self.phase_calls),
+                'counters': dict(self.counters),
+            }
+
+    def log(self, logger, event, level=logging.INFO, **fields):
+        """Strukturaviy log: bitta qatorda JSON (event, kiritish parametrlari va metrikalar)"""
+        payload = {'event': event, **fields, **self.as_dict()}
+        logger.log(level, f"{event} {json.dumps(payload, cls=DjangoJSONEncoder, sort_keys=True)}", extra={'perf': payload})
+
+
+def perf_json_response(payload, perf, include_perf=False):
+    """
+    JsonResponse o'rniga: serializatsiya vaqti 'serialization' bosqichi sifatida o'lchanadi.
+    include_perf=True - '_perf' bloki oxirida qo'shiladi (serializatsiya vaqti ham kiradi,
+    asosiy javob ikki marta serializatsiya qilinmaydi).
+    """
+    with perf.phase('serialization'):
+        body = json.dumps(payload, cls=DjangoJSONEncoder)
+    if include_perf:
+        separator = ', ' if payload else ''
+        body = f'{body[:-1]}{separator}"_perf": {json.dumps(perf.as_dict())}}}'
+    return HttpResponse(body, content_type='application/json')
@@ -0,0 +1,46 @@
+"""
+GOST cheklovli simpleksga aniq proyeksiya
+{p : Σ p_i = jami, 0 <= p_i <= GOST_i} to'plamiga Evklid proyeksiyasi.
+
+Proyeksiya p_i = clip(y_i - τ, 0, GOST_i) ko'rinishida. f(τ) = Σ p_i bo'lakli-chiziqli
+va o'smaydigan, sinish nuqtalari y_i - GOST_i va y_i. Nuqtalar saralanadi (O(n log n)),
+f(τ) = jami tenglamasi tegishli oraliqda chiziqli interpolatsiya bilan aniq yechiladi.
+Butun aholi (pop, n) uchun vektorlashtirilgan.
+"""
+import numpy as np
+
+
+def project_to_capped_simplex(values, caps, total=100.0):
+    """
+    values - (n,) yoki (pop, n) massiv, caps - (n,) GOST cheklovlari.
+    Natija shu shakldagi massiv: har bir qator jami total, 0 <= p <= caps.
+    Agar Σ caps < total bo'lsa, yechim yo'q - barcha productlar GOST chegarasida qaytariladi.
+    """
+    values = np.asarray(values, dtype=float)
+    single = values.ndim == 1
+    y = np.atleast_2d(values)
+    caps = np.broadcast_to(np.asarray(caps, dtype=float), y.shape)
+
+    # Sinish nuqtalari saralangan tartibda: y_i - GOST_i dan keyin product "erkin"
+    # (f qiyaligi -1), y_i dan keyin nolga teng (qiyalik yana 0)
+    breakpoints = np.concatenate([y - caps, y], axis=1)
+    events = np.concatenate([np.ones_like(y), -np.ones_like(y)], axis=1)
+    order = np.argsort(breakpoints, axis=1)
+    breakpoints = np.take_along_axis(breakpoints, order, axis=1)
+    free_count = np.cumsum(np.take_along_axis(events, order, axis=1), axis=1)
+
+    # f sinish nuqtalarida: f(b_0) = Σ GOST, har bir oraliqda qiyalik = -erkin productlar soni
+    steps = np.diff(breakpoints, axis=1) * free_count[:, :-1]
+    sums = caps.sum(axis=1, keepdims=True) - np.concatenate([np.zeros((len(y), 1)), np.cumsum(steps, axis=1)], axis=1)
+
+    # Birinchi f(b_k) <= total nuqta va undan oldingi oraliqda chiziqli interpolatsiya
+    k = np.maximum(np.argmax(sums <= total, axis=1), 1)
+    rows = np.arange(len(y))
+    slope = free_count[rows, k - 1]
+    tau = breakpoints[rows, k - 1] + (sums[rows, k - 1] - total) / np.maximum(slope, 1)
+
+    result = np.clip(y - tau[:, None], 0.0, caps)
+    infeasible = caps.sum(axis=1) < total
+    if infeasible.any():
+        result[infeasible] = caps[infeasible]
+    return result[0] if single else result
@@ -0,0 +1,130 @@
+"""
+Kombinatsiyalarni qidiruvdan oldin qisqartirish (pruning)
+- dominatsiya: product j ni product i dominatsiya qiladi, agar i arzonroq yoki teng narxli,
+  oktani yuqori yoki teng va GOST cheklovi katta yoki teng bo'lsa (kamida bittasi qat'iy);
+- oktan bo'yicha bajarilishi: GOST cheklovlari bilan erishiladigan maksimal oktan
+  maqsaddan past bo'lgan kombinatsiyalar yechimga ega emas.
+"""
+from itertools import combinations
+from math import comb
+
+import numpy as np
+
+
+def dominance_matrix(octanes, prices, caps):
+    """D[i, j] = True - product i product j ni dominatsiya qiladi"""
+    not_worse = (
+        (prices[:, None] <= prices[None, :])
+        & (octanes[:, None] >= octanes[None, :])
+        & (caps[:, None] >= caps[None, :])
+    )
+    strictly_better = (
+        (prices[:, None] < prices[None, :])
+        | (octanes[:, None] > octanes[None, :])
+        | (caps[:, None] > caps[None, :])
+    )
+    return not_worse & strictly_better
+
+
+def octane_bounds(octanes, caps, lower=0.0, total=100.0):
+    """
+    Kombinatsiyalar uchun erishiladigan (min, max) oktan soni.
+    octanes, caps - (m, k) massivlar; har bir product kamida lower foiz oladi,
+    qolgan ulush GOST cheklovlari doirasida eng yuqori (eng past) oktanli productlarga
+    ketma-ket beriladi (aniq, chunki masala bitta tenglama bilan chiziqli).
+    Yechimi yo'q qatorlar uchun (nan, nan).
+    """
+    octanes = np.atleast_2d(octanes)
+    caps = np.atleast_2d(caps)
+    k = octanes.shape[1]
+    room = caps - lower
+    remaining = total - k * lower
+    feasible = np.all(room >= 0, axis=1) & (remaining >= 0) & (caps.sum(axis=1) >= total)
+
+    bounds = []
+    for descending in (False, True):
+        order = np.argsort(-octanes if descending else octanes, axis=1, kind='stable')
+        sorted_octanes = np.take_along_axis(octanes, order, axis=1)
+        sorted_room = np.clip(np.take_along_axis(room, order, axis=1), 0.0, None)
+        filled_before = np.cumsum(sorted_room, axis=1) - sorted_room
+        share = np.clip(remaining - filled_before, 0.0, sorted_room)
+        octane = (lower * octanes.sum(axis=1) + (share * sorted_octanes).sum(axis=1)) / total
+        bounds.append(np.where(feasible, octane, np.nan))
+    return bounds[0], bounds[1]
+
+
+def prune_combinations(octanes, prices, caps, target_octane, max_products, min_size=3, lower=0.0, stats=None):
+    """
+    Qidirish kerak bo'lgan kombinatsiyalar: [(k, (m, k) indekslar massivi), ...].
+    1. Kamida max_products ta dominatori bor productlar butunlay chiqariladi -
+       har qanday kombinatsiyada ulardan biri tashqarida qoladi.
+    2. Tarkibidagi product kombinatsiyadan tashqaridagi product tomonidan dominatsiya
+       qilinsa, kombinatsiya chiqariladi: almashtirish narxni oshirmaydi va yechimni saqlaydi.
+    3. Maksimal erishiladigan oktan maqsaddan past bo'lsa, kombinatsiya chiqariladi.
+    stats (dict) - qisqartirish statistikasi bilan to'ldiriladi.
+    """
+    n = len(octanes)
+    dominance = dominance_matrix(octanes, prices, caps)
+    kept = np.flatnonzero(dominance.sum(axis=0) < max_products)
+    dominance = dominance[np.ix_(kept, kept)]
+
+    sizes = range(min_size, min(max_products, n) + 1)
+    counts = {
+        'products_total': n,
+        'products_pruned': n - len(kept),
+        'combinations_total': sum(comb(n, k) for k in sizes),
+        'combinations_pruned_products': 0,
+        'combinations_pruned_dominated': 0,
+        'combinations_pruned_infeasible': 0,
+        'combinations_evaluated': 0,
+    }
+    counts['combinations_pruned_products'] = counts['combinations_total'] - sum(comb(len(kept), k) for k in sizes)
+
+    result = []
+    for k in sizes:
+        if k > len(kept):
+            break
+        local = np.array(list(combinations(range(len(kept)), k)), dtype=np.intp)
+        members = np.zeros((len(local), len(kept)), dtype=bool)
+        members[np.arange(len(local))[:, None], local] = True
+
+        # Kombinatsiyadan tashqaridagi dominatorlar soni - har bir product uchun
+        outside_dominators = (~members).astype(np.int32) @ dominance.astype(np.int32)
+        dominated = np.any(np.take_along_axis(outside_dominators, local, axis=1) > 0, axis=1)
+
+        combos = kept[local]
+        _, max_octane = octane_bounds(octanes[combos], caps[combos], lower=lower)
+        infeasible = ~dominated & ~(max_octane >= target_octane - 1e-9)
+
+        counts['combinations_pruned_dominated'] += int(dominated.sum())
+        counts['combinations_pruned_infeasible'] += int(infeasible.sum())
+        survivors = combos[~dominated & ~infeasible]
+        counts['combinations_evaluated'] += len(survivors)
+        if len(survivors):
+            result.append((k, survivors))
+
+    if stats is not None:
+        stats.update(counts)
+    return result
+
+
+def all_combinations(n, max_products, min_size=3, stats=None):
+    """
+    Qisqartirishsiz barcha kombinatsiyalar (prune_combinations bilan bir xil formatda).
+    Dominatsiya va oktan chegaralari chiziqli aralashtirishga tayanadi - o'zaro ta'sirli
+    ('research') oktan modelida ular to'g'ri emas.
+    """
+    sizes = range(min_size, min(max_products, n) + 1)
+    result = [(k, np.array(list(combinations(range(n), k)), dtype=np.intp)) for k in sizes]
+    total = sum(len(combos) for _, combos in result)
+    if stats is not None:
+        stats.update({
+            'products_total': n,
+            'products_pruned': 0,
+            'combinations_total': total,
+            'combinations_pruned_products': 0,
+            'combinations_pruned_dominated': 0,
+            'combinations_pruned_infeasible': 0,
+            'combinations_evaluated': total,
+        })
+    return result
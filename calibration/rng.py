@@ -0,0 +1,35 @@
+"""
+Optimizatorlar uchun tasodifiy sonlar manbalari
+Global random holati ishlatilmaydi: har bir so'rov o'z seed'iga ega, undan numpy Generator
+(vektorlashtirilgan GA, process pool bo'laklari) va random.Random (ro'yxatli algoritmlar)
+yaratiladi. Parallel so'rovlar bir-birining holatini buzmaydi, seed javobda qaytariladi -
+sekin yoki noodatiy holat aynan qayta ishga tushiriladi.
+"""
+import random
+
+import numpy as np
+
+# Seed oralig'i: JSON va JavaScript son turiga aniq sig'adi
+MAX_SEED = 2 ** 53 - 1
+
+
+def request_seed(value=None):
+    """So'rov seed'i: berilgan qiymat (0..MAX_SEED) yoki yangi tasodifiy seed. Noto'g'ri bo'lsa ValueError"""
+    if value is None or value == '':
+        return int(np.random.SeedSequence().entropy % (MAX_SEED + 1))
+    try:
+        seed = int(value)
+    except (ValueError, TypeError):
+        raise ValueError('Неверный seed')
+    if not 0 <= seed <= MAX_SEED:
+        raise ValueError('Неверный seed')
+    return seed
+
+
+def python_random(rng=None):
+    """
+    numpy Generator (yoki seed / None) dan mustaqil random.Random -
+    bitta seed'dan ikkala turdagi algoritmlar uchun takrorlanadigan oqim
+    """
+    rng = np.random.default_rng(rng)
+    return random.Random(int(rng.integers(2 ** 63)))
@@ -0,0 +1,50 @@
+"""
+Синхронизация журнала расчетов с таблицами расчетов
+"""
+from django.db.models.signals import post_delete, post_save
+
+from .blend_cache import get_blend_cache
+from .history import HISTORY_SOURCES, calculation_type_for, record_calculation
+from .models import CalculationJournal, OctaneInteraction, Product
+
+
+def _journal_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        # loaddata: журнал заполняется отдельно
+        return
+    record_calculation(instance)
+
+
+def _journal_on_delete(sender, instance, **kwargs):
+    CalculationJournal.objects.filter(
+        calculation_type=calculation_type_for(sender),
+        source_id=instance.pk
+    ).delete()
+
+
+for _model, _, _ in HISTORY_SOURCES.values():
+    post_save.connect(_journal_on_save, sender=_model, dispatch_uid=f'journal_save_{_model.__name__}')
+    post_delete.connect(_journal_on_delete, sender=_model, dispatch_uid=f'journal_delete_{_model.__name__}')
+
+
+def _blend_cache_on_product_change(sender, instance, **kwargs):
+    # Oktan/narx/GOST o'zgargan product bilan hisoblangan aralashma natijalari eskiradi
+    version = instance.updated_at.isoformat() if getattr(instance, 'updated_at', None) else None
+    get_blend_cache().invalidate_product(instance.pk, version)
+
+
+post_save.connect(_blend_cache_on_product_change, sender=Product, dispatch_uid='blend_cache_product_save')
+post_delete.connect(_blend_cache_on_product_change, sender=Product, dispatch_uid='blend_cache_product_delete')
+
+
+def _blend_cache_on_interaction_change(sender, instance, **kwargs):
+    # β o'zgardi - ikkala product ishtirok etgan natijalar eskiradi ('research' usuli)
+    cache = get_blend_cache()
+    for product_id in (instance.product_a_id, instance.product_b_id):
+        cache.invalidate_product(product_id)
+
+
+post_save.connect(_blend_cache_on_interaction_change, sender=OctaneInteraction,
+                  dispatch_uid='blend_cache_interaction_save')
+post_delete.connect(_blend_cache_on_interaction_change, sender=OctaneInteraction,
+                    dispatch_uid='blend_cache_interaction_delete')
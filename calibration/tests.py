@@ -1,3 +1,541 @@
-from django.test import TestCase
+import csv
+import gzip
+import json
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from itertools import combinations
+from unittest import mock, skipUnless
 
-# Create your tests here.
+import numpy as np
+from django.db import connection
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from scipy.optimize import linprog
+
+from .benchmark import synthetic_products
+from .blend_cache import blend_cache_key, get_blend_cache, octane_model_fingerprint
+from .blend_jobs import JobProgress, run_blend_job
+from .deadline import Deadline
+from .history import history_page
+from .linear_programming import (
+    MIN_COMPONENT_SHARE, blend_arrays, extreme_octane_blend, frontier_at_octane, k_best_blends, octane_bounds,
+    price_octane_frontier, solve_blend_lp, solve_blend_milp, solve_combinations_lp,
+)
+from .models import BlendJob, CalculationJournal, GasolineBlendCalculation, OctaneInteraction, Product
+from .octane_models import OctaneModel, model_extreme_blend, model_frontier_representatives
+from .optimization import optimize_multi_product_blend, shutdown_blend_pool
+from .projection import project_to_capped_simplex
+from .views import calculate_gasoline_blend
+from .pruning import all_combinations, prune_combinations
+from .partitioning import (
+    PARTITIONED_MODELS, archive_partition, convert_to_partitioned, create_month_partition, is_partitioned,
+    list_partitions, partition_name,
+)
+
+
+def create_blend_products(specs):
+    """[(octane, price, gost_percentage), ...] -> aralashma so'rovi uchun products dict"""
+    products = {}
+    for index, (octane, price, gost) in enumerate(specs):
+        product = Product.objects.create(name=f'P{index}', octane_number=octane, price_per_liter=price,
+                                         gost_percentage=gost)
+        products[str(product.id)] = {'octane': octane, 'price': price, 'gost_percentage': gost}
+    return products
+
+
+def blend_cost(prices, percentages):
+    return float(prices @ percentages) / 100.0
+
+
+def brute_force_cost(octanes, prices, caps, target_octane, max_products, min_share):
+    """Barcha kombinatsiyalar bo'yicha linprog - eng arzon narx (yechim yo'q bo'lsa inf)"""
+    best = np.inf
+    for k in range(1, max_products + 1):
+        for combo in combinations(range(len(octanes)), k):
+            combo = list(combo)
+            percentages = solve_blend_lp(octanes[combo], prices[combo], caps[combo], target_octane, lower=min_share)
+            if percentages is not None:
+                best = min(best, blend_cost(prices[combo], percentages))
+    return best
+
+
+class LinearProgrammingTests(SimpleTestCase):
+    """LP/MILP, kombinatsiyalar LP va k-best - to'liq sanab chiqish bilan solishtiriladi"""
+
+    def arrays(self, size, seed):
+        return blend_arrays(synthetic_products(size, seed))
+
+    def test_milp_matches_brute_force(self):
+        for seed in range(4):
+            octanes, prices, caps = self.arrays(7, seed)
+            for target in (88, 92, 95):
+                expected = brute_force_cost(octanes, prices, caps, target, 3, MIN_COMPONENT_SHARE)
+                percentages = solve_blend_milp(octanes, prices, caps, target, max_products=3,
+                                               min_share=MIN_COMPONENT_SHARE)
+                if not np.isfinite(expected):
+                    self.assertIsNone(percentages)
+                    continue
+                self.assertAlmostEqual(blend_cost(prices, percentages), expected, places=5)
+                self.assertLessEqual(int(np.sum(percentages > 1e-6)), 3)
+                self.assertGreaterEqual(octanes @ percentages, 100.0 * target - 1e-6)
+
+    def test_lp_matches_linprog_over_all_products(self):
+        octanes, prices, caps = self.arrays(8, 1)
+        percentages = solve_blend_lp(octanes, prices, caps, 92)
+        expected = linprog(prices / 100.0, A_ub=-octanes.reshape(1, -1), b_ub=[-9200.0], A_eq=np.ones((1, 8)),
+                           b_eq=[100.0], bounds=list(zip(np.zeros(8), caps)), method='highs')
+        self.assertAlmostEqual(blend_cost(prices, percentages), expected.fun, places=6)
+
+    def test_combinations_lp_matches_linprog(self):
+        octanes, prices, caps = self.arrays(7, 2)
+        for k in (3, 4):
+            combos = np.array(list(combinations(range(7), k)), dtype=np.intp)
+            percentages, feasible = solve_combinations_lp(octanes, prices, caps, 92, combos)
+            for combo, row, ok in zip(combos, percentages, feasible):
+                expected = solve_blend_lp(octanes[combo], prices[combo], caps[combo], 92, lower=MIN_COMPONENT_SHARE)
+                self.assertEqual(ok, expected is not None)
+                if ok:
+                    self.assertAlmostEqual(blend_cost(prices[combo], row),
+                                           blend_cost(prices[combo], expected), places=5)
+
+    def test_k_best_blends_are_distinct_and_sorted(self):
+        products = synthetic_products(8, 3)
+        octanes, prices, caps = blend_arrays(products)
+        results = k_best_blends(products, 92, k=5, max_products=3)
+
+        self.assertEqual(len(results), 5)
+        product_sets = [frozenset(p.id for p in result['products']) for result in results]
+        self.assertEqual(len(set(product_sets)), len(product_sets))
+        gaps = [result['cost_gap'] for result in results]
+        self.assertEqual(gaps[0], 0)
+        self.assertEqual(gaps, sorted(gaps))
+        best = solve_blend_milp(octanes, prices, caps, 92, max_products=3, min_share=MIN_COMPONENT_SHARE)
+        self.assertAlmostEqual(results[0]['final_price'], round(blend_cost(prices, best), 2), places=2)
+        for result in results:
+            self.assertLessEqual(len(result['products']), 3)
+            self.assertTrue(result['gost_compliant'])
+            self.assertGreaterEqual(result['final_octane'], 92 - 0.01)
+
+
+class BlendGeometryTests(SimpleTestCase):
+    """Proyeksiya, pruning, narx/oktan chegarasi va ekstremal sostavlar"""
+
+    def test_projection_is_feasible_and_nearest(self):
+        rng = np.random.default_rng(5)
+        caps = np.array([20.0, 50.0, 100.0, 30.0, 15.0])
+        values = rng.uniform(-50, 150, size=(200, 5))
+        projected = project_to_capped_simplex(values, caps)
+
+        np.testing.assert_allclose(projected.sum(axis=1), 100.0, atol=1e-8)
+        self.assertTrue(np.all(projected >= -1e-12))
+        self.assertTrue(np.all(projected <= caps + 1e-12))
+        # Tekshiruv: tasodifiy mumkin nuqtalar proyeksiyadan yaqinroq emas
+        others = project_to_capped_simplex(rng.uniform(0, 100, size=(50, 5)), caps)
+        distance = np.linalg.norm(values - projected, axis=1)
+        other_distance = np.linalg.norm(values[:, None, :] - others[None, :, :], axis=2)
+        self.assertTrue(np.all(distance[:, None] <= other_distance + 1e-9))
+
+    def test_projection_without_feasible_blend_returns_caps(self):
+        caps = np.array([20.0, 30.0])
+        np.testing.assert_array_equal(project_to_capped_simplex([70.0, 10.0], caps), caps)
+
+    def test_pruning_keeps_optimum(self):
+        for seed in range(4):
+            octanes, prices, caps = blend_arrays(synthetic_products(10, seed))
+            for target in (90, 93, 96):
+                costs = []
+                for groups in (all_combinations(len(octanes), 4),
+                               prune_combinations(octanes, prices, caps, target, 4, lower=MIN_COMPONENT_SHARE)):
+                    best = np.inf
+                    for _, combos in groups:
+                        percentages, feasible = solve_combinations_lp(octanes, prices, caps, target, combos)
+                        if feasible.any():
+                            best = min(best, np.min((percentages * prices[combos]).sum(axis=1)[feasible]) / 100.0)
+                    costs.append(best)
+                self.assertAlmostEqual(costs[0], costs[1], places=6)
+
+    def test_frontier_matches_linprog(self):
+        octanes, prices, caps = blend_arrays(synthetic_products(9, 4))
+        frontier = price_octane_frontier(octanes, prices, caps)
+        lowest, highest = octane_bounds(octanes, prices, caps)
+        self.assertAlmostEqual(frontier['octanes'][-1], highest, places=6)
+
+        for target in np.linspace(lowest - 2, highest, 15):
+            percentages = frontier_at_octane(frontier, target)
+            expected = solve_blend_lp(octanes, prices, caps, target)
+            self.assertAlmostEqual(blend_cost(prices, percentages), blend_cost(prices, expected), places=5)
+            self.assertGreaterEqual(octanes @ percentages, 100.0 * target - 1e-6)
+        self.assertIsNone(frontier_at_octane(frontier, highest + 0.5))
+
+    def test_extreme_blends_match_linprog(self):
+        for seed in range(4):
+            octanes, prices, caps = blend_arrays(synthetic_products(8, seed))
+            bounds = list(zip(np.zeros(8), caps))
+            for maximize in (True, False):
+                sign = -1.0 if maximize else 1.0
+                extreme = linprog(sign * octanes, A_eq=np.ones((1, 8)), b_eq=[100.0], bounds=bounds, method='highs')
+                best_octane = float(octanes @ extreme.x)
+                # Shu oktanli sostavlar ichida eng arzoni
+                cheapest = linprog(prices, A_ub=sign * octanes.reshape(1, -1), b_ub=[sign * best_octane + 1e-7],
+                                   A_eq=np.ones((1, 8)), b_eq=[100.0], bounds=bounds, method='highs')
+
+                percentages = extreme_octane_blend(octanes, prices, caps, maximize=maximize)
+                self.assertAlmostEqual(percentages.sum(), 100.0, places=9)
+                self.assertAlmostEqual(float(octanes @ percentages), best_octane, places=6)
+                self.assertAlmostEqual(float(prices @ percentages), cheapest.fun, places=4)
+            self.assertAlmostEqual(octane_bounds(octanes, prices, caps)[1] * 100.0,
+                                   float(octanes @ extreme_octane_blend(octanes, prices, caps)), places=6)
+
+    def test_weighted_model_extremes_match_linprog(self):
+        octanes, prices, caps = blend_arrays(synthetic_products(8, 2))
+        model = OctaneModel(octanes, 'weighted')
+        coefficients = model.coefficients()
+        extreme = linprog(-coefficients, A_eq=np.ones((1, 8)), b_eq=[100.0], bounds=list(zip(np.zeros(8), caps)),
+                          method='highs')
+        percentages = model_extreme_blend(model, prices, caps)
+        self.assertAlmostEqual(float(model.octane(percentages)), float(model.octane(extreme.x)), places=6)
+
+    def test_extreme_blend_when_caps_below_hundred(self):
+        caps = np.array([20.0, 30.0])
+        percentages = extreme_octane_blend([90.0, 95.0], [8.0, 9.0], caps)
+        np.testing.assert_array_equal(percentages, caps)
+        self.assertIsNone(octane_bounds([90.0, 95.0], [8.0, 9.0], caps))
+
+
+@override_settings(BLEND_CACHE_ENABLED=False, BLEND_SLA_MS=None)
+class BlendRequestTests(TestCase):
+    """calculate_gasoline_blend: so'rov parametrlari bo'yicha optimizatorlar"""
+
+    specs = [(80, 6, 100), (86, 7, 100), (92, 9, 100), (95, 10, 50), (98, 12, 20), (100, 14, 15)]
+
+    def post(self, **data):
+        products = create_blend_products(self.specs)
+        request = RequestFactory().post('/', data=json.dumps({'products': products, **data}),
+                                        content_type='application/json')
+        return json.loads(calculate_gasoline_blend(request).content)
+
+    def test_max_products_returns_distinct_k_best_blends(self):
+        response = self.post(target_octane=92, max_products=2)
+
+        self.assertTrue(response['success'], response.get('error'))
+        variants = response['variants']
+        # 2 tagacha komponent bilan AI-92 ga faqat 4 ta sostav erishadi
+        self.assertEqual(len(variants), 4)
+        product_sets = [frozenset(p['product_id'] for p in v['products']) for v in variants]
+        self.assertEqual(len(set(product_sets)), len(product_sets))
+        self.assertTrue(all(len(products) <= 2 for products in product_sets))
+        gaps = [v['cost_gap'] for v in variants]
+        self.assertEqual(gaps, sorted(gaps))
+        self.assertTrue(all(v['final_octane'] >= 92 - 0.01 for v in variants))
+
+    def test_max_products_with_research_method_uses_genetic_search(self):
+        response = self.post(target_octane=92, max_products=2, method='research')
+
+        self.assertTrue(response['success'], response.get('error'))
+        variants = response['variants']
+        self.assertTrue(variants)
+        product_sets = [frozenset(p['product_id'] for p in v['products']) for v in variants]
+        self.assertEqual(len(set(product_sets)), len(product_sets))
+        self.assertTrue(all(len(products) <= 2 for products in product_sets))
+        self.assertTrue(all(v['final_octane'] >= 92 - 0.05 for v in variants))
+
+    def test_genetic_search_reports_pruning(self):
+        response = self.post(target_octane=92, max_products=3, method='weighted')
+
+        self.assertTrue(response['success'], response.get('error'))
+        search = response['search']
+        pruned = (search['combinations_pruned_products'] + search['combinations_pruned_dominated']
+                  + search['combinations_pruned_infeasible'])
+        self.assertEqual(search['combinations_total'] - pruned, search['combinations_evaluated'])
+        self.assertGreater(pruned, 0)
+        self.assertIsNone(self.post(target_octane=92)['search'])
+
+    def test_seed_reproduces_genetic_search(self):
+        def summary(response):
+            return [(v['final_octane'], v['final_price_per_kg'], [p['percentage'] for p in v['products']])
+                    for v in response['variants']]
+
+        first = self.post(target_octane=92, max_products=2, method='research', seed=7)
+        second = self.post(target_octane=92, max_products=2, method='research', seed=7)
+
+        self.assertTrue(first['success'], first.get('error'))
+        self.assertEqual(first['seed'], 7)
+        self.assertEqual(summary(first), summary(second))
+        self.assertIsInstance(self.post(target_octane=92)['seed'], int)
+
+    def test_perf_reports_solver_counters(self):
+        frontier = self.post(target_octane=92, perf=True)['_perf']['counters']
+        research = self.post(target_octane=92, method='research', perf=True)['_perf']['counters']
+        k_best = self.post(target_octane=92, max_products=2, perf=True)['_perf']['counters']
+
+        self.assertEqual(frontier['lp_sweeps'], 1)
+        self.assertGreater(frontier['frontier_breakpoints'], 1)
+        self.assertGreaterEqual(research['slp_iterations'], 1)
+        self.assertEqual(research['lp_sweeps'], research['slp_iterations'])
+        self.assertGreaterEqual(k_best['milp_solves'], 4)
+
+    def test_sla_deadline_returns_partial_variants(self):
+        with override_settings(BLEND_SLA_MS=50):
+            response = self.post(target_octane=92, max_products=3, method='weighted')
+
+        self.assertTrue(response['success'], response.get('error'))
+        self.assertTrue(response['variants'])
+        self.assertFalse(response['completed'])
+        self.assertFalse(response['search']['completed'])
+        self.assertTrue(self.post(target_octane=92)['completed'])
+
+    def test_invalid_max_products(self):
+        response = self.post(target_octane=92, max_products='two')
+        self.assertFalse(response['success'])
+        self.assertFalse(self.post(target_octane=92, seed=-1)['success'])
+
+
+@override_settings(BLEND_CACHE_ENABLED=True, BLEND_CACHE_ALIAS=None, BLEND_SLA_MS=None)
+class BlendCacheTests(TestCase):
+    """Natijalar keshi: oktan modeli parametrlari o'zgarganda eski natijalar qaytarilmaydi"""
+
+    def setUp(self):
+        get_blend_cache().clear()
+        self.products = create_blend_products([(80, 6, 100), (92, 9, 100), (98, 12, 50)])
+
+    def post(self, **data):
+        request = RequestFactory().post('/', data=json.dumps({'products': self.products, **data}),
+                                        content_type='application/json')
+        return json.loads(calculate_gasoline_blend(request).content)
+
+    def test_interaction_change_invalidates_research_results(self):
+        self.assertFalse(self.post(target_octane=92, method='research')['cache']['hit'])
+        self.assertTrue(self.post(target_octane=92, method='research')['cache']['hit'])
+
+        first, second = map(int, list(self.products)[:2])
+        interaction = OctaneInteraction.objects.create(product_a_id=first, product_b_id=second, coefficient=8.0)
+        response = self.post(target_octane=92, method='research')
+        self.assertFalse(response['cache']['hit'])
+        self.assertTrue(self.post(target_octane=92, method='research')['cache']['hit'])
+
+        interaction.coefficient = -8.0
+        interaction.save()
+        self.assertFalse(self.post(target_octane=92, method='research')['cache']['hit'])
+
+    def test_key_depends_on_octane_model_parameters(self):
+        first, second = map(int, list(self.products)[:2])
+
+        def key(method):
+            return blend_cache_key(92, self.products, method=method,
+                                   octane_model=octane_model_fingerprint(method, self.products.keys()))
+
+        research = key('research')
+        OctaneInteraction.objects.create(product_a_id=second, product_b_id=first, coefficient=4.0)
+        self.assertNotEqual(key('research'), research)
+
+        weighted = key('weighted')
+        with override_settings(OCTANE_BLENDING_INDEX_K=0.03):
+            self.assertNotEqual(key('weighted'), weighted)
+        self.assertEqual(key('linear'), blend_cache_key(92, self.products))
+
+
+class ParallelDeadlineTests(SimpleTestCase):
+    """Parallel rejim muddat bilan - ishlayotgan bo'laklarning qisman natijalari qaytariladi"""
+
+    @classmethod
+    def tearDownClass(cls):
+        shutdown_blend_pool()
+        super().tearDownClass()
+
+    def test_parallel_with_deadline_returns_variants(self):
+        products = synthetic_products(12)
+        # Pool jarayonlari muddatdan oldin ishga tushishi uchun
+        optimize_multi_product_blend(products[:4], 92, max_products=3, solver='genetic', parallel=True, workers=2)
+
+        started = time.perf_counter()
+        variants = optimize_multi_product_blend(products, 92, max_products=4, solver='genetic', parallel=True,
+                                                workers=2, deadline=1000, seed=1)
+        elapsed = time.perf_counter() - started
+
+        self.assertGreaterEqual(len(variants), 1)
+        self.assertLess(elapsed, 2.0)
+
+    def test_parallel_and_sequential_genetic_results_match(self):
+        products = synthetic_products(6)
+
+        def summary(variants):
+            return [([p.id for p in v['products']], v['percentages'], v['final_price']) for v in variants]
+
+        sequential = optimize_multi_product_blend(products, 92, max_products=3, solver='genetic', seed=3)
+        parallel = optimize_multi_product_blend(products, 92, max_products=3, solver='genetic', seed=3,
+                                                parallel=True, workers=2)
+
+        self.assertTrue(sequential)
+        self.assertEqual(summary(sequential), summary(parallel))
+
+    def test_parallel_genetic_search_with_octane_model(self):
+        products = synthetic_products(5)
+        octanes, _, _ = blend_arrays(products)
+        interactions = np.zeros((5, 5))
+        interactions[0, 3] = interactions[3, 0] = 6.0
+        model = OctaneModel(octanes, 'research', interactions)
+
+        def summary(variants):
+            return [([p.id for p in v['products']], v['percentages'], v['final_octane']) for v in variants]
+
+        sequential = optimize_multi_product_blend(products, 92, max_products=3, solver='genetic', seed=5,
+                                                  octane_model=model)
+        parallel = optimize_multi_product_blend(products, 92, max_products=3, solver='genetic', seed=5,
+                                                octane_model=model, parallel=True, workers=2)
+
+        self.assertTrue(sequential)
+        self.assertEqual(summary(sequential), summary(parallel))
+
+    def test_frontier_linearization_stops_at_deadline(self):
+        octanes, prices, caps = blend_arrays(synthetic_products(6))
+        interactions = np.full((6, 6), -4.0)
+        np.fill_diagonal(interactions, 0.0)
+        model = OctaneModel(octanes, 'research', interactions)
+
+        deadline = Deadline(0)
+        representatives = model_frontier_representatives(model, prices, caps, 90, deadline=deadline)
+        unbounded = Deadline()
+        complete = model_frontier_representatives(model, prices, caps, 90, deadline=unbounded)
+
+        self.assertFalse(deadline.completed)
+        self.assertTrue(unbounded.completed)
+        self.assertTrue(representatives)
+        self.assertGreaterEqual(representatives[0][0], 90 - 1e-6)
+        self.assertLessEqual(float(complete[0][1] @ prices), float(representatives[0][1] @ prices) + 1e-6)
+
+
+@override_settings(BLEND_JOB_PROGRESS_INTERVAL=0)
+class BlendJobProgressTests(TransactionTestCase):
+    """Fon vazifasi progressi chegaradagi variantlar bo'yicha yoziladi"""
+
+    def run_job(self, target_octane):
+        products = create_blend_products([(80, 6, 100), (92, 9, 100), (95, 10, 50), (98, 12, 20)])
+        job = BlendJob.objects.create(request_data={'target_octane': target_octane, 'products': products},
+                                      target_octane=target_octane)
+        snapshots = []
+        flush = JobProgress.flush
+
+        def recording_flush(progress):
+            flush(progress)
+            snapshots.append(BlendJob.objects.values('status', 'steps_done', 'partial_results')
+                             .get(pk=job.pk))
+
+        with mock.patch.object(JobProgress, 'flush', recording_flush):
+            run_blend_job(job.pk)
+        return BlendJob.objects.get(pk=job.pk), snapshots
+
+    def test_progress_reported_before_job_finishes(self):
+        job, snapshots = self.run_job(92)
+
+        self.assertEqual(job.status, BlendJob.STATUS_DONE)
+        running = [s for s in snapshots if s['status'] == BlendJob.STATUS_RUNNING]
+        self.assertTrue(running)
+        self.assertGreater(running[0]['steps_done'], 0)
+        self.assertTrue(running[0]['partial_results'])
+        self.assertEqual(job.steps_done, job.steps_total)
+        self.assertGreater(job.steps_total, 0)
+        self.assertEqual(job.best_price, min(r['final_price'] for r in job.partial_results))
+
+    def test_unreachable_target_reports_nearest_blend(self):
+        job, _ = self.run_job(110)
+
+        self.assertEqual(job.status, BlendJob.STATUS_DONE)
+        self.assertEqual((job.steps_done, job.steps_total), (1, 1))
+        self.assertEqual(len(job.partial_results), 1)
+
+
+class HistoryPagingTests(TestCase):
+    """Keyset-пагинация истории: без пропусков и повторов при одинаковом времени"""
+
+    def setUp(self):
+        for octane in range(80, 105):
+            GasolineBlendCalculation.objects.create(target_octane=octane)
+        # Несколько записей с одним временем - порядок определяет id
+        now = timezone.now()
+        for index, entry in enumerate(CalculationJournal.objects.order_by('id')):
+            entry.timestamp = now - timedelta(minutes=index // 4)
+            entry.save(update_fields=['timestamp'])
+
+    def collect(self, filters=None, page_size=4):
+        ids = []
+        cursor = None
+        while True:
+            calculations, cursor = history_page(cursor, filters, page_size=page_size)
+            self.assertLessEqual(len(calculations), page_size)
+            ids.extend(calc['id'] for calc in calculations)
+            if cursor is None:
+                return ids
+
+    def test_pages_cover_journal_without_duplicates(self):
+        expected = list(CalculationJournal.objects.order_by('-timestamp', '-id').values_list('id', flat=True))
+        self.assertEqual(len(expected), 25)
+        for page_size in (1, 3, 4, 10, 25, 30):
+            self.assertEqual(self.collect(page_size=page_size), expected)
+
+    def test_pages_with_filter(self):
+        filters = {'calculation_type': 'gasoline_blend', 'q': 'AI-9'}
+        ids = self.collect(filters)
+        self.assertEqual(len(ids), len(set(ids)))
+        self.assertEqual(sorted(ids), sorted(CalculationJournal.objects.filter(product_name__startswith='AI-9')
+                                             .values_list('id', flat=True)))
+
+    def test_invalid_cursor_returns_first_page(self):
+        first, _ = history_page(None, page_size=5)
+        again, _ = history_page('not-a-cursor', page_size=5)
+        self.assertEqual([calc['id'] for calc in first], [calc['id'] for calc in again])
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Партиционирование только для PostgreSQL')
+class PartitioningTests(TestCase):
+    """Помесячные партиции: перевод таблицы, новая партиция месяца, архивирование"""
+
+    table = 'calibration_partitioning_test'
+
+    def month(self, year, month, day=1):
+        return datetime(year, month, day, tzinfo=dt_timezone.utc)
+
+    def count(self, cursor, table):
+        cursor.execute(f'SELECT COUNT(*) FROM "{table}"')
+        return cursor.fetchone()[0]
+
+    def test_migrated_calculation_tables_are_partitioned(self):
+        with connection.cursor() as cursor:
+            for model in PARTITIONED_MODELS.values():
+                self.assertTrue(is_partitioned(cursor, model._meta.db_table))
+
+    def test_convert_create_month_and_archive(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'CREATE TABLE "{self.table}" (id serial PRIMARY KEY, "timestamp" timestamptz NOT NULL, '
+                           f'value integer NOT NULL)')
+            cursor.execute(f'CREATE INDEX "{self.table}_value_idx" ON "{self.table}" (value)')
+            cursor.execute(f'INSERT INTO "{self.table}" ("timestamp", value) VALUES (%s, 1), (%s, 2), (%s, 3)',
+                           [self.month(2026, 1, 10), self.month(2026, 1, 20), self.month(2026, 2, 5)])
+
+            convert_to_partitioned(cursor, self.table, self.month(2026, 1), self.month(2026, 2))
+
+            self.assertTrue(is_partitioned(cursor, self.table))
+            self.assertEqual([start for _, start in list_partitions(cursor, self.table)],
+                             [self.month(2026, 1), self.month(2026, 2)])
+            self.assertEqual(self.count(cursor, partition_name(self.table, self.month(2026, 1))), 2)
+            # id по-прежнему автоинкрементный, строка вне месяцев попадает в DEFAULT
+            cursor.execute(f'INSERT INTO "{self.table}" ("timestamp", value) VALUES (%s, 4) RETURNING id',
+                           [self.month(2026, 3, 15)])
+            self.assertEqual(cursor.fetchone()[0], 4)
+
+            # Новая партиция месяца забирает строки своего месяца из DEFAULT
+            self.assertTrue(create_month_partition(cursor, self.table, self.month(2026, 3)))
+            self.assertFalse(create_month_partition(cursor, self.table, self.month(2026, 3)))
+            self.assertEqual(self.count(cursor, f'{self.table}_default'), 0)
+            self.assertEqual(self.count(cursor, partition_name(self.table, self.month(2026, 3))), 1)
+
+            with tempfile.TemporaryDirectory() as archive_dir:
+                name = partition_name(self.table, self.month(2026, 1))
+                path = archive_partition(cursor, self.table, name, archive_dir)
+                with gzip.open(path, 'rt') as archive:
+                    rows = list(csv.DictReader(archive))
+
+            self.assertEqual(sorted(row['value'] for row in rows), ['1', '2'])
+            cursor.execute('SELECT to_regclass(%s)', [name])
+            self.assertIsNone(cursor.fetchone()[0])
+            self.assertEqual(self.count(cursor, self.table), 2)
@@ -17,6 +17,9 @@ urlpatterns = [
     # path('gasoline-blend/products/', views.product_selection, name='product_selection'),
     # path('gasoline-blend/', views.gasoline_blend_calculator, name='gasoline_blend_calculator'),
     # path('gasoline-blend/calculate/', views.calculate_gasoline_blend, name='calculate_gasoline_blend'),
+    # path('gasoline-blend/calculate-batch/', views.calculate_gasoline_blend_batch, name='calculate_gasoline_blend_batch'),
+    # path('gasoline-blend/jobs/', views.create_blend_job, name='create_blend_job'),
+    # path('gasoline-blend/jobs/<int:job_id>/', views.blend_job_status, name='blend_job_status'),
     # path('gasoline-blend/save-config/', views.save_product_configuration, name='save_product_configuration'),
     # path('gasoline-blend/configs/', views.saved_configurations_list, name='saved_configurations_list'),
     # path('gasoline-blend/configs/<int:config_id>/load/', views.load_configuration, name='load_configuration'),
@@ -25,6 +28,7 @@ urlpatterns = [
     # path('gasoline-blend/compare/', views.compare_variants, name='compare_variants'),
     # path('gasoline-blend/history/<int:calculation_id>/', views.view_gasoline_blend_history, name='view_gasoline_blend_history'),
     path('history/', views.history, name='history'),
+    path('history/export/', views.export_history, name='export_history'),
     path('calculate/', views.calculate_transfer, name='calculate_transfer'),
     path('delete/<int:calculation_id>/', views.delete_calculation, name='delete_calculation'),
 ] 
\ No newline at end of file
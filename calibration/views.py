@@ -3,7 +3,8 @@ from django.http import JsonResponse
 from django.contrib import messages
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
-from django.core.paginator import Paginator
+from django.db import transaction
+from django.conf import settings
 from .models import (
     Tank,
     Product,
@@ -14,12 +15,29 @@ from .models import (
     GasolineBlendCalculation,
     SavedProductConfiguration,
     ProcessingCalculation,
+    CalculationJournal,
+    BlendJob,
 )
 import json
 import logging
+import time
 from decimal import Decimal
-from itertools import combinations
-from .optimization import optimize_multi_product_blend
+import numpy as np
+from .optimization import BlendProduct, optimize_multi_product_blend, solve_maximum_octane
+from .linear_programming import (
+    blend_arrays, price_octane_frontier, frontier_representatives, solve_multi_grade_lp, octane_bounds, k_best_blends,
+)
+from .octane_models import (
+    OCTANE_METHODS, compile_octane_model, model_frontier_representatives, model_octane_bounds,
+)
+from .blend_cache import get_blend_cache, blend_cache_key, octane_model_fingerprint
+from .inventory import tank_inventory
+from .deadline import Deadline
+from .perf import PerfRecorder, perf_json_response
+from .rng import request_seed
+from .blend_jobs import submit_blend_job
+from .history import history_page, delete_journal_entry, filter_journal, export_rows, EXPORT_HEADERS
+from .forms import HistoryFilterForm
 
 logger = logging.getLogger(__name__)
 
@@ -203,19 +221,20 @@ def home(request):
                 interpolation_method = 'spline' if calibration_points_count >= 4 else 'linear'
                 
                 # 8. Сохранить расчет в базе данных (сохраняем удаленный объем как положительное значение)
-                calculation = TransferCalculation.objects.create(
-                    tank=tank,
-                    product=product,
-                    density_kg_per_liter=density,
-                    initial_height_cm=initial_height,
-                    transfer_weight_kg=transfer_weight,
-                    initial_volume_liters=initial_volume,
-                    final_volume_liters=final_volume,
-                    volume_added_liters=volume_removed,  # сохраняем как положительное значение удаленного объема
-                    final_height_cm=final_height,
-                    fill_percentage=fill_percentage,
-                    interpolation_method=interpolation_method
-                )
+                with transaction.atomic():
+                    calculation = TransferCalculation.objects.create(
+                        tank=tank,
+                        product=product,
+                        density_kg_per_liter=density,
+                        initial_height_cm=initial_height,
+                        transfer_weight_kg=transfer_weight,
+                        initial_volume_liters=initial_volume,
+                        final_volume_liters=final_volume,
+                        volume_added_liters=volume_removed,  # сохраняем как положительное значение удаленного объема
+                        final_height_cm=final_height,
+                        fill_percentage=fill_percentage,
+                        interpolation_method=interpolation_method
+                    )
                 
                 # 9. Подготовить результат для отображения
                 result = {
@@ -264,138 +283,95 @@ def home(request):
 
 def history(request):
     """Страница истории расчетов"""
-    # Получить все типы расчетов
-    transfer_calculations = TransferCalculation.objects.all().order_by('-timestamp')
-    volume_weight_calculations = VolumeWeightCalculation.objects.all().order_by('-timestamp')
-    adding_calculations = AddingCalculation.objects.all().order_by('-timestamp')
-    density_calculations = DensityTemperatureCalculation.objects.all().order_by('-timestamp')
-    gasoline_blend_calculations = GasolineBlendCalculation.objects.all().order_by('-timestamp')
-    processing_calculations = ProcessingCalculation.objects.all().order_by('-timestamp')
-    
-    # Объединить все расчеты и отсортировать по времени
-    all_calculations = []
-    
-    for calc in transfer_calculations:
-        all_calculations.append({
-            'type': 'transfer',
-            'object': calc,
-            'timestamp': calc.timestamp,
-            'tank_name': calc.tank_name,
-            'product_name': calc.product_name,
-            'description': f"Откачка: {calc.transfer_weight_kg:.2f} кг из {calc.initial_height_cm:.2f} см → {calc.final_height_cm:.2f} см"
-        })
-    
-    for calc in volume_weight_calculations:
-        all_calculations.append({
-            'type': 'volume_weight',
-            'object': calc,
-            'timestamp': calc.timestamp,
-            'tank_name': calc.tank_name,
-            'product_name': calc.product_name,
-            'description': f"Объем и вес: {calc.height_cm:.2f} см → {calc.volume_liters:.2f} л, {calc.weight_kg:.2f} кг"
-        })
-    
-    for calc in adding_calculations:
-        all_calculations.append({
-            'type': 'adding',
-            'object': calc,
-            'timestamp': calc.timestamp,
-            'tank_name': calc.tank_name,
-            'product_name': calc.product_name,
-            'description': f"Добавление: {calc.current_height_cm:.2f} см + {calc.amount_value:.2f} {'кг' if calc.amount_type == 'weight' else 'л'} → {calc.final_height_cm:.2f} см"
-        })
-    
-    for calc in density_calculations:
-        all_calculations.append({
-            'type': 'density',
-            'object': calc,
-            'timestamp': calc.timestamp,
-            'tank_name': '—',
-            'product_name': calc.product_name,
-            'description': f"Плотность: {calc.reference_density_kg_m3:.1f} кг/м³ при {calc.reference_temperature_c:.1f}°C → {calc.corrected_density_kg_m3:.1f} кг/м³"
-        })
-    
-    for calc in gasoline_blend_calculations:
-        variants_count = len(calc.blend_variants) if calc.blend_variants else 0
-        all_calculations.append({
-            'type': 'gasoline_blend',
-            'object': calc,
-            'timestamp': calc.timestamp,
-            'tank_name': '—',
-            'product_name': f"AI-{calc.target_octane}",
-            'description': f"Смешивание бензина: {variants_count} вариантов, целевое октановое число: {calc.target_octane}"
-        })
-    
-    for calc in processing_calculations:
-        materials_count = len(calc.materials) if calc.materials else 0
-        all_calculations.append({
-            'type': 'processing',
-            'object': calc,
-            'timestamp': calc.timestamp,
-            'tank_name': '—',
-            'product_name': f"Переработка ({calc.calculation_date.strftime('%d.%m.%Y')})",
-            'description': f"Переработка: {materials_count} материалов, прибыль: ${calc.total_profit:.2f}"
-        })
-    
-    # Сортировка по времени (новые сначала)
-    all_calculations.sort(key=lambda x: x['timestamp'], reverse=True)
-    
-    # Пагинация
-    paginator = Paginator(all_calculations, 10)  # 10 расчетов на страницу
-    page_number = request.GET.get('page')
-    calculations = paginator.get_page(page_number)
-    
+    cursor = request.GET.get('cursor')
+    filter_form = HistoryFilterForm(request.GET or None)
+    filters = filter_form.cleaned_data if filter_form.is_valid() else None
+    calculations, next_cursor = history_page(cursor, filters=filters)
+
+    # Параметры фильтров для ссылок пагинации
+    filter_params = request.GET.copy()
+    filter_params.pop('cursor', None)
+
     return render(request, 'calibration/history.html', {
         'calculations': calculations,
-        'is_paginated': calculations.has_other_pages(),
-        'page_obj': calculations
+        'next_cursor': next_cursor,
+        'filter_form': filter_form,
+        'filter_query': filter_params.urlencode(),
+        'is_first_page': not cursor,
+        'is_paginated': bool(next_cursor or cursor),
     })
 
 
+class _EchoBuffer:
+    """Псевдо-файл для csv.writer: возвращает строку вместо записи"""
+    def write(self, value):
+        return value
+
+
+def export_history(request):
+    """Потоковый экспорт истории расчетов (CSV или XLSX) с фильтрами страницы истории"""
+    import csv
+    import tempfile
+    from datetime import datetime
+    from django.http import StreamingHttpResponse, FileResponse
+
+    filter_form = HistoryFilterForm(request.GET or None)
+    filters = filter_form.cleaned_data if filter_form.is_valid() else None
+    entries = filter_journal(CalculationJournal.objects.all(), filters)
+    export_format = request.GET.get('format', 'csv')
+
+    total = entries.count()
+    started = datetime.now()
+
+    def log_progress(done):
+        logger.info(f"Экспорт истории ({export_format}): {done} из {total} строк, {(datetime.now() - started).total_seconds():.1f} с")
+
+    filename = f"history_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+
+    if export_format == 'xlsx':
+        from openpyxl import Workbook
+
+        # write-only режим: строки сразу пишутся в файл, не накапливаясь в памяти
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet("История расчетов")
+        ws.append(EXPORT_HEADERS)
+        for row in export_rows(entries, progress=log_progress):
+            ws.append(row)
+
+        tmp = tempfile.TemporaryFile(suffix='.xlsx')
+        wb.save(tmp)
+        tmp.seek(0)
+        response = FileResponse(
+            tmp,
+            as_attachment=True,
+            filename=f"{filename}.xlsx",
+            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        )
+    else:
+        writer = csv.writer(_EchoBuffer())
+
+        def stream():
+            yield '\ufeff'  # BOM для корректной кириллицы в Excel
+            yield writer.writerow(EXPORT_HEADERS)
+            for row in export_rows(entries, progress=log_progress):
+                yield writer.writerow(row)
+
+        response = StreamingHttpResponse(stream(), content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
+
+    # Общее число строк - клиент может показывать прогресс загрузки
+    response['X-Export-Total-Rows'] = str(total)
+    return response
+
+
 def delete_calculation(request, calculation_id):
-    """Удалить расчет"""
+    """Удалить расчет (calculation_id - ID записи журнала расчетов)"""
     if request.method == 'POST':
-        # Попробуем найти расчет во всех моделях
-        calculation = None
-        
-        # Проверяем ProcessingCalculation
-        try:
-            calculation = ProcessingCalculation.objects.get(id=calculation_id)
-            calculation.delete()
-            messages.success(request, 'Расчет переработки успешно удален.')
-            return redirect('calibration:history')
-        except ProcessingCalculation.DoesNotExist:
-            pass
-        
-        # Проверяем TransferCalculation
-        try:
-            calculation = TransferCalculation.objects.get(id=calculation_id)
-        except TransferCalculation.DoesNotExist:
-            pass
-        
-        # Проверяем VolumeWeightCalculation
-        if not calculation:
-            try:
-                calculation = VolumeWeightCalculation.objects.get(id=calculation_id)
-            except VolumeWeightCalculation.DoesNotExist:
-                pass
-        
-        # Проверяем AddingCalculation
-        if not calculation:
-            try:
-                calculation = AddingCalculation.objects.get(id=calculation_id)
-            except AddingCalculation.DoesNotExist:
-                pass
-        
-        # Проверяем GasolineBlendCalculation
-        if not calculation:
-            try:
-                calculation = GasolineBlendCalculation.objects.get(id=calculation_id)
-            except GasolineBlendCalculation.DoesNotExist:
-                pass
-        
-        if calculation:
-            calculation.delete()
+        entry = CalculationJournal.objects.filter(id=calculation_id).first()
+
+        if entry:
+            with transaction.atomic():
+                delete_journal_entry(entry)
             messages.success(request, "Расчет удален успешно.")
         else:
             messages.error(request, "Расчет не найден.")
@@ -552,19 +528,20 @@ def calculate_transfer(request):
         interpolation_method = 'spline' if tank.calibrations.count() >= 4 else 'linear'
         
         # Сохранить расчет
-        TransferCalculation.objects.create(
-            tank=tank,
-            product=product,
-            density_kg_per_liter=density,
-            initial_height_cm=initial_height,
-            transfer_weight_kg=transfer_weight,
-            initial_volume_liters=initial_volume,
-            final_volume_liters=final_volume,
-            volume_added_liters=volume_removed,  # сохраняем как положительное значение удаленного объема
-            final_height_cm=final_height,
-            fill_percentage=fill_percentage,
-            interpolation_method=interpolation_method
-        )
+        with transaction.atomic():
+            TransferCalculation.objects.create(
+                tank=tank,
+                product=product,
+                density_kg_per_liter=density,
+                initial_height_cm=initial_height,
+                transfer_weight_kg=transfer_weight,
+                initial_volume_liters=initial_volume,
+                final_volume_liters=final_volume,
+                volume_added_liters=volume_removed,  # сохраняем как положительное значение удаленного объема
+                final_height_cm=final_height,
+                fill_percentage=fill_percentage,
+                interpolation_method=interpolation_method
+            )
         
         return JsonResponse({
             'success': True,
@@ -664,16 +641,17 @@ def volume_weight_calculator(request):
                 interpolation_method = 'spline' if calibration_points_count >= 4 else 'linear'
                 
                 # 5. Сохранить расчет в базе данных
-                calculation = VolumeWeightCalculation.objects.create(
-                    tank=tank,
-                    product=product,
-                    height_cm=height,
-                    density_kg_per_liter=density,
-                    volume_liters=volume,
-                    weight_kg=weight,
-                    fill_percentage=fill_percentage,
-                    interpolation_method=interpolation_method
-                )
+                with transaction.atomic():
+                    calculation = VolumeWeightCalculation.objects.create(
+                        tank=tank,
+                        product=product,
+                        height_cm=height,
+                        density_kg_per_liter=density,
+                        volume_liters=volume,
+                        weight_kg=weight,
+                        fill_percentage=fill_percentage,
+                        interpolation_method=interpolation_method
+                    )
                 
                 # 6. Подготовить результат для отображения
                 result = {
@@ -825,23 +803,24 @@ def adding_calculator(request):
                 interpolation_method = 'spline' if calibration_points_count >= 4 else 'linear'
                 
                 # 9. Сохранить расчет в базе данных
-                calculation = AddingCalculation.objects.create(
-                    tank=tank,
-                    product=product,
-                    current_height_cm=current_height,
-                    density_kg_per_liter=density,
-                    amount_type=amount_type,
-                    amount_value=amount_value,
-                    current_volume_liters=current_volume,
-                    current_weight_kg=current_weight,
-                    added_volume_liters=added_volume,
-                    added_weight_kg=added_weight,
-                    final_volume_liters=final_volume,
-                    final_weight_kg=final_weight,
-                    final_height_cm=final_height,
-                    fill_percentage=fill_percentage,
-                    interpolation_method=interpolation_method
-                )
+                with transaction.atomic():
+                    calculation = AddingCalculation.objects.create(
+                        tank=tank,
+                        product=product,
+                        current_height_cm=current_height,
+                        density_kg_per_liter=density,
+                        amount_type=amount_type,
+                        amount_value=amount_value,
+                        current_volume_liters=current_volume,
+                        current_weight_kg=current_weight,
+                        added_volume_liters=added_volume,
+                        added_weight_kg=added_weight,
+                        final_volume_liters=final_volume,
+                        final_weight_kg=final_weight,
+                        final_height_cm=final_height,
+                        fill_percentage=fill_percentage,
+                        interpolation_method=interpolation_method
+                    )
                 
                 # 10. Подготовить результат для отображения
                 result = {
@@ -927,16 +906,17 @@ def density_calculator(request):
             corrected_density = reference_density - temperature_correction * delta_t
             density_diff = corrected_density - reference_density
 
-            calculation = DensityTemperatureCalculation.objects.create(
-                product=None,
-                reference_density_kg_m3=reference_density,
-                reference_temperature_c=reference_temperature,
-                target_temperature_c=target_temperature,
-                thermal_expansion_coefficient=temperature_correction,
-                corrected_density_kg_m3=corrected_density,
-                density_difference_kg_m3=density_diff,
-                notes=notes or None
-            )
+            with transaction.atomic():
+                calculation = DensityTemperatureCalculation.objects.create(
+                    product=None,
+                    reference_density_kg_m3=reference_density,
+                    reference_temperature_c=reference_temperature,
+                    target_temperature_c=target_temperature,
+                    thermal_expansion_coefficient=temperature_correction,
+                    corrected_density_kg_m3=corrected_density,
+                    density_difference_kg_m3=density_diff,
+                    notes=notes or None
+                )
 
             result = {
                 'reference_density': reference_density,
@@ -995,16 +975,17 @@ def density_quick_calculator(request):
                     corrected_density = actual_density - temperature_correction * delta_t
                     density_diff = corrected_density - actual_density
                     
-                    DensityTemperatureCalculation.objects.create(
-                        product=None,
-                        reference_density_kg_m3=actual_density,
-                        reference_temperature_c=actual_temp,
-                        target_temperature_c=desired_temp,
-                        thermal_expansion_coefficient=temperature_correction,
-                        corrected_density_kg_m3=corrected_density,
-                        density_difference_kg_m3=density_diff,
-                        notes="Быстрый калькулятор плотности"
-                    )
+                    with transaction.atomic():
+                        DensityTemperatureCalculation.objects.create(
+                            product=None,
+                            reference_density_kg_m3=actual_density,
+                            reference_temperature_c=actual_temp,
+                            target_temperature_c=desired_temp,
+                            thermal_expansion_coefficient=temperature_correction,
+                            corrected_density_kg_m3=corrected_density,
+                            density_difference_kg_m3=density_diff,
+                            notes="Быстрый калькулятор плотности"
+                        )
                     
                     result = {
                         'actual_density': actual_density,
@@ -1026,48 +1007,6 @@ def density_quick_calculator(request):
 # БЕНЗИН АРАЛАШМА КАЛЬКУЛЯТОР ФУНКЦИЯЛАРИ
 # ============================================================
 
-def calculate_octane_blend(products_percentages):
-    """
-    Aralashmaning yakuniy oktan sonini hisoblaydi (linear mixing)
-    
-    Args:
-        products_percentages: List of tuples [(product, percentage), ...]
-    
-    Returns:
-        float: Yakuniy oktan soni
-    """
-    if not products_percentages:
-        return 0.0
-    
-    total_octane = 0.0
-    for product, percentage in products_percentages:
-        if product.octane_number:
-            total_octane += product.octane_number * (percentage / 100.0)
-    
-    return round(total_octane, 2)
-
-
-def calculate_price_blend(products_percentages):
-    """
-    Aralashmaning yakuniy narxini hisoblaydi
-    
-    Args:
-        products_percentages: List of tuples [(product, percentage), ...]
-    
-    Returns:
-        float: Yakuniy narx so'm/litr
-    """
-    if not products_percentages:
-        return 0.0
-    
-    total_price = Decimal('0.0')
-    for product, percentage in products_percentages:
-        if product.price_per_liter:
-            total_price += Decimal(str(product.price_per_liter)) * Decimal(str(percentage)) / Decimal('100.0')
-    
-    return float(total_price)
-
-
 def check_gost_compliance(products_percentages):
     """
     GOST talablariga mos kelishini tekshiradi
@@ -1091,634 +1030,320 @@ def check_gost_compliance(products_percentages):
     return is_compliant, warnings
 
 
-def calculate_two_product_blend(product1, product2, target_octane):
+def load_blend_products(products_data):
     """
-    Ikki product uchun aralashma hisoblaydi
+    Frontend ma'lumotlaridan optimizatorlar uchun BlendProduct ro'yxati.
+    Aralashma uchun productlar bitta so'rov bilan olinadi, model obyektlari o'zgartirilmaydi.
     
     Args:
-        product1: Past oktanli product
-        product2: Yuqori oktanli product
-        target_octane: Maqsad oktan soni
+        products_data: Dict {product_id: {'octane': float, 'price': float, 'gost_percentage': float}}
     
     Returns:
-        dict: {product1_percentage, product2_percentage} yoki None
+        list: BlendProduct ro'yxati (oktan va narxi musbat bo'lganlar)
     """
-    oct1 = product1.octane_number if product1.octane_number else 0
-    oct2 = product2.octane_number if product2.octane_number else 0
-    
-    if oct1 >= oct2:
-        return None
+    product_ids = []
+    for product_id in products_data:
+        try:
+            product_ids.append(int(product_id))
+        except (ValueError, TypeError):
+            continue
     
-    if not (oct1 <= target_octane <= oct2):
-        return None
+    names = dict(
+        Product.objects.filter(id__in=product_ids, is_for_blending=True).values_list('id', 'name')
+    )
     
-    # Formula: target = (oct1 * p1) + (oct2 * p2)
-    # p1 + p2 = 100%
-    # p2 = (target - oct1) / (oct2 - oct1) * 100
-    try:
-        p2 = ((target_octane - oct1) / (oct2 - oct1)) * 100
-        p1 = 100 - p2
-        
-        if 0 <= p1 <= 100 and 0 <= p2 <= 100:
-            return {
-                'product1_percentage': round(p1, 2),
-                'product2_percentage': round(p2, 2)
+    products = []
+    for product_id, data in products_data.items():
+        try:
+            product_id = int(product_id)
+            octane = float(data.get('octane', 0))
+            price = float(data.get('price', 0))
+            gost_percentage = float(data.get('gost_percentage', 100))
+        except (ValueError, TypeError):
+            continue
+        if product_id in names and octane > 0 and price > 0:
+            products.append(BlendProduct(product_id, names[product_id], octane, price, gost_percentage))
+    return products
+
+
+BLEND_CATEGORIES = [
+    ('eng_arzon', 'Eng arzon'),
+    ('arzon', 'Arzon'),
+    ('ortacha', 'O\'rtacha'),
+    ('qimmat', 'Qimmat'),
+    ('juda_qimmat', 'Juda qimmat')
+]
+
+# Genetic Algorithm variantlari maqsad oktandan shuncha pastda bo'lsa ham qabul qilinadi
+GA_OCTANE_TOLERANCE = 0.05
+
+
+def percentages_variant(products_list, percentages, prices, final_octane, total_volume=None):
+    """Foizlar massivi -> variant (frontend formati); 0.01 foizdan kichik productlar ko'rsatilmaydi"""
+    products_perc = [
+        (products_list[i], round(float(percentages[i]), 2))
+        for i in np.flatnonzero(percentages > 0.01)
+    ]
+    gost_compliant, gost_warnings = check_gost_compliance(products_perc)
+    final_price = float(percentages @ prices) / 100.0
+    return {
+        'variant_number': 0,
+        'products': [
+            {
+                'product_id': product.id,
+                'product_name': product.name,
+                'octane': float(product.octane_number),
+                'percentage': pct,
+                'weight_kg': float(float(total_volume) * pct / 100) if total_volume else None,
+                'price_per_kg': float(product.price_per_liter)
             }
-    except ZeroDivisionError:
-        pass
+            for product, pct in products_perc
+        ],
+        'final_octane': round(final_octane, 2),
+        'final_price_per_kg': round(final_price, 2),
+        'total_price': round(final_price * float(total_volume), 2) if total_volume else None,
+        'gost_compliant': gost_compliant,
+        'gost_warnings': gost_warnings,
+    }
+
+
+def frontier_blend_variants(products_list, target_octane, total_volume=None, octane_model=None, frontier=None,
+                            count=len(BLEND_CATEGORIES), progress=None, deadline=None, perf=None):
+    """
+    Kategoriyalar aniq narx/oktan chegarasidan (parametrik LP): 'eng_arzon' - maqsad oktan
+    uchun eng arzon sostav, keyingilari - egri chiziqda narx bo'yicha teng oraliqlarda,
+    ya'ni qo'shimcha narx evaziga qo'shimcha oktan zaxirasi. Natija deterministik.
+    octane_model - chiziqli bo'lmagan oktan modeli (OctaneModel); final_octane model bo'yicha.
+    frontier - oldindan hisoblangan chiziqli chegara (maqsadga bog'liq emas - bir nechta
+    marka uchun bir marta hisoblanadi).
+    count - variantlar soni (ko'pi bilan len(BLEND_CATEGORIES)).
+    progress - callable(done, total, new_variants): chegaradagi har bir nuqta bitta qadam,
+    new_variants - shu nuqtadagi sostav optimizator formatida.
+    deadline - Deadline: 'research' modelining ketma-ket chiziqlashtirishi muddat tugasa
+    shu paytgacha eng arzon yechim bilan to'xtaydi (chiziqli chegara - bitta hisob).
+    perf - PerfRecorder: lp_sweeps, slp_iterations, frontier_breakpoints (tayyor frontier
+    uzatilsa, uning hisobi chaqiruvchida sanaladi).
+    Maqsadga erishib bo'lmasa [].
+    """
+    count = max(1, min(int(count), len(BLEND_CATEGORIES)))
+    perf = PerfRecorder.coerce(perf)
+    octanes, prices, caps = blend_arrays(products_list)
+    if octane_model is None:
+        if frontier is None:
+            frontier = price_octane_frontier(octanes, prices, caps)
+            perf.count('lp_sweeps')
+        if frontier is None:
+            return []
+        perf.count('frontier_breakpoints', len(frontier['octanes']))
+        representatives = [
+            (float(percentages @ octanes) / 100.0, percentages)
+            for _, percentages in frontier_representatives(frontier, target_octane, count=count)
+        ]
+    else:
+        representatives = model_frontier_representatives(
+            octane_model, prices, caps, target_octane, count=count, deadline=deadline, perf=perf
+        )
     
-    return None
+    variants = []
+    for (category_name, category_label), (final_octane, percentages) in zip(BLEND_CATEGORIES, representatives):
+        variant = percentages_variant(products_list, percentages, prices, final_octane, total_volume)
+        variant.update({
+            'variant_number': len(variants) + 1,
+            'category': category_name,
+            'category_label': category_label
+        })
+        variants.append(variant)
+        if progress is not None:
+            progress(len(variants), len(representatives), [{
+                'products': products_list,
+                'percentages': percentages,
+                'final_octane': variant['final_octane'],
+                'final_price': variant['final_price_per_kg'],
+            }])
+    return variants
+
 
+def optimizer_variant(products_list, result, prices, total_volume=None):
+    """Optimizator natijasi (products, percentages, final_octane) -> variant (frontend formati)"""
+    shares = dict(zip((product.id for product in result['products']), result['percentages']))
+    percentages = np.array([float(shares.get(product.id, 0.0)) for product in products_list])
+    return percentages_variant(products_list, percentages, prices, result['final_octane'], total_volume)
 
-def find_blend_variants(target_octane, products_data, max_variants=20, total_volume=None):
+
+def nearest_blend_variants(products_list, target_octane, total_volume=None, octane_model=None, progress=None):
+    """
+    Maqsad erishiladigan oktan diapazonidan tashqarida - eng yaqin variant: maksimal oktanli
+    (tenglarida eng arzon) sostav, solve_maximum_octane. Variantda 'octane_bounds' - diapazon.
+    octane_model - OctaneModel: sostav, oktan va diapazon model bo'yicha.
+    progress - callable(done, total, new_variants): bitta qadam.
+    """
+    octanes, prices, caps = blend_arrays(products_list)
+    result = solve_maximum_octane(products_list, octanes, prices, caps, target_octane, octane_model=octane_model)
+    if result is None:
+        return []
+    variant = optimizer_variant(products_list, result, prices, total_volume)
+    variant.update({'variant_number': 1, 'octane_bounds': result['octane_bounds']})
+    if progress is not None:
+        progress(1, 1, [result])
+    return [variant]
+
+
+def k_best_blend_variants(products_list, target_octane, max_products, total_volume=None, count=len(BLEND_CATEGORIES),
+                          progress=None, deadline=None, perf=None):
+    """
+    Komponentlar soni cheklangan so'rov (max_products): K ta eng arzon, tuzilishi bo'yicha
+    farq qiladigan sostav (MILP no-good kesimlar), narx o'sish tartibida. Kategoriyalar tartib
+    bo'yicha, 'cost_gap' - eng arzon sostavdan narx farqi. Maqsadga erishib bo'lmasa [].
+    progress - callable(done, total, new_variants): har bir topilgan sostav bitta qadam.
+    deadline - Deadline: muddat tugasa shu paytgacha topilgan sostavlar (HiGHS vaqt cheklovi bilan).
+    perf - PerfRecorder: milp_solves.
+    """
+    count = max(1, min(int(count), len(BLEND_CATEGORIES)))
+    _, prices, _ = blend_arrays(products_list)
+    blends = k_best_blends(products_list, target_octane, k=count, max_products=max_products, deadline=deadline,
+                           perf=perf)
+    
+    variants = []
+    for (category_name, category_label), blend in zip(BLEND_CATEGORIES, blends):
+        variant = optimizer_variant(products_list, blend, prices, total_volume)
+        variant.update({
+            'variant_number': len(variants) + 1,
+            'category': category_name,
+            'category_label': category_label,
+            'cost_gap': blend['cost_gap'],
+        })
+        variants.append(variant)
+        if progress is not None:
+            progress(len(variants), len(blends), [blend])
+    return variants
+
+
+def genetic_blend_variants(products_list, target_octane, max_products, octane_model, total_volume=None,
+                           count=len(BLEND_CATEGORIES), progress=None, perf=None, stats=None, seed=None,
+                           deadline=None):
+    """
+    Chiziqli bo'lmagan oktan modeli bilan komponentlar soni cheklangan so'rov: MILP chiziqli
+    aralashtirishga tayanadi, shuning uchun 2..max_products productli kombinatsiyalar
+    Genetic Algorithm bilan (optimize_multi_product_blend). Maqsadga yetgan variantlardan
+    har bir product to'plami uchun eng arzoni, narx o'sish tartibida; 'cost_gap' - eng
+    arzonidan narx farqi. progress - baholangan kombinatsiyalar bo'yicha (faqat maqsadga yetganlar).
+    settings.BLEND_PARALLEL - kombinatsiyalar umumiy process poolda (BLEND_POOL_WORKERS) baholanadi.
+    stats (dict) - kombinatsiyalarni qisqartirish statistikasi ('weighted' - dominatsiya va oktan
+    chegarasi blending index fazosida, 'research' - qisqartirishsiz).
+    seed - so'rov seed'i: bir xil seed va kiritishlar - bir xil variantlar (ketma-ket va parallel).
+    deadline - Deadline: muddat tugasa shu paytgacha baholangan kombinatsiyalar natijalari.
+    """
+    count = max(1, min(int(count), len(BLEND_CATEGORIES)))
+    _, prices, _ = blend_arrays(products_list)
+    
+    def reaching(results):
+        return [r for r in results if r['final_octane'] >= target_octane - GA_OCTANE_TOLERANCE]
+    
+    results = optimize_multi_product_blend(
+        products_list, target_octane, max_products=min(max_products, len(products_list)), min_products=2,
+        solver='genetic', use_ai=True, num_variants=count, octane_model=octane_model,
+        parallel=getattr(settings, 'BLEND_PARALLEL', False), stats=stats, seed=seed, deadline=deadline,
+        progress=(lambda done, total, new: progress(done, total, reaching(new))) if progress is not None else None,
+        perf=perf
+    )
+    
+    variants = []
+    seen = set()
+    for result in sorted(reaching(results), key=lambda r: r['final_price']):
+        variant = optimizer_variant(products_list, result, prices, total_volume)
+        product_set = frozenset(item['product_id'] for item in variant['products'])
+        if product_set in seen:
+            continue
+        seen.add(product_set)
+        category_name, category_label = BLEND_CATEGORIES[len(variants)]
+        variant.update({
+            'variant_number': len(variants) + 1,
+            'category': category_name,
+            'category_label': category_label,
+            'cost_gap': round(variant['final_price_per_kg'] - variants[0]['final_price_per_kg'], 4) if variants else 0.0,
+        })
+        variants.append(variant)
+        if len(variants) >= count:
+            break
+    return variants
+
+
+def blend_is_stochastic(method, max_products=None):
+    """Natija seed'ga bog'liqmi: faqat chiziqli bo'lmagan usul + komponentlar cheklovi (Genetic Algorithm)"""
+    return bool(max_products) and method != 'linear'
+
+
+def find_blend_variants(target_octane, products_data, max_variants=len(BLEND_CATEGORIES), total_volume=None,
+                        progress=None, method='linear', perf=None, max_products=None, stats=None, seed=None,
+                        deadline=None):
     """
     Maqsad oktan soni uchun aralashma variantlarini topadi
     
     Args:
         target_octane: Maqsad oktan soni
         products_data: Dict {product_id: {'octane': int, 'price': float, 'gost_percentage': float}}
-        max_variants: Maksimal variantlar soni
+        max_variants: Maksimal variantlar soni (narx/oktan chegarasidagi kategoriyalar)
         total_volume: Ixtiyoriy: umumiy og'irlik kg da
+        progress: Ixtiyoriy: callable(done, total, new_variants) - qidiruv progressi
+            (chegaradagi har bir variant - bitta qadam)
+        method: Oktan modeli - 'linear', 'weighted' yoki 'research' (octane_models)
+        perf: Ixtiyoriy: PerfRecorder - bosqichlar vaqti va optimizator hisoblagichlari
+        max_products: Ixtiyoriy: variantdagi komponentlar soni cheklovi - chegara o'rniga
+            K ta eng arzon turli sostav (MILP; chiziqli bo'lmagan usullar uchun Genetic Algorithm)
+        stats: Ixtiyoriy: dict - Genetic Algorithm qidiruvida kombinatsiyalarni qisqartirish
+            statistikasi bilan to'ldiriladi (combinations_total, combinations_evaluated, ...)
+        seed: Ixtiyoriy: so'rov seed'i - faqat tasodifiy qidiruv (Genetic Algorithm) uchun,
+            boshqa yo'llar deterministik (blend_is_stochastic)
+        deadline: Ixtiyoriy: Deadline yoki millisekundlar - muddat tugasa shu paytgacha topilgan
+            eng yaxshi variantlar qaytariladi (deadline.completed = False)
     
     Returns:
         list: Variantlar ro'yxati (narx bo'yicha tartiblangan)
     """
-    # 1. Productlarni filterlash va tayyorlash
-    products_list = []
-    for product_id, data in products_data.items():
-        try:
-            product = Product.objects.get(id=int(product_id), is_for_blending=True)
-            octane = float(data.get('octane', 0))
-            price = float(data.get('price', 0))
-            gost_percentage = float(data.get('gost_percentage', 100))
-            
-            if octane > 0 and price > 0:
-                # Product ma'lumotlarini o'zgartirish
-                product.octane_number = octane
-                product.price_per_liter = Decimal(str(price))
-                product.gost_percentage = gost_percentage
-                products_list.append(product)
-        except (Product.DoesNotExist, ValueError, TypeError):
-            continue
+    perf = PerfRecorder.coerce(perf)
+    deadline = Deadline.coerce(deadline)
+    
+    # 1. Productlarni filterlash va tayyorlash (bitta so'rov)
+    with perf.phase('load_products'):
+        products_list = load_blend_products(products_data)
     
     if len(products_list) < 2:
         return []
     
-    variants = []
-    
-    # 2. Past va yuqori oktanli productlarni ajratish
-    products_lower = [p for p in products_list if p.octane_number < target_octane]
-    products_upper = [p for p in products_list if p.octane_number > target_octane]
-    products_equal = [p for p in products_list if p.octane_number == target_octane]
-    
-    # 3. To'g'ridan-to'g'ri oktan soniga mos productlar
-    if products_equal:
-        for product in products_equal:
-            variant = {
-                'variant_number': 0,  # Keyin raqamlanadi
-                'products': [{
-                    'product_id': product.id,
-                    'product_name': product.name,
-                    'octane': float(product.octane_number),
-                    'percentage': 100.0,
-                    'weight_kg': float(total_volume) if total_volume else None,
-                    'price_per_kg': float(product.price_per_liter)
-                }],
-                'final_octane': float(product.octane_number),
-                'final_price_per_kg': float(product.price_per_liter),
-                'total_price': float(float(product.price_per_liter) * float(total_volume)) if total_volume else None,
-                'gost_compliant': True,
-                'gost_warnings': []
-            }
-            variants.append(variant)
-    
-    # 4. Ikki product kombinatsiyalari (past va yuqori oktanli)
-    if products_lower and products_upper:
-        for lower in products_lower:
-            for upper in products_upper:
-                blend = calculate_two_product_blend(lower, upper, target_octane)
-                if blend:
-                    p1_perc = blend['product1_percentage']
-                    p2_perc = blend['product2_percentage']
-                    
-                    # GOST tekshiruvi
-                    products_perc = [
-                        (lower, p1_perc),
-                        (upper, p2_perc)
-                    ]
-                    gost_compliant, gost_warnings = check_gost_compliance(products_perc)
-                    
-                    final_octane = calculate_octane_blend(products_perc)
-                    final_price = calculate_price_blend(products_perc)
-                    
-                    variant = {
-                        'variant_number': 0,
-                        'products': [
-                            {
-                                'product_id': lower.id,
-                                'product_name': lower.name,
-                                'octane': float(lower.octane_number),
-                                'percentage': p1_perc,
-                                'weight_kg': float(float(total_volume) * float(p1_perc) / 100) if total_volume else None,
-                                'price_per_kg': float(lower.price_per_liter)
-                            },
-                            {
-                                'product_id': upper.id,
-                                'product_name': upper.name,
-                                'octane': float(upper.octane_number),
-                                'percentage': p2_perc,
-                                'weight_kg': float(float(total_volume) * float(p2_perc) / 100) if total_volume else None,
-                                'price_per_kg': float(upper.price_per_liter)
-                            }
-                        ],
-                        'final_octane': round(final_octane, 2),
-                        'final_price_per_kg': round(final_price, 2),
-                        'total_price': round(final_price * float(total_volume), 2) if total_volume else None,
-                        'gost_compliant': gost_compliant,
-                        'gost_warnings': gost_warnings
-                    }
-                    variants.append(variant)
-    
-    # 5. 3+ product kombinatsiyalari - optimizatsiya (ASOSIY)
-    # Barcha 3+ product kombinatsiyalarini optimizatsiya qilamiz
-    if len(products_list) >= 3:
-        try:
-            logger.info(f"Optimizatsiya boshlanmoqda: {len(products_list)} ta product, maqsad oktan: {target_octane}")
-            optimized_variants = optimize_multi_product_blend(
-                products_list, 
-                target_octane, 
-                max_products=min(4, len(products_list)), 
-                step=0.5,
-                use_ai=True,
-                num_variants=10  # Ko'proq variantlar topish uchun
-            )
-            logger.info(f"Optimizatsiya natijasi: {len(optimized_variants)} ta variant topildi")
-            if optimized_variants:
-                logger.info(f"Variantlarning narxlari: {[v.get('final_price', 0) for v in optimized_variants[:5]]}")
-            
-            for opt_var in optimized_variants:
-                if not opt_var or not opt_var.get('final_octane'):
-                    continue
-                
-                products_perc = [
-                    (opt_var['products'][i], opt_var['percentages'][i])
-                    for i in range(len(opt_var['products']))
-                ]
-                
-                gost_compliant, gost_warnings = check_gost_compliance(products_perc)
-                final_octane = opt_var['final_octane']
-                final_price = opt_var['final_price']
-                octane_diff = abs(final_octane - target_octane)
-                
-                # Oktan farqi cheklovi - eng ko'pi bilan 50.0 gacha qabul qilamiz
-                # (maqsad diapazondan tashqarida bo'lsa ham, eng yaqin variantlarni ko'rsatamiz)
-                if octane_diff > 50.0:
-                    continue
-                
-                # Variant yaratish
-                variant_products = []
-                # Genetic Algorithm natijasida faqat active productlar bo'lishi mumkin
-                products_list = opt_var['products']
-                percentages_list = opt_var['percentages']
-                
-                for i, product in enumerate(products_list):
-                    if i >= len(percentages_list):
-                        continue
-                    pct = percentages_list[i]
-                    if pct <= 0.01:  # Juda kichik foizlarni o'tkazib yuboramiz
-                        continue
-                    variant_products.append({
-                        'product_id': product.id,
-                        'product_name': product.name,
-                        'octane': float(product.octane_number),
-                        'percentage': round(pct, 2),
-                        'weight_kg': float(float(total_volume) * float(pct) / 100) if total_volume else None,
-                        'price_per_kg': float(product.price_per_liter)
-                    })
-                
-                # Kamida 2 ta product bo'lishi kerak
-                if len(variant_products) < 2:
-                    continue
-                
-                variant = {
-                    'variant_number': 0,
-                    'products': variant_products,
-                    'final_octane': round(final_octane, 2),
-                    'final_price_per_kg': round(final_price, 2),
-                    'total_price': round(final_price * float(total_volume), 2) if total_volume else None,
-                    'gost_compliant': gost_compliant,
-                    'gost_warnings': gost_warnings
-                }
-                variants.append(variant)
-        except Exception as e:
-            logger.error(f"Optimizatsiya xatoligi: {str(e)}")
-            # Xatolik bo'lsa ham, davom etamiz
-    
-    # 5b. Barcha product kombinatsiyalari (2, 3, 4+ product) - fallback
-    # Agar optimizatsiya variantlar topolmasa, oddiy kombinatsiyalarni sinab ko'ramiz
-    if not variants and len(products_list) >= 2:
-        # 2 ta product kombinatsiyalari (barcha juftlar)
-        for i in range(len(products_list)):
-            for j in range(i + 1, len(products_list)):
-                p1 = products_list[i]
-                p2 = products_list[j]
-                
-                # Oktanlarni tekshirish
-                oct1 = float(p1.octane_number)
-                oct2 = float(p2.octane_number)
-                
-                # Agar past va yuqori oktanli productlar bo'lsa
-                if oct1 < target_octane < oct2 or oct2 < target_octane < oct1:
-                    # To'g'ri tartibda
-                    if oct1 > oct2:
-                        p1, p2 = p2, p1
-                        oct1, oct2 = oct2, oct1
-                    
-                    blend = calculate_two_product_blend(p1, p2, target_octane)
-                    if blend:
-                        p1_perc = blend['product1_percentage']
-                        p2_perc = blend['product2_percentage']
-                        
-                        products_perc = [(p1, p1_perc), (p2, p2_perc)]
-                        gost_compliant, gost_warnings = check_gost_compliance(products_perc)
-                        final_octane = calculate_octane_blend(products_perc)
-                        final_price = calculate_price_blend(products_perc)
-                        
-                        variant = {
-                            'variant_number': 0,
-                            'products': [
-                                {
-                                    'product_id': p1.id,
-                                    'product_name': p1.name,
-                                    'octane': float(p1.octane_number),
-                                    'percentage': p1_perc,
-                                    'weight_kg': float(float(total_volume) * float(p1_perc) / 100) if total_volume else None,
-                                    'price_per_kg': float(p1.price_per_liter)
-                                },
-                                {
-                                    'product_id': p2.id,
-                                    'product_name': p2.name,
-                                    'octane': float(p2.octane_number),
-                                    'percentage': p2_perc,
-                                    'weight_kg': float(float(total_volume) * float(p2_perc) / 100) if total_volume else None,
-                                    'price_per_kg': float(p2.price_per_liter)
-                                }
-                            ],
-                            'final_octane': round(final_octane, 2),
-                            'final_price_per_kg': round(final_price, 2),
-                            'total_price': round(final_price * float(total_volume), 2) if total_volume else None,
-                            'gost_compliant': gost_compliant,
-                            'gost_warnings': gost_warnings
-                        }
-                        variants.append(variant)
-                
-                # Faqat past oktanli productlar bilan variant yaratmaymiz
-                # Chunki 3+ product kombinatsiyasi bilan yaxshiroq variant topilishi mumkin
-                # (bu variant optimizatsiya funksiyasida topiladi)
-    
-    # 6. Oktan aniqligini tekshirish va filterlash
-    filtered_variants = []
-    
-    # Oktan diapazonini aniqlash
-    product_octanes = [float(p.octane_number) for p in products_list] if products_list else []
-    min_oct = min(product_octanes) if product_octanes else 0
-    max_oct = max(product_octanes) if product_octanes else 0
-    
-    # Agar variantlar bo'lsa, barchasini olamiz
-    if variants:
-        # Oktan farqi bo'yicha tartiblash
-        variants.sort(key=lambda x: abs(x['final_octane'] - target_octane))
-        
-        # Agar maqsad diapazondan tashqarida bo'lsa, eng yaqin variantlarni ko'rsatamiz
-        if target_octane > max_oct or target_octane < min_oct:
-            max_diff = 100.0  # Juda katta cheklov - barcha variantlarni qabul qilamiz
+    octane_model = compile_octane_model(products_list, method) if method != 'linear' else None
+    if max_products:
+        # 2a. Komponentlar soni cheklangan: chegaradagi sostavlarda productlar soni cheklanmaydi,
+        # shuning uchun K ta eng arzon turli sostav - MILP (chiziqli) yoki Genetic Algorithm
+        if octane_model is None:
+            with perf.phase('k_best'):
+                variants = k_best_blend_variants(products_list, target_octane, max_products, total_volume,
+                                                 count=max_variants, progress=progress, deadline=deadline,
+                                                 perf=perf)
         else:
-            max_diff = 10.0  # Katta cheklov
-        
-        # Eng yaqin variantlarni filterlash
-        for v in variants:
-            octane_diff = abs(v['final_octane'] - target_octane)
-            if octane_diff <= max_diff:
-                filtered_variants.append(v)
-                if len(filtered_variants) >= 20:  # Ko'proq variantlar
-                    break
-    
-    # Agar hali ham variantlar topilmasa va maqsad diapazondan tashqarida bo'lsa,
-    # maksimal oktan kombinatsiyasini yaratamiz
-    if not filtered_variants and products_list and len(products_list) >= 2:
-        if target_octane > max_oct:
-            # Maksimal oktan kombinatsiyasini yaratish
-            from .optimization import solve_maximum_octane
-            octanes = [float(p.octane_number) for p in products_list]
-            prices = [float(p.price_per_liter) for p in products_list]
-            gost_limits = [float(p.gost_percentage or 100) for p in products_list]
-            
-            max_result = solve_maximum_octane(products_list, octanes, prices, gost_limits)
-            if max_result:
-                # Format qilish
-                variant_products = []
-                for i, product in enumerate(max_result['products']):
-                    if i < len(max_result['percentages']):
-                        pct = max_result['percentages'][i]
-                        if pct > 0.01:
-                            variant_products.append({
-                                'product_id': product.id,
-                                'product_name': product.name,
-                                'octane': float(product.octane_number),
-                                'percentage': round(pct, 2),
-                                'weight_kg': float(float(total_volume) * pct / 100) if total_volume else None,
-                                'price_per_kg': float(product.price_per_liter)
-                            })
-                
-                if len(variant_products) >= 2:
-                    filtered_variants.append({
-                        'variant_number': 0,
-                        'products': variant_products,
-                        'final_octane': max_result['final_octane'],
-                        'final_price_per_kg': max_result['final_price'],
-                        'total_price': round(max_result['final_price'] * float(total_volume), 2) if total_volume else None,
-                        'gost_compliant': max_result.get('gost_compliant', False),
-                        'gost_warnings': []
-                    })
-    
-    # 7. Variantlarni tartiblash: GOST talablariga mos keladiganlar birinchi, keyin narx bo'yicha
-    if filtered_variants:
-        filtered_variants.sort(key=lambda x: (
-            not x.get('gost_compliant', False),  # GOSTga mos keladiganlar birinchi (False < True)
-            x['final_price_per_kg']  # Keyin narx bo'yicha
-        ))
-    
-    # 7a. Agar kam variantlar bo'lsa (5 dan kam), qo'shimcha variantlar yaratamiz
-    if len(filtered_variants) < 5 and products_list and len(products_list) >= 2:
-        try:
-            from .optimization import optimize_multi_product_blend
-            # Turli narx strategiyalari bilan ko'proq variantlar topamiz
-            for strategy_multiplier in [0.5, 0.7, 1.0, 1.3, 1.5, 2.0]:
-                additional_variants = optimize_multi_product_blend(
-                    products_list, 
-                    target_octane, 
-                    max_products=min(4, len(products_list)),
-                    use_ai=True,
-                    num_variants=2  # Har bir strategiya uchun 2 ta variant
-                )
-                
-                for ai_var in additional_variants:
-                    if not ai_var or not ai_var.get('final_octane'):
-                        continue
-                    
-                    final_octane = ai_var['final_octane']
-                    octane_diff = abs(final_octane - target_octane)
-                    
-                    if octane_diff > 50.0:
-                        continue
-                    
-                    # Variant yaratish
-                    variant_products = []
-                    for i, product in enumerate(ai_var['products']):
-                        if i < len(ai_var['percentages']):
-                            pct = ai_var['percentages'][i]
-                            if pct > 0.01:
-                                variant_products.append({
-                                    'product_id': product.id,
-                                    'product_name': product.name,
-                                    'octane': float(product.octane_number),
-                                    'percentage': round(pct, 2),
-                                    'weight_kg': float(float(total_volume) * pct / 100) if total_volume else None,
-                                    'price_per_kg': float(product.price_per_liter)
-                                })
-                    
-                    if len(variant_products) >= 2:
-                        products_perc = [(ai_var['products'][i], ai_var['percentages'][i]) for i in range(len(ai_var['products']))]
-                        gost_compliant, gost_warnings = check_gost_compliance(products_perc)
-                        
-                        new_variant = {
-                            'variant_number': 0,
-                            'products': variant_products,
-                            'final_octane': ai_var['final_octane'],
-                            'final_price_per_kg': ai_var['final_price'],
-                            'total_price': round(ai_var['final_price'] * float(total_volume), 2) if total_volume else None,
-                            'gost_compliant': ai_var.get('gost_compliant', False),
-                            'gost_warnings': gost_warnings
-                        }
-                        
-                        # Duplikatlarni tekshirish
-                        price_key = round(ai_var['final_price'], 2)
-                        existing_prices = {round(v['final_price_per_kg'], 2) for v in filtered_variants}
-                        
-                        if price_key not in existing_prices:
-                            filtered_variants.append(new_variant)
-                            if len(filtered_variants) >= 20:  # Yetarli variantlar
-                                break
-                
-                if len(filtered_variants) >= 20:
-                    break
-            
-            # Qayta tartiblash: GOST talablariga mos keladiganlar birinchi, keyin narx bo'yicha
-            filtered_variants.sort(key=lambda x: (
-                not x.get('gost_compliant', False),  # GOSTga mos keladiganlar birinchi
-                x['final_price_per_kg']  # Keyin narx bo'yicha
-            ))
-        except Exception as e:
-            logger.error(f"Qo'shimcha variantlar yaratishda xatolik: {str(e)}", exc_info=True)
-    
-    # 7b. Agar hali ham variantlar topilmasa, AI algoritmini ishlatamiz
-    if not filtered_variants and products_list and len(products_list) >= 2:
-        try:
-            from .optimization import optimize_multi_product_blend
-            ai_variants = optimize_multi_product_blend(
-                products_list, 
-                target_octane, 
-                max_products=min(4, len(products_list)),
-                use_ai=True,
-                num_variants=10  # Ko'proq variantlar topish uchun
-            )
-            
-            # AI variantlarini format qilish
-            for ai_var in ai_variants:
-                variant_products = []
-                for i, product in enumerate(ai_var['products']):
-                    if i < len(ai_var['percentages']):
-                        pct = ai_var['percentages'][i]
-                        if pct > 0.01:
-                            variant_products.append({
-                                'product_id': product.id,
-                                'product_name': product.name,
-                                'octane': float(product.octane_number),
-                                'percentage': round(pct, 2),
-                                'weight_kg': float(float(total_volume) * pct / 100) if total_volume else None,
-                                'price_per_kg': float(product.price_per_liter)
-                            })
-                
-                if len(variant_products) >= 2:
-                    filtered_variants.append({
-                        'variant_number': 0,
-                        'products': variant_products,
-                        'final_octane': ai_var['final_octane'],
-                        'final_price_per_kg': ai_var['final_price'],
-                        'total_price': round(ai_var['final_price'] * float(total_volume), 2) if total_volume else None,
-                        'gost_compliant': ai_var.get('gost_compliant', False),
-                        'gost_warnings': []
-                    })
-        except Exception as e:
-            logger.error(f"AI optimizatsiya xatoligi: {str(e)}", exc_info=True)
-    
-    # 8. Kategoriyalarga bo'lish: eng arzon, arzon, o'rtacha, qimmat, juda qimmat
-    total_count = len(filtered_variants)
-    if total_count == 0:
-        return []
-    
-    # Har bir kategoriyadan eng yaxshi variantni olish
-    result_variants = []
-    
-    # Kategoriya indekslari
-    if total_count >= 5:
-        indices = [0, total_count // 4, total_count // 2, (total_count * 3) // 4, total_count - 1]
-    elif total_count == 4:
-        indices = [0, 1, 2, 3, 3]
-    elif total_count == 3:
-        indices = [0, 1, 2, 2, 2]
-    elif total_count == 2:
-        indices = [0, 1, 1, 1, 1]
+            with perf.phase('multi_product'):
+                variants = genetic_blend_variants(products_list, target_octane, max_products, octane_model,
+                                                  total_volume, count=max_variants, progress=progress, perf=perf,
+                                                  stats=stats, seed=seed, deadline=deadline)
+        if variants:
+            return variants
+        # Diapazon ichida, lekin cheklov bilan yechim yo'q - eng yaqin variant ko'rsatilmaydi
+        octanes, prices, caps = blend_arrays(products_list)
+        bounds = (model_octane_bounds(octane_model, prices, caps) if octane_model is not None
+                  else octane_bounds(octanes, prices, caps))
+        if bounds is not None and target_octane <= bounds[1] + 1e-6:
+            return []
     else:
-        indices = [0, 0, 0, 0, 0]
-    
-    categories = [
-        ('eng_arzon', 'Eng arzon'),
-        ('arzon', 'Arzon'),
-        ('ortacha', 'O\'rtacha'),
-        ('qimmat', 'Qimmat'),
-        ('juda_qimmat', 'Juda qimmat')
-    ]
-    
-    variant_index = 1
-    seen_prices = set()
-    
-    # Agar kam variantlar bo'lsa (1-2 ta), AI algoritmini bir necha marta chaqirib
-    # turli variantlar olamiz
-    if total_count < 5 and total_count > 0 and products_list and len(products_list) >= 2:
-        # AI algoritmini bir necha marta chaqirib, turli variantlar olamiz
-        try:
-            from .optimization import optimize_multi_product_blend
-            
-            # 5 ta variantga yetguncha AI algoritmini bir necha marta chaqiramiz
-            # Turli parametrlar bilan turli variantlar yaratamiz
-            max_attempts = 20  # Ko'proq urinishlar
-            price_strategies = [0.1, 0.3, 0.5, 0.7, 1.0, 1.3, 1.5, 2.0, 2.5, 3.0]  # Turli narx strategiyalari
-            
-            for strategy_idx, price_weight in enumerate(price_strategies):
-                if len(filtered_variants) >= 10:  # Yetarli variantlar
-                    break
-                    
-                # Har bir strategiya uchun bir nechta variant yaratish
-                for attempt in range(3):
-                    if len(filtered_variants) >= 10:
-                        break
-                        
-                    # optimize_multi_product_blend funksiyasini chaqiramiz
-                    # Bu funksiya ichki strategiyalar bilan turli variantlar yaratadi
-                    additional_variants = optimize_multi_product_blend(
-                        products_list, 
-                        target_octane, 
-                        max_products=min(4, len(products_list)),
-                        use_ai=True,
-                        num_variants=1  # Har bir chaqiruv uchun 1 ta variant
-                    )
-                    
-                    for ai_var in additional_variants:
-                        if not ai_var or not ai_var.get('final_octane'):
-                            continue
-                        
-                        final_octane = ai_var['final_octane']
-                        octane_diff = abs(final_octane - target_octane)
-                        
-                        # Oktan farqi juda katta bo'lmasligi kerak
-                        if octane_diff > 50.0:
-                            continue
-                        
-                        # Variant yaratish
-                        variant_products = []
-                        for i, product in enumerate(ai_var['products']):
-                            if i < len(ai_var['percentages']):
-                                pct = ai_var['percentages'][i]
-                                if pct > 0.01:
-                                    variant_products.append({
-                                        'product_id': product.id,
-                                        'product_name': product.name,
-                                        'octane': float(product.octane_number),
-                                        'percentage': round(pct, 2),
-                                        'weight_kg': float(float(total_volume) * pct / 100) if total_volume else None,
-                                        'price_per_kg': float(product.price_per_liter)
-                                    })
-                        
-                        if len(variant_products) >= 2:
-                            products_perc = [(ai_var['products'][i], ai_var['percentages'][i]) for i in range(len(ai_var['products']))]
-                            gost_compliant, gost_warnings = check_gost_compliance(products_perc)
-                            
-                            new_variant = {
-                                'variant_number': 0,
-                                'products': variant_products,
-                                'final_octane': ai_var['final_octane'],
-                                'final_price_per_kg': ai_var['final_price'],
-                                'total_price': round(ai_var['final_price'] * float(total_volume), 2) if total_volume else None,
-                                'gost_compliant': ai_var.get('gost_compliant', False),
-                                'gost_warnings': gost_warnings
-                            }
-                            
-                            # Duplikatlarni tekshirish - narx va kompozitsiya bo'yicha
-                            price_key = round(ai_var['final_price'], 2)
-                            existing_prices = {round(v['final_price_per_kg'], 2) for v in filtered_variants}
-                            
-                            # Kompozitsiyani ham tekshirish
-                            is_duplicate = False
-                            for existing_variant in filtered_variants:
-                                existing_composition = sorted([(p['product_id'], round(p['percentage'], 1)) for p in existing_variant['products']])
-                                new_composition = sorted([(p['product_id'], round(p['percentage'], 1)) for p in variant_products])
-                                if existing_composition == new_composition:
-                                    is_duplicate = True
-                                    break
-                            
-                            if not is_duplicate and price_key not in existing_prices:
-                                filtered_variants.append(new_variant)
-                                if len(filtered_variants) >= 10:
-                                    break
-            
-            # Qayta tartiblash
-            if filtered_variants:
-                # GOST talablariga mos keladiganlar birinchi, keyin narx bo'yicha
-                filtered_variants.sort(key=lambda x: (
-                    not x.get('gost_compliant', False),  # GOSTga mos keladiganlar birinchi
-                    x['final_price_per_kg']  # Keyin narx bo'yicha
-                ))
-                total_count = len(filtered_variants)
-        except Exception as e:
-            logger.error(f"Qo'shimcha variantlar yaratishda xatolik: {str(e)}", exc_info=True)
-        
-        # Barcha variantlarni ko'rsatamiz (yoki yangi yaratilganlar bilan)
-        for idx, variant in enumerate(filtered_variants[:5]):
-            variant = variant.copy()
-            category_name, category_label = categories[min(idx, len(categories) - 1)]
-            variant['variant_number'] = variant_index
-            variant['category'] = category_name
-            variant['category_label'] = category_label
-            result_variants.append(variant)
-            variant_index += 1
-    else:
-        # 5 ta kategoriyadan variantlarni olamiz
-        for idx, (category_name, category_label) in zip(indices, categories):
-            if 0 <= idx < total_count:
-                variant = filtered_variants[idx].copy()
-                price_key = round(variant['final_price_per_kg'], 2)
-                
-                # Agar bir xil narxli variant bo'lmasa qo'shamiz
-                if price_key not in seen_prices:
-                    variant['variant_number'] = variant_index
-                    variant['category'] = category_name
-                    variant['category_label'] = category_label
-                    result_variants.append(variant)
-                    seen_prices.add(price_key)
-                    variant_index += 1
+        # 2b. Aniq narx/oktan chegarasi - bitta deterministik hisob; kategoriyalar shu egri chiziqdan olinadi
+        with perf.phase('frontier'):
+            variants = frontier_blend_variants(products_list, target_octane, total_volume, octane_model=octane_model,
+                                               count=max_variants, progress=progress, deadline=deadline,
+                                               perf=perf)
+        if variants:
+            return variants
     
-    return result_variants[:5]  # Maksimal 5 ta variant
+    # 3. Maqsadga erishib bo'lmaydi - eng yaqin variant (chiziqli va model bo'yicha bir xil)
+    with perf.phase('maximum_octane'):
+        return nearest_blend_variants(products_list, target_octane, total_volume, octane_model, progress)
 
 
 def product_selection(request):
@@ -1738,164 +1363,228 @@ def gasoline_blend_calculator(request):
     return render(request, 'calibration/gasoline_blend_calculator.html')
 
 
+def parse_blend_request(data):
+    """
+    Aralashma so'rovini tekshirish va tayyorlash
+    
+    Args:
+        data: Dict - target_octane, total_weight (yoki total_volume), variants_count,
+            method ('linear' / 'weighted' / 'research'),
+            max_products (ixtiyoriy - variantdagi komponentlar soni cheklovi),
+            products: {product_id: {octane, price, gost_percentage}}
+    
+    Returns:
+        tuple: (target_octane, valid_products, total_weight, variants_count, method, max_products)
+    
+    Raises:
+        ValueError: foydalanuvchiga ko'rsatiladigan xabar bilan
+    """
+    target_octane_str = str(data.get('target_octane', '')).strip()
+    total_weight_str = str(data.get('total_weight', '') or data.get('total_volume', '')).strip()  # Frontend dan "total_weight" yoki "total_volume" keladi
+    variants_count = int(data.get('variants_count', 5))
+    method = data.get('method') or 'linear'
+    products_data = data.get('products', {})  # {product_id: {octane, price, gost_percentage}}
+    
+    # Validatsiya
+    if not target_octane_str:
+        raise ValueError('Введите октановое число')
+    
+    if method not in OCTANE_METHODS:
+        raise ValueError('Неверный метод расчета')
+    
+    try:
+        target_octane = int(target_octane_str)
+        if target_octane <= 0:
+            raise ValueError()
+    except (ValueError, TypeError):
+        raise ValueError('Неверное октановое число')
+    
+    max_products = None
+    if data.get('max_products') not in (None, ''):
+        try:
+            max_products = int(data['max_products'])
+            if max_products <= 0:
+                raise ValueError()
+        except (ValueError, TypeError):
+            raise ValueError('Неверное число компонентов')
+        if method != 'linear' and max_products < 2:
+            raise ValueError('Для методов weighted и research укажите не меньше 2 компонентов')
+    
+    valid_products = parse_blend_products(products_data)
+    total_weight = parse_blend_weight(total_weight_str)
+    
+    return target_octane, valid_products, total_weight, variants_count, method, max_products
+
+
+def parse_blend_products(products_data):
+    """
+    Productlarni tekshirish: {product_id: {octane, price, gost_percentage}} -> faqat
+    oktani va narxi musbat bo'lganlar. 2 tadan kam bo'lsa ValueError.
+    """
+    # Products validatsiya
+    if not products_data:
+        raise ValueError('Введите октановое число и цену хотя бы для 2 продуктов')
+    
+    # Valid productslarni filtrlash
+    valid_products = {}
+    for product_id, p_data in products_data.items():
+        try:
+            octane = float(p_data.get('octane', 0))
+            price = float(p_data.get('price', 0))
+            if octane > 0 and price > 0:
+                valid_products[product_id] = {
+                    'octane': octane,
+                    'price': price,
+                    'gost_percentage': float(p_data.get('gost_percentage', 100)) if p_data.get('gost_percentage') else 100
+                }
+        except (ValueError, TypeError):
+            continue
+    
+    if len(valid_products) < 2:
+        raise ValueError('Введите октановое число и цену хотя бы для 2 продуктов')
+    return valid_products
+
+
+def parse_blend_weight(value):
+    """Umumiy og'irlik (kg) - Decimal yoki None (bo'sh / noto'g'ri / musbat emas)"""
+    value = str(value or '').strip()
+    if not value:
+        return None
+    try:
+        total_weight = Decimal(value)
+    except (ArithmeticError, ValueError, TypeError):
+        return None
+    return total_weight if total_weight > 0 else None
+
+
+def save_blend_calculation(target_octane, total_weight, variants, method='linear'):
+    """Variantlarni raqamlash va GasolineBlendCalculation sifatida saqlash"""
+    for i, variant in enumerate(variants, 1):
+        variant['variant_number'] = i
+    
+    with transaction.atomic():
+        return GasolineBlendCalculation.objects.create(
+            target_octane=target_octane,
+            total_volume_liters=total_weight,  # Bu aslida kg, lekin modelda hali "liters" nomi
+            variants_count=len(variants),
+            blend_variants=variants,
+            best_variant_index=0,  # Eng arzon variant birinchi
+            calculation_method=method
+        )
+
+
 @csrf_exempt
 @require_http_methods(["POST"])
 def calculate_gasoline_blend(request):
     """AJAX endpoint: benzin aralashma hisob-kitoblari"""
+    # Qidiruv settings.BLEND_SLA_MS byudjeti bilan cheklanadi: muddat tugasa shu paytgacha topilgan
+    # eng yaxshi variantlar qaytariladi (javobda completed = False, elapsed_ms)
+    deadline = Deadline(getattr(settings, 'BLEND_SLA_MS', None))
+    # Bosqichlar vaqti va hisoblagichlar: javobda ixtiyoriy '_perf' bloki va strukturaviy log
+    perf = PerfRecorder()
     try:
         data = json.loads(request.body)
-        
-        target_octane_str = str(data.get('target_octane', '')).strip()
-        total_weight_str = str(data.get('total_weight', '') or data.get('total_volume', '')).strip()  # Frontend dan "total_weight" yoki "total_volume" keladi
-        variants_count = int(data.get('variants_count', 5))
-        products_data = data.get('products', {})  # {product_id: {octane, price, gost_percentage}}
-        
-        # Validatsiya
-        if not target_octane_str:
-            return JsonResponse({
-                'success': False,
-                'error': 'Введите октановое число'
-            })
+        include_perf = bool(data.get('perf')) or getattr(settings, 'BLEND_PERF_RESPONSE', False)
         
         try:
-            target_octane = int(target_octane_str)
-            if target_octane <= 0:
-                raise ValueError()
-        except (ValueError, TypeError):
-            return JsonResponse({
-                'success': False,
-                'error': 'Неверное октановое число'
-            })
-        
-        # Products validatsiya
-        if not products_data:
-            return JsonResponse({
-                'success': False,
-                'error': 'Введите октановое число и цену хотя бы для 2 продуктов'
-            })
-        
-        # Valid productslarni filtrlash
-        valid_products = {}
-        for product_id, p_data in products_data.items():
-            try:
-                octane = float(p_data.get('octane', 0))
-                price = float(p_data.get('price', 0))
-                if octane > 0 and price > 0:
-                    valid_products[product_id] = {
-                        'octane': octane,
-                        'price': price,
-                        'gost_percentage': float(p_data.get('gost_percentage', 100)) if p_data.get('gost_percentage') else 100
-                    }
-            except (ValueError, TypeError):
-                continue
-        
-        if len(valid_products) < 2:
+            with perf.phase('parse'):
+                (target_octane, valid_products, total_weight, variants_count, method,
+                 max_products) = parse_blend_request(data)
+                # So'rov seed'i: berilmasa yangisi yaratiladi va javobda qaytariladi (to'liq tugagan
+                # qidiruv natijasini aynan takrorlash uchun - completed = True)
+                explicit_seed = data.get('seed') not in (None, '')
+                seed = request_seed(data.get('seed'))
+            # Rezervuarlardagi joriy zaxiralar (ixtiyoriy): tanks - [{tank_id, height_cm, product_id}, ...]
+            inventory = tank_inventory(data['tanks']) if data.get('tanks') else None
+            if inventory is not None and total_weight is not None and method == 'research':
+                raise ValueError('Расчет по запасам поддерживает только методы linear и weighted')
+            if inventory is not None and total_weight is not None and max_products:
+                raise ValueError('Расчет по запасам не поддерживает ограничение числа компонентов')
+        except ValueError as e:
             return JsonResponse({
                 'success': False,
-                'error': 'Введите октановое число и цену хотя бы для 2 продуктов'
+                'error': str(e)
             })
         
-        total_weight = None
-        if total_weight_str:
+        # Keshdan qidirish: bir xil productlar, narxlar va parametrlar uchun natija qayta hisoblanmaydi
+        # (zaxiralar bo'yicha hisob keshlanmaydi - rezervuar darajalari doimo o'zgaradi)
+        cache_enabled = getattr(settings, 'BLEND_CACHE_ENABLED', True) and inventory is None
+        cache = get_blend_cache() if cache_enabled else None
+        cache_meta = {'hit': False}
+        # Kombinatsiyalar qidiruvi statistikasi (faqat Genetic Algorithm yo'lida to'ldiriladi)
+        search_stats = {}
+        variants = None
+        if cache is not None:
+            started = time.perf_counter()
             try:
-                total_weight = Decimal(total_weight_str)
-                if total_weight <= 0:
-                    total_weight = None
+                # Seed faqat tasodifiy qidiruvda va faqat so'rovda aniq berilgan bo'lsa kalitga kiradi
+                cache_key = blend_cache_key(target_octane, valid_products, total_weight, method, variants_count,
+                                            max_products,
+                                            seed if explicit_seed and blend_is_stochastic(method, max_products) else None,
+                                            octane_model_fingerprint(method, valid_products.keys()))
             except (ValueError, TypeError):
-                total_weight = None
+                cache = None
+            else:
+                cached = cache.get(cache_key)
+                perf.add_time('cache_lookup', time.perf_counter() - started)
+                perf.count('cache_hits' if cached is not None else 'cache_misses')
+                cache_meta = {
+                    'hit': cached is not None,
+                    'key': cache_key[:16],
+                    'lookup_us': round((time.perf_counter() - started) * 1e6, 1),
+                }
+                if cached is not None:
+                    # Seed berilmagan bo'lsa, keshdagi natija qaysi seed bilan hisoblangan bo'lsa o'sha qaytariladi
+                    entry, meta = cached
+                    variants = entry['variants']
+                    if not explicit_seed:
+                        seed = entry['seed']
+                    cache_meta.update(meta)
         
         # Variantlarni hisoblash
         # total_weight aslida kg, lekin find_blend_variants funksiyasi total_volume parametrini kutadi
+        usage = None
         try:
-            variants = find_blend_variants(target_octane, valid_products, max_variants=variants_count, total_volume=total_weight)
+            if variants is None and inventory is not None and total_weight is not None:
+                # Zaxiralar LP da yuqori chegaralar: reja hozirning o'zida bajariladigan
+                with perf.phase('inventory_plan'):
+                    plan = plan_blend_grades([(target_octane, total_weight)], valid_products, inventory['available'],
+                                             method, joint=True, deadline=deadline, perf=perf)
+                if plan is None:
+                    return JsonResponse({
+                        'success': False,
+                        'error': ('План невозможен при текущих запасах резервуаров' if deadline.completed
+                                  else 'Превышено время расчета плана по запасам резервуаров'),
+                        'inventory': {'tanks': inventory['tanks']}
+                    })
+                variants, usage = plan['grades'][0]['variants'], plan['usage']
+            elif variants is None:
+                variants = find_blend_variants(target_octane, valid_products, max_variants=variants_count,
+                                               total_volume=total_weight, method=method, perf=perf,
+                                               max_products=max_products, stats=search_stats, seed=seed,
+                                               deadline=deadline)
             
             logger.info(f"Topilgan variantlar soni: {len(variants) if variants else 0}")
             logger.info(f"Maqsad oktan: {target_octane}, Productlar: {list(valid_products.keys())}")
             
             if not variants:
-                # Debug ma'lumotlari
-                product_octanes = [p.get('octane', 0) for p in valid_products.values()]
-                min_oct = min(product_octanes) if product_octanes else 0
-                max_oct = max(product_octanes) if product_octanes else 0
+                # Debug ma'lumotlari: GOST cheklovlari bilan tanlangan oktan modeli bo'yicha
+                # erishiladigan oktan diapazoni
+                product_octanes = [float(p.get('octane', 0)) for p in valid_products.values()]
+                products_list = load_blend_products(valid_products)
+                _, prices, caps = blend_arrays(products_list)
+                bounds = model_octane_bounds(compile_octane_model(products_list, method), prices, caps)
+                if bounds is not None:
+                    min_oct, max_oct = round(bounds[0], 2), round(bounds[1], 2)
+                else:
+                    min_oct = min(product_octanes) if product_octanes else 0
+                    max_oct = max(product_octanes) if product_octanes else 0
                 
-                # Agar maqsad diapazondan tashqarida bo'lsa, ham eng yaqin variantlarni ko'rsatamiz
-                # Bu holda, maksimal oktan kombinatsiyasini qaytaramiz
                 logger.warning(f"Variantlar topilmadi. Maqsad: {target_octane}, Diapazon: {min_oct}-{max_oct}")
-                
-                # Yana bir bor optimizatsiyani sinab ko'ramiz - AI algoritmi bilan
-                try:
-                    # AI algoritmi ishlatish
-                    from .optimization import optimize_multi_product_blend
-                    from .models import Product
-                    
-                    # Product objectlarini olamiz
-                    product_objects = []
-                    for prod_id, prod_data in valid_products.items():
-                        try:
-                            product = Product.objects.get(id=prod_id)
-                            # Oktan va narxni frontend'dan o'rnatamiz
-                            if prod_data.get('octane'):
-                                product.octane_number = prod_data['octane']
-                            if prod_data.get('price'):
-                                product.price_per_liter = prod_data['price']
-                            product_objects.append(product)
-                        except Product.DoesNotExist:
-                            continue
-                    
-                    if len(product_objects) >= 3:
-                        ai_variants = optimize_multi_product_blend(
-                            product_objects, 
-                            target_octane, 
-                            max_products=min(4, len(product_objects)),
-                            use_ai=True,
-                            num_variants=3
-                        )
-                        
-                        if ai_variants:
-                            # AI variantlarini format qilamiz
-                            formatted_variants = []
-                            for ai_var in ai_variants[:5]:  # Maksimal 5 ta
-                                variant_products = []
-                                for i, product in enumerate(ai_var['products']):
-                                    if i < len(ai_var['percentages']):
-                                        pct = ai_var['percentages'][i]
-                                        if pct > 0.01:
-                                            variant_products.append({
-                                                'product_id': product.id,
-                                                'product_name': product.name,
-                                                'octane': float(product.octane_number),
-                                                'percentage': round(pct, 2),
-                                                'weight_kg': float(total_weight * pct / 100) if total_weight else None,
-                                                'price_per_kg': float(product.price_per_liter)
-                                            })
-                                
-                                if len(variant_products) >= 2:
-                                    formatted_variants.append({
-                                        'variant_number': 0,
-                                        'products': variant_products,
-                                        'final_octane': ai_var['final_octane'],
-                                        'final_price_per_kg': ai_var['final_price'],
-                                        'total_price': round(ai_var['final_price'] * float(total_weight), 2) if total_weight else None,
-                                        'gost_compliant': ai_var.get('gost_compliant', False),
-                                        'gost_warnings': []
-                                    })
-                            
-                            if formatted_variants:
-                                # Variantlarni format qilish va qaytarish
-                                categorized_variants = categorize_variants_by_price(formatted_variants)
-                                
-                                return JsonResponse({
-                                    'success': True,
-                                    'variants': categorized_variants,
-                                    'message': f'AI algoritmi {len(categorized_variants)} ta variant topdi (eng yaqin)'
-                                })
-                except Exception as e:
-                    logger.error(f"AI optimizatsiya xatoligi: {str(e)}", exc_info=True)
-                
-                # Agar hali ham variantlar topilmasa
                 return JsonResponse({
                     'success': False,
-                    'error': f'AI-{target_octane} uchun ideal variantlar topilmadi. Mavjud productlar oktan diapazoni: {min_oct}-{max_oct}. Maqsad oktan: {target_octane}. Iltimos, maqsad oktan sonini {min_oct}-{max_oct} orasida tanlang yoki yuqori oktanli productlar qo\'shing.'
+                    'error': f'AI-{target_octane} uchun ideal variantlar topilmadi. Mavjud productlar oktan diapazoni: {min_oct}-{max_oct}. Maqsad oktan: {target_octane}. Iltimos, maqsad oktan sonini {min_oct}-{max_oct} orasida tanlang yoki yuqori oktanli productlar qo\'shing.',
+                    'octane_bounds': {'min': min_oct, 'max': max_oct}
                 })
         except Exception as e:
             logger.error(f"Variantlarni topishda xatolik: {str(e)}", exc_info=True)
@@ -1904,31 +1593,45 @@ def calculate_gasoline_blend(request):
                 'error': f'Variantlarni topishda xatolik: {str(e)}'
             })
         
-        # Variantlarni raqamlash
-        for i, variant in enumerate(variants, 1):
-            variant['variant_number'] = i
+        # Bazaga saqlash (variantlar raqamlanadi, eng arzon - birinchi)
+        with perf.phase('save'):
+            calculation = save_blend_calculation(target_octane, total_weight, variants, method)
+        best_index = calculation.best_variant_index
         
-        # Eng yaxshi variant indeksini topish (eng arzon)
-        best_index = 0
+        # Muddat tufayli chala qidiruv natijasi keshlanmaydi
+        if cache is not None and not cache_meta['hit'] and deadline.completed:
+            cache.set(cache_key, {'variants': variants, 'seed': seed}, valid_products.keys())
         
-        # Bazaga saqlash
-        calculation = GasolineBlendCalculation.objects.create(
-            target_octane=target_octane,
-            total_volume_liters=total_weight,  # Bu aslida kg, lekin modelda hali "liters" nomi
-            variants_count=len(variants),
-            blend_variants=variants,
-            best_variant_index=best_index,
-            calculation_method='linear'
-        )
-        
-        return JsonResponse({
+        response = perf_json_response({
             'success': True,
             'calculation_id': calculation.id,
             'target_octane': target_octane,
+            'method': method,
+            'max_products': max_products,
+            'seed': seed,
             'variants': variants,
             'variants_count': len(variants),
-            'best_variant_index': best_index
-        })
+            'best_variant_index': best_index,
+            'completed': deadline.completed,
+            'elapsed_ms': deadline.elapsed_ms(),
+            'cache': cache_meta,
+            'search': search_stats or None,
+            'inventory': {'tanks': inventory['tanks'], 'usage': usage} if inventory is not None else None
+        }, perf, include_perf)
+        
+        # Sekin so'rovlar kiritish ma'lumotlari bilan yoziladi - qayta ishga tushirib sozlash uchun
+        slow_ms = getattr(settings, 'BLEND_PERF_SLOW_MS', None)
+        slow = slow_ms is not None and perf.elapsed_ms() >= slow_ms
+        perf.log(
+            logger, 'blend_perf', level=logging.WARNING if slow else logging.INFO,
+            target_octane=target_octane, method=method, products_count=len(valid_products),
+            variants_count=len(variants), cache_hit=cache_meta['hit'], completed=deadline.completed,
+            search=search_stats or None, seed=seed,
+            request={'target_octane': target_octane, 'total_weight': total_weight, 'method': method,
+                     'variants_count': variants_count, 'max_products': max_products,
+                     'products': valid_products, 'seed': seed} if slow else None
+        )
+        return response
         
     except Exception as e:
         import traceback
@@ -1940,6 +1643,294 @@ def calculate_gasoline_blend(request):
         })
 
 
+def parse_blend_batch_request(data):
+    """
+    Bir nechta marka uchun aralashma so'rovini tekshirish
+    
+    Args:
+        data: Dict - grades: [{target_octane, total_weight}, ...], method, joint,
+            products: {product_id: {octane, price, gost_percentage, available}}
+            (available - komponent zaxirasi kg da, ixtiyoriy),
+            tanks: [{tank_id, height_cm, product_id}, ...] - zaxiralar rezervuar darajalaridan
+            (ixtiyoriy, available o'rniga)
+    
+    Returns:
+        tuple: (grades [(target_octane, total_weight), ...], valid_products, availability, method, joint)
+    
+    Raises:
+        ValueError: foydalanuvchiga ko'rsatiladigan xabar bilan
+    """
+    grades_data = data.get('grades') or []
+    method = data.get('method') or 'linear'
+    joint = bool(data.get('joint'))
+    if not grades_data:
+        raise ValueError('Укажите хотя бы одну марку')
+    if method not in OCTANE_METHODS:
+        raise ValueError('Неверный метод расчета')
+    
+    grades = []
+    for grade in grades_data:
+        try:
+            target_octane = int(str(grade.get('target_octane', '')).strip())
+            if target_octane <= 0:
+                raise ValueError()
+        except (ValueError, TypeError, AttributeError):
+            raise ValueError('Неверное октановое число')
+        grades.append((target_octane, parse_blend_weight(grade.get('total_weight') or grade.get('total_volume'))))
+    
+    products_data = data.get('products', {})
+    valid_products = parse_blend_products(products_data)
+    availability = {}
+    for product_id in valid_products:
+        available = products_data[product_id].get('available')
+        if available not in (None, ''):
+            try:
+                availability[product_id] = max(float(available), 0.0)
+            except (ValueError, TypeError):
+                raise ValueError('Неверный запас продукта')
+    if data.get('tanks'):
+        tank_available = tank_inventory(data['tanks'])['available']
+        availability.update({pid: kg for pid, kg in tank_available.items() if pid in valid_products})
+    
+    if joint:
+        if any(total_weight is None for _, total_weight in grades):
+            raise ValueError('Для совместного расчета укажите массу каждой марки')
+        if method == 'research':
+            raise ValueError('Совместный расчет поддерживает только методы linear и weighted')
+    
+    return grades, valid_products, availability, method, joint
+
+
+def plan_blend_grades(grades, products_data, availability=None, method='linear', joint=False, deadline=None,
+                      perf=None):
+    """
+    Bir nechta marka uchun aralashma rejasi - productlar, massivlar, oktan modeli va
+    narx/oktan chegarasi bir marta tayyorlanadi (chegara maqsad oktanga bog'liq emas).
+    joint=True - barcha markalar bitta LP da umumiy komponent zaxirasi bilan yechiladi
+    (har bir marka uchun bitta variant); aks holda har bir marka mustaqil, kategoriyalar bilan.
+    deadline - Deadline: birgalikdagi LP qolgan vaqt bilan cheklanadi (vaqt tugasa None,
+    deadline.completed = False); mustaqil markalarda chegara hisobi shu paytgacha eng yaxshisi bilan.
+    perf - PerfRecorder: lp_solves (birgalikdagi LP), lp_sweeps, slp_iterations, frontier_breakpoints.
+    
+    Returns:
+        dict: {'grades': [{target_octane, total_weight, variants}, ...],
+               'usage': [{product_id, product_name, used_kg, available_kg, shortage_kg}, ...]}
+        yoki None - birgalikdagi reja mavjud emas
+    """
+    availability = availability or {}
+    deadline = Deadline.coerce(deadline)
+    perf = PerfRecorder.coerce(perf)
+    products_list = load_blend_products(products_data)
+    octanes, prices, caps = blend_arrays(products_list)
+    octane_model = compile_octane_model(products_list, method) if method != 'linear' else None
+    
+    results = []
+    used = {}
+    if joint:
+        # Oktan diapazonidan tashqaridagi markalar LP ga kiritilmaydi - ular uchun zaxira emas,
+        # oktan xatosi (variantlarsiz, 'octane_bounds' bilan)
+        bounds = (model_octane_bounds(octane_model, prices, caps) if octane_model is not None
+                  else octane_bounds(octanes, prices, caps))
+        reachable = [bounds is None or bounds[0] - 1e-6 <= t <= bounds[1] + 1e-6 for t, _ in grades]
+        planned = [grade for grade, ok in zip(grades, reachable) if ok]
+        plan = []
+        if planned:
+            coefficients = octane_model.coefficients() if octane_model is not None else octanes
+            targets = [octane_model.to_coefficient_space(t) if octane_model is not None else t for t, _ in planned]
+            plan = solve_multi_grade_lp(
+                coefficients, prices, caps, targets, [float(w) for _, w in planned],
+                [availability.get(str(p.id), availability.get(p.id, np.inf)) for p in products_list],
+                deadline=deadline
+            )
+            perf.count('lp_solves')
+            if plan is None:
+                return None
+        plan = iter(plan)
+        for (target_octane, total_weight), ok in zip(grades, reachable):
+            if not ok:
+                results.append({
+                    'target_octane': target_octane, 'total_weight': total_weight, 'variants': [],
+                    'octane_bounds': {'min': round(bounds[0], 2), 'max': round(bounds[1], 2)}
+                })
+                continue
+            percentages = next(plan)
+            final_octane = (float(octane_model.octane(percentages)) if octane_model is not None
+                            else float(percentages @ octanes) / 100.0)
+            variant = percentages_variant(products_list, percentages, prices, final_octane, total_weight)
+            variant['variant_number'] = 1
+            # Sarf aniq LP yechimidan (ko'rsatiladigan foizlar yaxlitlangan)
+            for product, pct in zip(products_list, percentages):
+                used[product.id] = used.get(product.id, 0.0) + float(total_weight) * float(pct) / 100.0
+            results.append({'target_octane': target_octane, 'total_weight': total_weight, 'variants': [variant]})
+    else:
+        frontier = None
+        if octane_model is None:
+            frontier = price_octane_frontier(octanes, prices, caps)
+            perf.count('lp_sweeps')
+        for target_octane, total_weight in grades:
+            variants = frontier_blend_variants(products_list, target_octane, total_weight,
+                                               octane_model=octane_model, frontier=frontier, deadline=deadline,
+                                               perf=perf)
+            if not variants:
+                # Maqsadga erishib bo'lmaydi - eng yaqin variant
+                variants = nearest_blend_variants(products_list, target_octane, total_weight, octane_model)
+            results.append({'target_octane': target_octane, 'total_weight': total_weight, 'variants': variants})
+    
+    # Komponentlar sarfi - har bir markaning eng arzon (birinchi) varianti bo'yicha
+    if not joint:
+        for grade in results:
+            if grade['variants'] and grade['total_weight']:
+                for item in grade['variants'][0]['products']:
+                    used[item['product_id']] = used.get(item['product_id'], 0.0) + item['weight_kg']
+    usage = []
+    for product in products_list:
+        available = availability.get(str(product.id), availability.get(product.id))
+        used_kg = used.get(product.id, 0.0)
+        usage.append({
+            'product_id': product.id,
+            'product_name': product.name,
+            'used_kg': round(used_kg, 2),
+            'available_kg': round(available, 2) if available is not None else None,
+            'shortage_kg': round(max(used_kg - available, 0.0), 2) if available is not None else 0.0,
+        })
+    return {'grades': results, 'usage': usage}
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def calculate_gasoline_blend_batch(request):
+    """AJAX endpoint: bir nechta marka (masalan AI-80, AI-92, AI-95, AI-98) uchun bitta so'rovda hisob"""
+    deadline = Deadline(getattr(settings, 'BLEND_SLA_MS', None))
+    try:
+        data = json.loads(request.body)
+        
+        try:
+            grades, valid_products, availability, method, joint = parse_blend_batch_request(data)
+        except ValueError as e:
+            return JsonResponse({
+                'success': False,
+                'error': str(e)
+            })
+        
+        plan = plan_blend_grades(grades, valid_products, availability, method, joint, deadline=deadline)
+        if plan is None:
+            return JsonResponse({
+                'success': False,
+                'error': ('Совместный план невозможен при заданных запасах компонентов' if deadline.completed
+                          else 'Превышено время расчета совместного плана'),
+                'completed': deadline.completed
+            })
+        
+        response_grades = []
+        for grade in plan['grades']:
+            target_octane, variants = grade['target_octane'], grade['variants']
+            if not variants:
+                bounds = grade.get('octane_bounds')
+                response_grades.append({
+                    'target_octane': target_octane,
+                    'success': False,
+                    'error': (f"AI-{target_octane} ga erishib bo'lmaydi. Mavjud productlar oktan diapazoni: "
+                              f"{bounds['min']}-{bounds['max']}" if bounds
+                              else f'AI-{target_octane} uchun variantlar topilmadi'),
+                    'octane_bounds': bounds
+                })
+                continue
+            calculation = save_blend_calculation(target_octane, grade['total_weight'], variants, method)
+            response_grades.append({
+                'target_octane': target_octane,
+                'success': True,
+                'calculation_id': calculation.id,
+                'variants': variants,
+                'variants_count': len(variants),
+                'best_variant_index': calculation.best_variant_index,
+            })
+        
+        return JsonResponse({
+            'success': True,
+            'method': method,
+            'joint': joint,
+            'grades': response_grades,
+            'usage': plan['usage'],
+            'completed': deadline.completed,
+            'elapsed_ms': deadline.elapsed_ms()
+        })
+        
+    except Exception as e:
+        logger.error(f"Gasoline blend batch error: {str(e)}", exc_info=True)
+        return JsonResponse({
+            'success': False,
+            'error': f'Ошибка: {str(e)}'
+        })
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def create_blend_job(request):
+    """AJAX endpoint: aralashma hisobini fon vazifasi sifatida boshlash (katta product to'plamlari uchun)"""
+    try:
+        data = json.loads(request.body)
+        
+        try:
+            target_octane, _, _, _, _, _ = parse_blend_request(data)
+            # Seed vazifa bilan saqlanadi - holat javobida qaytariladi, vazifani aynan takrorlash mumkin
+            data['seed'] = request_seed(data.get('seed'))
+        except ValueError as e:
+            return JsonResponse({
+                'success': False,
+                'error': str(e)
+            })
+        
+        job = submit_blend_job(data, target_octane)
+        return JsonResponse({
+            'success': True,
+            'job_id': job.id,
+            'status': job.status,
+            'seed': data['seed']
+        })
+        
+    except Exception as e:
+        logger.error(f"Blend job submit error: {str(e)}")
+        return JsonResponse({
+            'success': False,
+            'error': f'Ошибка: {str(e)}'
+        })
+
+
+@require_http_methods(["GET"])
+def blend_job_status(request, job_id):
+    """AJAX endpoint: fon vazifasi holati, progressi va natijalari"""
+    job = BlendJob.objects.filter(id=job_id).select_related('calculation').first()
+    if job is None:
+        return JsonResponse({
+            'success': False,
+            'error': 'Задача не найдена'
+        }, status=404)
+    
+    response = {
+        'success': True,
+        'job_id': job.id,
+        'status': job.status,
+        'target_octane': job.target_octane,
+        'seed': (job.request_data or {}).get('seed'),
+        'progress': {
+            'steps_done': job.steps_done,
+            'steps_total': job.steps_total,
+            'percent': job.progress_percent,
+            'best_price': job.best_price
+        },
+        'partial_results': job.partial_results,
+        'error': job.error
+    }
+    if job.calculation is not None:
+        response.update({
+            'calculation_id': job.calculation.id,
+            'variants': job.calculation.blend_variants,
+            'variants_count': len(job.calculation.blend_variants),
+            'best_variant_index': job.calculation.best_variant_index
+        })
+    return JsonResponse(response)
+
+
 @csrf_exempt
 @require_http_methods(["POST"])
 def save_product_configuration(request):
@@ -1986,21 +1977,32 @@ def saved_configurations_list(request):
     """Список сохраненных конфигураций"""
     configs = SavedProductConfiguration.objects.filter(is_active=True).order_by('-created_at')
     
-    # Product ma'lumotlarini yuklash
+    # Product ma'lumotlarini yuklash - barcha konfiguratsiyalar uchun bitta so'rov
+    product_ids = set()
+    for config in configs:
+        for product_id in config.products_config:
+            try:
+                product_ids.add(int(product_id))
+            except (ValueError, TypeError):
+                continue
+    products_by_id = Product.objects.in_bulk(product_ids)
+    
     configs_with_products = []
     for config in configs:
         products_info = []
         for product_id, p_data in config.products_config.items():
             try:
-                product = Product.objects.get(id=int(product_id))
-                products_info.append({
-                    'product': product,
-                    'octane': p_data.get('octane'),
-                    'price': p_data.get('price'),
-                    'gost_percentage': p_data.get('gost_percentage')
-                })
-            except (Product.DoesNotExist, ValueError, TypeError):
+                product = products_by_id.get(int(product_id))
+            except (ValueError, TypeError):
+                continue
+            if product is None:
                 continue
+            products_info.append({
+                'product': product,
+                'octane': p_data.get('octane'),
+                'price': p_data.get('price'),
+                'gost_percentage': p_data.get('gost_percentage')
+            })
         
         configs_with_products.append({
             'config': config,
@@ -2374,16 +2376,17 @@ def save_processing_calculation(request):
                     'error': 'Модель ProcessingCalculation не найдена. Выполните миграции: python manage.py migrate'
                 }, status=500)
             
-            calculation = ProcessingCalculation.objects.create(
-                calculation_date=calculation_date,
-                sale_price=sale_price,
-                materials=materials,
-                total_percentage=total_percentage,
-                total_octane_percent=total_octane_percent,
-                total_cost=total_cost,
-                total_profit=total_profit,
-                notes=notes
-            )
+            with transaction.atomic():
+                calculation = ProcessingCalculation.objects.create(
+                    calculation_date=calculation_date,
+                    sale_price=sale_price,
+                    materials=materials,
+                    total_percentage=total_percentage,
+                    total_octane_percent=total_octane_percent,
+                    total_cost=total_cost,
+                    total_profit=total_profit,
+                    notes=notes
+                )
         except Exception as db_error:
             error_msg = str(db_error)
             logger.error(f"Database error: {error_msg}", exc_info=True)
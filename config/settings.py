@@ -131,6 +131,32 @@ STATICFILES_DIRS = [
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Partitioning of calculation tables by month (PostgreSQL only)
+# See: python manage.py manage_partitions
+CALCULATION_PARTITION_MONTHS_AHEAD = 3
+CALCULATION_RETENTION_MONTHS = None  # None - keep all partitions
+CALCULATION_ARCHIVE_DIR = BASE_DIR / 'archive'
+
+# Gasoline blend optimizer: evaluate product combinations of the genetic search
+# (non-linear methods with max_products) in a shared process pool
+BLEND_PARALLEL = False
+BLEND_POOL_WORKERS = None  # None - number of CPUs
+BLEND_SLA_MS = 500  # end-to-end time budget of a blend request; None - unbounded
+OCTANE_BLENDING_INDEX_K = 0.02  # 'weighted' octane method: blending index exp(k * octane)
+BLEND_PERF_RESPONSE = False  # always include the '_perf' block (otherwise only when the request sets "perf": true)
+BLEND_PERF_SLOW_MS = 1000  # requests slower than this are logged at WARNING together with their inputs
+
+# Background blend jobs: in-process thread pool, progress stored in BlendJob
+BLEND_JOB_WORKERS = 2
+BLEND_JOB_PROGRESS_INTERVAL = 0.5  # seconds between progress writes
+BLEND_JOB_TIMEOUT_MS = None  # search time budget of a job; None - unbounded
+
+# Gasoline blend result cache: in-process LRU, optionally backed by a shared CACHES alias
+BLEND_CACHE_ENABLED = True
+BLEND_CACHE_SIZE = 256
+BLEND_CACHE_ALIAS = None  # e.g. 'default' to share results between worker processes
+BLEND_CACHE_TIMEOUT = 24 * 60 * 60  # seconds, shared backend only
+
 try:
     from .settings_dev import *
 except ImportError: